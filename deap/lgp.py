@@ -3,17 +3,257 @@ Linear Genetic Programming (LGP) with DEAP. It provides necessary functions run
 The behaviors of LGP is defined by a parameter file
 
 This file is equivalent to "Evolve.java" in ECJ
+
+    python -m deap.lgp -file tasks/Symbreg/parameters/simpleLGP_SRMT.params [-p key=value ...]
+    python -m deap.lgp -checkpoint ec.10.gz
+
+A parameter file with ``jobs = N`` runs N independent jobs. Job j uses the
+seeds seed.x + j * numthreads (numthreads = max(evalthreads, breedthreads)),
+and when N > 1 its statistics files and checkpoints are prefixed with
+"job.j.". The jobs run concurrently in up to ``job-processes`` processes
+(default: the number of CPUs). The problem is asked to load its data
+(``preloadData``) before the job processes are forked, so the dataset is read
+once and shared by all the jobs.
+
+With ``exch = ec.exchange.IslandExchange`` and ``exch.num-islands = K``, every
+job is one run of K islands: K processes exchanging migrants, each with its
+own seeds and with its statistics files and checkpoints prefixed with
+"island.i.". The jobs then run one after another. The files of the
+profiler (profile.file, profile.cprofile) are prefixed like the statistics
+files.
+
+``silent = true`` suppresses the progress messages of the runner and of the
+jobs (warnings and fatal errors are still printed).
 """
 
 '''
 Use the ideas of ECJ to use and reimplement the functions of DEAP.
 '''
 
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import sys
 
 # import classes and files
+_LGP_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lgp_src")
+if _LGP_SRC not in sys.path:
+    sys.path.insert(0, _LGP_SRC)
+# the problems of the tasks package
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from ec.EvolutionState import EvolutionState
+from ec.util.Profiler import Profiler
+from ec.util import Output, Parameter, ParameterDatabase
+
+A_FILE = "-file"
+A_CHECKPOINT = "-checkpoint"
+A_PARAM = "-p"
+
+P_STATE = "state"
+P_JOBS = "jobs"
+P_PROCESSES = "job-processes"
 
 
 # set up LGP behaviors
 '''read parameters from the parameter file and set it into pset and toolbox'''
 
-# define main() and run main()  
\ No newline at end of file
+def parseArguments(argv):
+    '''(parameter file, checkpoint file, ["key=value", ...]) of a command line'''
+    filename = None
+    checkpoint = None
+    overrides = []
+    x = 0
+    while x < len(argv):
+        if argv[x] == A_FILE and x + 1 < len(argv):
+            filename = argv[x + 1]
+        elif argv[x] == A_CHECKPOINT and x + 1 < len(argv):
+            checkpoint = argv[x + 1]
+        elif argv[x] == A_PARAM and x + 1 < len(argv):
+            overrides.append(argv[x + 1])
+        else:
+            raise SystemExit(f"Unknown argument {argv[x]}\n{usage()}")
+        x += 2
+    if filename is None and checkpoint is None:
+        raise SystemExit(usage())
+    return filename, checkpoint, overrides
+
+
+def usage():
+    return ("Usage: python -m deap.lgp -file <parameter file> [-p key=value ...]\n"
+            "       python -m deap.lgp -checkpoint <checkpoint file>")
+
+
+def _jobFile(value, prefix):
+    '''prefix the file name of a file parameter'''
+    relative = value.startswith("$")
+    directory, name = os.path.split(value[1:] if relative else value)
+    return ("$" if relative else "") + os.path.join(directory, prefix + name)
+
+
+def jobArguments(parameters, job, jobs, island=0, islands=1):
+    '''the "key=value" overrides giving job (and the island of the job) its own seeds and output files'''
+    numthreads = max(parameters.getIntWithDefault(Parameter(EvolutionState.P_EVALTHREADS), None, 1),
+                     parameters.getIntWithDefault(Parameter(EvolutionState.P_BREEDTHREADS), None, 1))
+    seed0 = parameters.getIntWithDefault(Parameter(EvolutionState.P_SEED).push("0"), None, None)
+    if seed0 is None:
+        seed0 = random.randrange(1 << 31)
+        parameters.set(Parameter(EvolutionState.P_SEED).push("0"), seed0)
+
+    args = []
+    for x in range(numthreads):
+        seed = parameters.getIntWithDefault(Parameter(EvolutionState.P_SEED).push(str(x)), None, seed0 + x)
+        args.append(f"{EvolutionState.P_SEED}.{x}={seed + (job * islands + island) * numthreads}")
+
+    prefix = (f"job.{job}." if jobs > 1 else "") + (f"island.{island}." if islands > 1 else "")
+    if prefix:
+        for key in parameters.params:
+            if key.split(".")[0] in (EvolutionState.P_STATISTICS, EvolutionState.P_PROFILE) and \
+                    key.split(".")[-1] in (Profiler.P_FILE, Profiler.P_CPROFILE):
+                args.append(f"{key}={_jobFile(parameters.params[key], prefix)}")
+        checkpointPrefix = parameters.getStringWithDefault(Parameter(EvolutionState.P_CHECKPOINTPREFIX), None, "ec")
+        args.append(f"{EvolutionState.P_CHECKPOINTPREFIX}={prefix}{checkpointPrefix}")
+    if islands > 1:
+        args.append(f"{EvolutionState.P_EXCHANGER}.{exchangerClass(parameters).P_ISLANDID}={island}")
+    return args
+
+
+def exchangerClass(parameters):
+    '''the class of the exchanger (imported only when the parameter file names it), None if undefined'''
+    try:
+        return parameters.getClassForParameter(Parameter(EvolutionState.P_EXCHANGER), None, object)
+    except ValueError:
+        return None
+
+
+def numIslands(parameters):
+    '''the island processes of every job: exch.num-islands if the exchanger runs islands (IslandExchange)'''
+    exchanger = exchangerClass(parameters)
+    if not hasattr(exchanger, "getNumIslands"):
+        return 1
+    return max(1, exchanger.getNumIslands(parameters, Parameter(EvolutionState.P_EXCHANGER)))
+
+
+def preloadData(parameters):
+    '''let the problem load its data in this process, before the jobs are forked'''
+    base = Parameter(EvolutionState.P_EVALUATOR).push("problem")
+    try:
+        problem = parameters.getClassForParameter(base, None, object)
+    except ValueError:
+        # reported by the jobs themselves
+        return
+    if hasattr(problem, "preloadData"):
+        problem.preloadData(parameters, base)
+
+
+def runJob(filename, overrides, job):
+    parameters = ParameterDatabase(filename, overrides)
+    cls = EvolutionState
+    if parameters.exists(Parameter(P_STATE)):
+        cls = parameters.getClassForParameter(Parameter(P_STATE), None, EvolutionState)
+    state = cls(filename, overrides)
+    state.job = job
+    state.output.message(f"Job: {job}")
+    state.run(EvolutionState.C_STARTED_FRESH)
+    return job
+
+
+def _runJob(task):
+    return runJob(*task)
+
+
+def runIsland(filename, overrides, job, mailboxes, stop, exchanger):
+    exchanger.connect(mailboxes, stop)
+    return runJob(filename, overrides, job)
+
+
+def runIslands(filename, overrides, parameters, job, jobs, islands):
+    '''run the islands of a job in as many processes, connected by one mailbox per island'''
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        context = multiprocessing.get_context()
+    exchanger = exchangerClass(parameters)
+    exch = Parameter(EvolutionState.P_EXCHANGER)
+    mailboxSize = parameters.getIntWithDefault(exch.push(exchanger.P_MAILBOXSIZE), None,
+                                               exchanger.DEFAULT_MAILBOXSIZE)
+    mailboxes = [context.Queue(mailboxSize) for _ in range(islands)]
+    stop = context.Event()
+    processes = [context.Process(target=runIsland,
+                                 args=(filename, list(overrides or []) +
+                                       jobArguments(parameters, job, jobs, island, islands), job, mailboxes, stop,
+                                       exchanger))
+                 for island in range(islands)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def runJobs(filename, overrides=None):
+    parameters = ParameterDatabase(filename, overrides)
+    jobs = parameters.getIntWithDefault(Parameter(P_JOBS), None, 1)
+    if jobs < 1:
+        raise SystemExit("Fatal error: jobs must be >= 1")
+    processes = min(jobs, parameters.getIntWithDefault(Parameter(P_PROCESSES), None, os.cpu_count() or 1))
+    output = Output(parameters.getBoolean(Parameter(EvolutionState.P_SILENT), None, False))
+
+    islands = numIslands(parameters)
+    if islands > 1:
+        preloadData(parameters)
+        for job in range(jobs):
+            runIslands(filename, overrides, parameters, job, jobs, islands)
+            output.message(f"Job {job} finished")
+        return
+
+    tasks = [(filename, list(overrides or []) + jobArguments(parameters, job, jobs), job) for job in range(jobs)]
+    if processes <= 1:
+        for task in tasks:
+            _runJob(task)
+        return
+
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        context = multiprocessing.get_context()
+    preloadData(parameters)
+    # plain processes rather than a Pool: the jobs may start worker processes of their own
+    # (ParallelEvaluator, SimpleBreeder), which the daemonic workers of a Pool cannot
+    pending = list(tasks)
+    running = {}
+    while pending or running:
+        while pending and len(running) < processes:
+            task = pending.pop(0)
+            process = context.Process(target=runJob, args=task)
+            process.start()
+            running[process.sentinel] = (process, task[2])
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            process, job = running.pop(sentinel)
+            process.join()
+            if process.exitcode != 0:
+                for other, _ in running.values():
+                    other.terminate()
+                    other.join()
+                raise SystemExit(f"Fatal error: job {job} failed (exit code {process.exitcode})")
+            output.message(f"Job {job} finished")
+
+
+def restartFromCheckpoint(checkpoint):
+    state = EvolutionState.restoreFromCheckpoint(checkpoint)
+    state.run(EvolutionState.C_STARTED_FROM_CHECKPOINT)
+
+
+# define main() and run main()
+def main(argv=None):
+    filename, checkpoint, overrides = parseArguments(sys.argv[1:] if argv is None else argv)
+    if checkpoint is not None:
+        restartFromCheckpoint(checkpoint)
+    else:
+        runJobs(filename, overrides)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 
-class Breeder(ABC, Singleton):
+class Breeder(ABC):
     """
     A Breeder is a singleton object responsible for the breeding process during
     an evolutionary run. Only one Breeder is created and stored in the EvolutionState object.
@@ -11,10 +13,17 @@ class Breeder(ABC, Singleton):
     Breeders may be multithreaded, and care must be taken when accessing shared resources.
     """
 
+    def setup(self, state:EvolutionState, base:Parameter):
+        pass
+
     @abstractmethod
     def breedPopulation(self, state:EvolutionState)->Population:
         """
         Breeds state.population, returning a new population. In general,
         state.population should not be modified.
         """
+        pass
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        """Called at the end of the run, e.g. to stop breeding workers."""
         pass
\ No newline at end of file
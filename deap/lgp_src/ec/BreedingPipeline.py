@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from typing import List
 
 from ec.util import Parameter
+from ec.BreedingSource import BreedingSource
+from ec.SelectionMethod import SelectionMethod
+from ec.steadystate.SteadyStateBSourceForm import SteadyStateBSourceForm
 
-class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
+class BreedingPipeline(BreedingSource, SteadyStateBSourceForm):
     '''
      A BreedingPipeline is a BreedingSource which provides "fresh" individuals which
     can be used to fill a new population.  BreedingPipelines might include
@@ -33,6 +38,7 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
     P_SOURCE = "source"
 
     def __init__(self):
+        super().__init__()
         self.mybase = None
         self.likelihood = 1.0
         self.sources: List[BreedingSource] = []
@@ -68,8 +74,8 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
 
         numsources:int = self.numSources()
         if numsources == self.DYNAMIC_SOURCES:
-            numsources = state.parameters.getInt(base.push(self.P_NUMSOURCES), def_.push(self.P_NUMSOURCES), 0)
-            if numsources == -1:
+            numsources = state.parameters.getIntWithDefault(base.push(self.P_NUMSOURCES), def_.push(self.P_NUMSOURCES), -1)
+            if numsources < 0:
                 state.output.fatal("Breeding pipeline num-sources must exist and be >= 0",
                                    base.push(self.P_NUMSOURCES), def_.push(self.P_NUMSOURCES))
         elif numsources <= self.DYNAMIC_SOURCES:
@@ -83,7 +89,7 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
         for x in range(numsources):
             p = base.push(self.P_SOURCE).push(str(x))
             d = def_.push(self.P_SOURCE).push(str(x))
-            s = state.parameters.getString(p, d)
+            s = state.parameters.getParamValue(p, d)
             if s is not None and s == self.V_SAME:
                 if x == 0:
                     state.output.fatal("Source #0 cannot be declared with \"same\".", p, d)
@@ -92,14 +98,12 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
                 self.sources[x] = state.parameters.getInstanceForParameter(p, d, BreedingSource)
                 self.sources[x].setup(state, p)
 
-        state.output.exitIfErrors()
-
     def clone(self):
         import copy
         c = copy.copy(self)
-        c.sources = [None] * len( self.sources )
+        c.sources = []
         for x in range(len(self.sources)):
-            if x == 0 or self.sources[x] != self.sources[x - 1]:
+            if x == 0 or self.sources[x] is not self.sources[x - 1]:
                 c.sources.append(self.sources[x].clone())
             else:
                 c.sources.append(c.sources[x - 1])
@@ -109,7 +113,7 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
                   n:int, 
                   start:int, 
                   subpopulation:int, 
-                  inds:List[Individual], 
+                  inds:List, 
                   state:EvolutionState, 
                   thread:int, 
                   produceChildrenFromSource:bool)->int:
@@ -124,9 +128,9 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
                  state:EvolutionState, 
                  newpop:Population, 
                  subpopulation:int, 
-                 thread:int) -> boolean:
+                 thread:int) -> bool:
         for x in range(len(self.sources)):
-            if x == 0 or self.sources[x] != self.sources[x - 1]:
+            if x == 0 or self.sources[x] is not self.sources[x - 1]:
                 if not self.sources[x].produces(state, newpop, subpopulation, thread):
                     return False
         return True
@@ -136,7 +140,7 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
                          subpopulation:int, 
                          thread:int):
         for x in range(len(self.sources)):
-            if x == 0 or self.sources[x] != self.sources[x - 1]:
+            if x == 0 or self.sources[x] is not self.sources[x - 1]:
                 self.sources[x].prepareToProduce(state, subpopulation, thread)
 
     def finishProducing(self, 
@@ -144,7 +148,7 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
                          subpopulation:int, 
                          thread:int):
         for x in range(len(self.sources)):
-            if x == 0 or self.sources[x] != self.sources[x - 1]:
+            if x == 0 or self.sources[x] is not self.sources[x - 1]:
                 self.sources[x].finishProducing(state, subpopulation, thread)
 
     def preparePipeline(self, hook):
@@ -170,6 +174,6 @@ class BreedingPipeline(ABC, BreedingSource, SteadyStateBSourceForm):
             else:
                 source.sourcesAreProperForm(state)
 
+    @abstractmethod
     def defaultBase(self)->Parameter:
-        # Placeholder: override as needed
-        return self.mybase
\ No newline at end of file
+        pass
\ No newline at end of file
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import List
+
+from ec.util import Parameter
+
+class BreedingSource(ABC):
+    '''
+    A BreedingSource produces individuals for a new population, either by
+    selecting them from the current population (SelectionMethod) or by
+    breeding them from the individuals of its own sources (BreedingPipeline).
+
+    Every source has a probability (prob) of being picked by a parent which
+    chooses among several sources, e.g. MultiBreedingPipeline.
+    '''
+
+    P_PROB: str = "prob"
+    NO_PROBABILITY: float = -1.0
+
+    def __init__(self):
+        self.probability:float = self.NO_PROBABILITY
+
+    @abstractmethod
+    def defaultBase(self)->Parameter:
+        pass
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        def_ = self.defaultBase()
+        if not state.parameters.exists(base.push(self.P_PROB), def_.push(self.P_PROB)):
+            self.probability = self.NO_PROBABILITY
+        else:
+            self.probability = state.parameters.getDouble(base.push(self.P_PROB), def_.push(self.P_PROB))
+            if self.probability < 0.0:
+                state.output.fatal("Breeding source probability must be >= 0.0", base.push(self.P_PROB))
+
+    def getProbability(self)->float:
+        return self.probability
+
+    @staticmethod
+    def setupProbabilities(sources:List[BreedingSource])->List[float]:
+        '''the cumulative, normalized probabilities of the sources'''
+        total = sum(s.getProbability() for s in sources)
+        if total <= 0.0:
+            raise ValueError("The probabilities of the breeding sources sum to 0")
+        cumulative = []
+        running = 0.0
+        for s in sources:
+            running += s.getProbability() / total
+            cumulative.append(running)
+        cumulative[-1] = 1.0
+        return cumulative
+
+    @staticmethod
+    def pickRandom(cumulative:List[float], prob:float)->int:
+        '''the index of the source picked by prob in [0, 1), given setupProbabilities'''
+        for x, c in enumerate(cumulative):
+            if prob < c:
+                return x
+        return len(cumulative) - 1
+
+    def typicalIndsProduced(self)->int:
+        return 1
+
+    def produces(self, state:EvolutionState, newpop:Population, subpopulation:int, thread:int)->bool:
+        return True
+
+    def prepareToProduce(self, state:EvolutionState, subpopulation:int, thread:int):
+        pass
+
+    def finishProducing(self, state:EvolutionState, subpopulation:int, thread:int):
+        pass
+
+    def preparePipeline(self, hook):
+        pass
+
+    @abstractmethod
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        '''produce between min and max individuals into inds[start:], and return how many'''
+        pass
+
+    def clone(self):
+        import copy
+        return copy.copy(self)
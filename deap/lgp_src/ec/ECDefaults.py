@@ -2,5 +2,5 @@ from ec.util import Parameter
 
 class ECDefaults:
     @classmethod
-    def base()->Parameter:
+    def base(cls)->Parameter:
         return Parameter("ec")
\ No newline at end of file
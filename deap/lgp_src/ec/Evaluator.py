@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import functools
+from abc import ABC, abstractmethod
+from typing import List
+
+from ec.util import Parameter
+from ec.util.FitnessCache import FitnessCache
+
+class Evaluator(ABC):
+    '''
+    An Evaluator is a singleton object which is responsible for the
+    evaluation process during the course of an evolutionary run.  Only
+    one Evaluator is created in a run, and is stored in the EvolutionState
+    object.  Evaluators typically do their work by applying the Problem
+    (p_problem) to each individual which has not been evaluated yet.
+
+    Evaluators may keep a FitnessCache keyed by the canonical effective
+    program of the individuals (eval.cache = true). Offspring which only
+    differ from an evaluated program in their introns then reuse its fitness
+    instead of being evaluated again. The cache holds at most
+    eval.cache.memory megabytes. Truncated fitnesses are not cached.
+
+    After evaluating, evaluators add the work reported by the problem
+    (takeNodeEvaluations) to state.nodeEvaluation, the counter of the
+    nodeevaluations budget, and count the individuals the problem evaluated
+    in numEvaluated.
+    '''
+
+    P_PROBLEM: str = "problem"
+    P_CACHE: str = "cache"
+    P_CACHEMEMORY: str = "memory"
+
+    DEFAULT_CACHEMEMORY: float = 64.0
+
+    def __init__(self):
+        self.p_problem = None
+        self.cache:FitnessCache = None
+        self.numEvaluated:int = 0
+        # the individuals given their final fitness by evaluateFinal, per subpopulation
+        self.finalIndividuals:List = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        self.p_problem = state.parameters.getInstanceForParameter(base.push(self.P_PROBLEM), None, object)
+        self.p_problem.setup(state, base.push(self.P_PROBLEM))
+
+        if state.parameters.getBoolean(base.push(self.P_CACHE), None, False):
+            megabytes = state.parameters.getDoubleWithDefault(
+                base.push(self.P_CACHE).push(self.P_CACHEMEMORY), None, self.DEFAULT_CACHEMEMORY)
+            if megabytes <= 0:
+                state.output.fatal("The memory of the evaluation cache must be > 0 megabytes",
+                                   base.push(self.P_CACHE).push(self.P_CACHEMEMORY))
+            self.cache = FitnessCache(int(megabytes * 1024 * 1024))
+
+    def lookupFitness(self, ind)->bool:
+        '''if the cache knows the program of ind, give ind a copy of the cached fitness and return True'''
+        if self.cache is None:
+            return False
+        fitness = self.cache.get(ind.getCanonicalKey())
+        if fitness is None:
+            return False
+        ind.fitness = fitness.clone()
+        ind.evaluated = True
+        return True
+
+    def storeFitness(self, ind):
+        '''cache the fitness of ind, unless it is truncated (see Fitness)'''
+        if self.cache is not None and ind.evaluated and not getattr(ind.fitness, "truncated", False):
+            self.cache.put(ind.getCanonicalKey(), ind.fitness.clone())
+
+    @staticmethod
+    def takeNodeEvaluations(problem)->int:
+        return problem.takeNodeEvaluations() if hasattr(problem, "takeNodeEvaluations") else 0
+
+    def addNodeEvaluations(self, state:EvolutionState, count:int):
+        state.nodeEvaluation = max(getattr(state, "nodeEvaluation", 0), 0) + count
+
+    def prepareEvaluation(self, state:EvolutionState):
+        '''called before the population is evaluated: if the problem changed its fitness
+        function, the previous fitnesses (and the cached ones) are discarded. The problem
+        is then told that a generation is about to be evaluated (prepareToEvaluate).'''
+        if hasattr(self.p_problem, "fitnessChanged") and self.p_problem.fitnessChanged(state):
+            if self.cache is not None:
+                self.cache.clear()
+            for subpop in state.population.subpops:
+                for ind in subpop.individuals:
+                    ind.evaluated = False
+        if hasattr(self.p_problem, "prepareToEvaluate"):
+            self.p_problem.prepareToEvaluate(state, 0)
+
+    def evaluateFinal(self, state:EvolutionState):
+        '''give the elites of the final population (breed.elite.N, at least the best
+        individual) and the best individuals of the run kept by the statistics
+        (getBestSoFar) the fitness the problem reports at the end of a run, see
+        Problem.reevaluate. They are kept in finalIndividuals, so that the statistics
+        report the best individual of the run on the final fitness.'''
+        self.finalIndividuals = None
+        if not hasattr(self.p_problem, "reevaluate"):
+            return
+        numElites = getattr(state.breeder, "numElites", [])
+        getBestSoFar = getattr(getattr(state, "statistics", None), "getBestSoFar", None)
+        bestSoFar = getBestSoFar() if getBestSoFar is not None else None
+        order = functools.cmp_to_key(lambda a, b: -1 if a.fitness.betterThan(b.fitness)
+                                     else 1 if b.fitness.betterThan(a.fitness) else 0)
+        self.finalIndividuals = []
+        for x, subpop in enumerate(state.population.subpops):
+            n = max(1, numElites[x] if x < len(numElites) else 0)
+            individuals = sorted(subpop.individuals, key=order)[:n]
+            if bestSoFar is not None and x < len(bestSoFar) and bestSoFar[x] is not None:
+                individuals.append(bestSoFar[x])
+            for ind in individuals:
+                self.p_problem.reevaluate(state, ind, x, 0)
+            self.finalIndividuals.append(individuals)
+        self.addNodeEvaluations(state, self.takeNodeEvaluations(self.p_problem))
+
+    @abstractmethod
+    def evaluatePopulation(self, state:EvolutionState):
+        '''Evaluates the fitness of an entire population.'''
+        pass
+
+    @abstractmethod
+    def runComplete(self, state:EvolutionState)->bool:
+        '''returns True if an ideal individual has been found'''
+        pass
+
+    def initializeContacts(self, state:EvolutionState):
+        pass
+
+    def reinitializeContacts(self, state:EvolutionState):
+        '''called when a run restarts from a checkpoint'''
+        self.initializeContacts(state)
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        pass
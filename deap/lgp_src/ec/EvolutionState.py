@@ -1,6 +1,10 @@
+from __future__ import annotations
 
 from ec.util import *
+from ec.util.ClassRegistry import ClassRegistry
+from ec.util.Profiler import Profiler
 
+import os
 import random
 
 class EvolutionState:
@@ -12,6 +16,10 @@ class EvolutionState:
 
     UNDEFINED: int = -1
 
+    # How a run is started, see run()
+    C_STARTED_FRESH: int = 0
+    C_STARTED_FROM_CHECKPOINT: int = 1
+
     # Parameter keys
     P_INITIALIZER: str = "init"
     P_FINISHER: str = "finish"
@@ -22,23 +30,46 @@ class EvolutionState:
     P_GENERATIONS: str = "generations"
     P_NODEEVALUATIONS: str = "nodeevaluations"
     P_EVALUATIONS: str = "evaluations"
-
-    def __init__(self, parameterPath:str):
-        # ParameterDatabase
-        self.parameters = ParameterDatabase(parameterPath)
-
-        self.output = Output()
-
-        self.random : [random] = [random] * 1
-
-        self.breedthreads:int = 0
+    P_EVALTHREADS: str = "evalthreads"
+    P_BREEDTHREADS: str = "breedthreads"
+    P_SEED: str = "seed"
+    P_CHECKPOINT: str = "checkpoint"
+    P_CHECKPOINTPREFIX: str = "checkpoint-prefix"
+    P_CHECKPOINTMODULO: str = "checkpoint-modulo"
+    P_CHECKPOINTDIRECTORY: str = "checkpoint-directory"
+    P_QUITONRUNCOMPLETE: str = "quit-on-run-complete"
+    P_PROFILE: str = "profile"
+    P_SILENT: str = "silent"
+
+    def __init__(self, parameterPath:str, args:list=None):
+        # ParameterDatabase, args are "key=value" overrides of the parameter file
+        self.parameters = ParameterDatabase(parameterPath, args)
+
+        # the index of this run among the jobs of the runner (deap/lgp.py)
+        self.job:int = 0
+
+        self.output = Output(self.parameters.getBoolean(Parameter(self.P_SILENT), None, False))
+
+        # one random stream per thread, see setupThreads
+        self.random : [random.Random] = [random.Random()]
+
+        self.breedthreads:int = 1
         self.evalthreads:int = 1
 
         self.generation = self.__class__.UNDEFINED
-        self.numGeneration = 200
-        
+        self.numGenerations = self.__class__.UNDEFINED
+        self.numEvaluations = self.__class__.UNDEFINED
+        self.quitOnRunComplete = False
+
+        self.checkpoint = False
+        self.checkpointPrefix = "ec"
+        self.checkpointModulo = 1
+        self.checkpointDirectory = None
+
+        # instructions times fitness cases executed, and the budget of the run (nodeevaluations)
         self.nodeEvaluation = self.__class__.UNDEFINED
         self.numNodeEva = 1e7
+        self.limitNodeEvaluations = False
 
         self.population = None  # will be a Population instance
         self.evaluator = None  # Evaluator instance
@@ -46,35 +77,39 @@ class EvolutionState:
         self.breeder = None  # Breeder instance
         self.statistics = None  # Statistics instance
 
+        # per-generation timings and counters, see Profiler
+        self.profiler = Profiler()
+
+    def setupThreads(self):
+        '''read evalthreads, breedthreads and seed.N, and give every thread its own random stream.
+        Thread x is seeded with seed.x, or seed.0 + x if seed.x is not defined.'''
+        self.evalthreads = self.parameters.getIntWithDefault(Parameter(self.P_EVALTHREADS), None, 1)
+        self.breedthreads = self.parameters.getIntWithDefault(Parameter(self.P_BREEDTHREADS), None, 1)
+        if self.evalthreads < 1 or self.breedthreads < 1:
+            self.output.fatal("evalthreads and breedthreads must be >= 1")
+
+        seed0 = self.parameters.getIntWithDefault(Parameter(self.P_SEED).push("0"), None, random.randrange(1 << 31))
+        self.random = [random.Random(self.parameters.getIntWithDefault(Parameter(self.P_SEED).push(str(x)), None, seed0 + x))
+                       for x in range(max(self.evalthreads, self.breedthreads))]
+
     def setup(self, base:str):
 
         p = Parameter(base)
 
+        self.setupThreads()
+
         # self.data = [{} for _ in self.random]  # per-thread data
 
-        # self.checkpoint = parameters.getBoolean("checkpoint", False)
-        # self.checkpointPrefix = parameters.getString("checkpoint-prefix")
-
-        # if self.checkpointPrefix is None:
-        #     old_prefix = parameters.getString("prefix")
-        #     if old_prefix is None:
-        #         self.fatal("No checkpoint prefix specified.")
-        #     else:
-        #         self.output.warning("The parameter 'prefix' is deprecated. Please use 'checkpoint-prefix'.")
-        #         self.checkpointPrefix = old_prefix
-        # elif parameters.getString("prefix") is not None:
-        #     self.output.warning("You have BOTH 'prefix' and 'checkpoint-prefix' defined. Using 'checkpoint-prefix'.")
-
-        # self.checkpointModulo = parameters.getInt("checkpoint-modulo", 1)
-        # if self.checkpointModulo <= 0:
-        #     self.fatal("The checkpoint modulo must be an integer > 0.")
-
-        # if parameters.exists("checkpoint-directory"):
-        #     self.checkpointDirectory = parameters.getFile("checkpoint-directory")
-        #     if self.checkpointDirectory is None:
-        #         self.fatal("The checkpoint directory name is invalid.")
-        #     if not self.checkpointDirectory.is_dir():
-        #         self.fatal("The checkpoint directory is not a directory.")
+        self.checkpoint = self.parameters.getBoolean(Parameter(self.P_CHECKPOINT), None, False)
+        self.checkpointPrefix = self.parameters.getStringWithDefault(Parameter(self.P_CHECKPOINTPREFIX), None, "ec")
+        self.checkpointModulo = self.parameters.getIntWithDefault(Parameter(self.P_CHECKPOINTMODULO), None, 1)
+        if self.checkpointModulo <= 0:
+            self.output.fatal("The checkpoint modulo must be an integer > 0.", Parameter(self.P_CHECKPOINTMODULO))
+
+        if self.parameters.exists(Parameter(self.P_CHECKPOINTDIRECTORY)):
+            self.checkpointDirectory = self.parameters.getFile(Parameter(self.P_CHECKPOINTDIRECTORY))
+            if not os.path.isdir(self.checkpointDirectory):
+                self.output.fatal("The checkpoint directory is not a directory.", Parameter(self.P_CHECKPOINTDIRECTORY))
 
         if self.parameters.exists(self.P_EVALUATIONS):
             self.numEvaluations = self.parameters.getInt(self.P_EVALUATIONS, None)
@@ -84,49 +119,66 @@ class EvolutionState:
         if self.parameters.exists(self.P_GENERATIONS):
             self.numGenerations = self.parameters.getInt(self.P_GENERATIONS, None)
             if self.numGenerations <= 0:
-                self.fatal("Generations must be >= 1 if defined.")
+                self.output.fatal("Generations must be >= 1 if defined.")
             if self.numEvaluations != self.__class__.UNDEFINED:
                 self.output.warning("Both generations and evaluations defined. Generations will be ignored.")
                 self.numGenerations = self.__class__.UNDEFINED
         elif self.numEvaluations == self.__class__.UNDEFINED:
-            self.fatal("Either evaluations or generations must be defined.")
+            self.output.fatal("Either evaluations or generations must be defined.")
 
         if self.parameters.exists(self.P_NODEEVALUATIONS):
             self.numNodeEva = self.parameters.getDouble(self.P_NODEEVALUATIONS, None)
             if self.numNodeEva <= 0:
-                self.fatal("Node evaluations must be >= 1 if defined.")
+                self.output.fatal("Node evaluations must be >= 1 if defined.")
+            self.limitNodeEvaluations = True
+        self.nodeEvaluation = 0
+
+        self.quitOnRunComplete = self.parameters.getBoolean(Parameter(self.P_QUITONRUNCOMPLETE), None, False)
 
-        # self.quitOnRunComplete = parameters.getBoolean("quit-on-run-complete", False)
+        # the initializer and the finisher have no Python base class yet
+        self.initializer = self.loadComponent(self.P_INITIALIZER, None)
+        self.initializer.setup(self, Parameter(self.P_INITIALIZER))
 
-        self.initializer = self.parameters.getInstanceForParameter(self.P_INITIALIZER, None, Initializer)
-        self.initializer.setup(self, self.P_INITIALIZER)
+        self.finisher = self.loadComponent(self.P_FINISHER, None)
+        self.finisher.setup(self, Parameter(self.P_FINISHER))
 
-        self.finisher = self.parameters.getInstanceForParameter(self.P_FINISHER, None, Finisher)
-        self.finisher.setup(self, self.P_FINISHER)
+        self.breeder = self.loadComponent(self.P_BREEDER, "ec.Breeder")
+        self.breeder.setup(self, Parameter(self.P_BREEDER))
 
-        self.breeder = self.parameters.getInstanceForParameter(self.P_BREEDER, None, Breeder)
-        self.breeder.setup(self, self.P_BREEDER)
+        self.evaluator = self.loadComponent(self.P_EVALUATOR, "ec.Evaluator")
+        self.evaluator.setup(self, Parameter(self.P_EVALUATOR))
 
-        self.evaluator = self.parameters.getInstanceForParameter(self.P_EVALUATOR, None, Evaluator)
-        self.evaluator.setup(self, self.P_EVALUATOR)
+        self.statistics = self.loadComponent(self.P_STATISTICS, "ec.Statistics")
+        self.statistics.setup(self, Parameter(self.P_STATISTICS))
 
-        self.statistics = self.parameters.getInstanceForParameterEq(self.P_STATISTICS, None, Statistics)
-        self.statistics.setup(self, self.P_STATISTICS)
+        self.exchanger = self.loadComponent(self.P_EXCHANGER, "ec.Exchanger")
+        self.exchanger.setup(self, Parameter(self.P_EXCHANGER))
 
-        self.exchanger = self.parameters.getInstanceForParameter(self.P_EXCHANGER, None, Exchanger)
-        self.exchanger.setup(self, self.P_EXCHANGER)
+        self.profiler.setup(self, Parameter(self.P_PROFILE))
 
         self.generation = 0
 
+    def loadComponent(self, key:str, baseClass:str):
+        '''an instance of the class named by parameter key, a subclass of baseClass (a class name, None for any)'''
+        try:
+            return self.parameters.getInstanceForParameter(
+                Parameter(key), None, ClassRegistry.resolve(baseClass) if baseClass is not None else object)
+        except ValueError as e:
+            self.output.fatal(str(e), Parameter(key))
+
     def finish(self, result: int):
+        self.parameters.report(self.output)
+        self.evaluator.evaluateFinal(self)
         self.statistics.finalStatistics(self, result)
         self.finisher.finishPopulation(self, result)
-        # self.exchanger.closeContacts(self, result)
+        self.exchanger.closeContacts(self, result)
         self.evaluator.closeContacts(self, result)
+        self.breeder.closeContacts(self, result)
+        self.profiler.finishRun()
 
     def startFresh(self):
         self.output.message("Setting up")
-        self.setup(self, None)  # garbage Parameter equivalent
+        self.setup(None)  # garbage Parameter equivalent
 
         # POPULATION INITIALIZATION
         self.output.message("Initializing Generation 0")
@@ -153,62 +205,97 @@ class EvolutionState:
 
             self.output.message(f"Generations will be {self.numGenerations}")
 
-        # self.exchanger.initializeContacts(self)
+        self.exchanger.initializeContacts(self)
         self.evaluator.initializeContacts(self)
 
+    def startFromCheckpoint(self):
+        '''continue a state restored by restoreFromCheckpoint from the generation it was saved after'''
+        self.output.message(f"Restarting from checkpoint at generation {self.generation}")
+        self.exchanger.reinitializeContacts(self)
+        self.evaluator.reinitializeContacts(self)
+        self.statistics.restartFromCheckpoint(self)
+
+    @staticmethod
+    def restoreFromCheckpoint(filename:str)->EvolutionState:
+        '''load the state saved in a checkpoint file; continue it with run(C_STARTED_FROM_CHECKPOINT)'''
+        return ClassRegistry.resolve("ec.util.Checkpoint").restoreFromCheckpoint(filename)
+
     def evolve(self):
         if self.generation > 0:
             self.output.message(f"Generation {self.generation}")
 
         # EVALUATION
-        self.statistics.preEvaluationStatistics(self)
-        self.evaluator.evaluatePopulation(self)
-        self.statistics.postEvaluationStatistics(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.preEvaluationStatistics(self)
+        with self.profiler.phase(Profiler.EVALUATION):
+            self.evaluator.evaluatePopulation(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postEvaluationStatistics(self)
 
         # SHOULD WE QUIT?
         if self.evaluator.runComplete(self) and self.quitOnRunComplete:
             self.output.message("Found Ideal Individual")
             return self.R_SUCCESS
 
+        if self.limitNodeEvaluations and self.nodeEvaluation >= self.numNodeEva:
+            self.output.message(f"Node evaluation budget used up ({self.nodeEvaluation} >= {self.numNodeEva:g})")
+            return self.R_FAILURE
+
         if self.generation == self.numGenerations - 1:
             return self.R_FAILURE
 
         # PRE-BREEDING EXCHANGING
-        # self.statistics.prePreBreedingExchangeStatistics(self)
-        # self.population = self.exchanger.preBreedingExchangePopulation(self)
-        # self.statistics.postPreBreedingExchangeStatistics(self)
-
-        # exchanger_msg = self.exchanger.runComplete(self)
-        # if exchanger_msg is not None:
-        #     self.output.message(exchanger_msg)
-        #     return self.R_SUCCESS
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.prePreBreedingExchangeStatistics(self)
+        with self.profiler.phase(Profiler.EXCHANGE):
+            self.population = self.exchanger.preBreedingExchangePopulation(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postPreBreedingExchangeStatistics(self)
+
+        exchanger_msg = self.exchanger.runComplete(self)
+        if exchanger_msg is not None:
+            self.output.message(exchanger_msg)
+            return self.R_SUCCESS
 
         # BREEDING
-        self.statistics.preBreedingStatistics(self)
-        self.population = self.breeder.breedPopulation(self)
-        self.statistics.postBreedingStatistics(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.preBreedingStatistics(self)
+        with self.profiler.phase(Profiler.BREEDING):
+            self.population = self.breeder.breedPopulation(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postBreedingStatistics(self)
 
         # POST-BREEDING EXCHANGING
-        # self.statistics.prePostBreedingExchangeStatistics(self)
-        # self.population = self.exchanger.postBreedingExchangePopulation(self)
-        # self.statistics.postPostBreedingExchangeStatistics(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.prePostBreedingExchangeStatistics(self)
+        with self.profiler.phase(Profiler.EXCHANGE):
+            self.population = self.exchanger.postBreedingExchangePopulation(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postPostBreedingExchangeStatistics(self)
 
         # INCREMENT GENERATION AND CHECKPOINT
         self.generation += 1
-        # if self.checkpoint and self.generation % self.checkpointModulo == 0:
-        #     self.output.message("Checkpointing")
-        #     self.statistics.preCheckpointStatistics(self)
-        #     Checkpoint.setCheckpoint(self)
-        #     self.statistics.postCheckpointStatistics(self)
+        if self.checkpoint and self.generation % self.checkpointModulo == 0:
+            self.output.message("Checkpointing")
+            with self.profiler.phase(Profiler.CHECKPOINT):
+                self.statistics.preCheckpointStatistics(self)
+                ClassRegistry.resolve("ec.util.Checkpoint").setCheckpoint(self)
+                self.statistics.postCheckpointStatistics(self)
 
         return self.R_NOTDONE
 
     def run(self, condition: int):
-        
-        self.startFresh()
 
+        if condition == self.C_STARTED_FROM_CHECKPOINT:
+            self.startFromCheckpoint()
+        else:
+            self.startFresh()
+
+        self.profiler.startRun()
         result = self.R_NOTDONE
         while result == self.R_NOTDONE:
+            self.profiler.startGeneration(self)
             result = self.evolve()
+            self.profiler.endGeneration(self)
 
         self.finish(result)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+class Exchanger(ABC):
+    '''
+    The Exchanger is a singleton object (exch) which moves individuals
+    between subpopulations or between the processes of a run (islands).
+    The EvolutionState asks it for an exchanged population right before
+    breeding (preBreedingExchangePopulation) and right after
+    (postBreedingExchangePopulation). runComplete lets it stop the run,
+    e.g. when another island found an ideal individual.
+    '''
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        pass
+
+    def initializeContacts(self, state:EvolutionState):
+        '''called once the initial population exists, before the first generation'''
+        pass
+
+    def reinitializeContacts(self, state:EvolutionState):
+        '''called when a run restarts from a checkpoint'''
+        self.initializeContacts(state)
+
+    @abstractmethod
+    def preBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        pass
+
+    @abstractmethod
+    def postBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        pass
+
+    @abstractmethod
+    def runComplete(self, state:EvolutionState)->str:
+        '''a message if the run must stop, None otherwise'''
+        pass
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        pass
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+
+from ec.util import Parameter
+
+class Fitness(ABC):
+    '''
+    The fitness of an individual. Fitnesses are compared with betterThan and
+    equivalentTo only, so a fitness may be a single number or, e.g., a vector
+    of objectives (see MultiObjectiveFitness).
+
+    A truncated fitness is only a bound of the real one, e.g. the error of
+    an individual whose evaluation was abandoned early. It still ranks the
+    individual in its generation, but is never reused for other individuals.
+    '''
+
+    P_FITNESS: str = "fitness"
+
+    truncated: bool = False
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        pass
+
+    def clone(self)->Fitness:
+        return copy.deepcopy(self)
+
+    @abstractmethod
+    def fitness(self)->float:
+        '''the fitness as a single number, for statistics'''
+        pass
+
+    @abstractmethod
+    def isIdealFitness(self)->bool:
+        pass
+
+    @abstractmethod
+    def equivalentTo(self, other:Fitness)->bool:
+        pass
+
+    @abstractmethod
+    def betterThan(self, other:Fitness)->bool:
+        pass
+
+    def selectionValue(self)->float:
+        '''a number ordering the fitnesses like betterThan (the larger, the better),
+        or None if betterThan is not such an order (e.g. Pareto dominance)'''
+        return None
+
+    def fitnessToStringForHumans(self)->str:
+        return str(self.fitness())
+
+    def __str__(self)->str:
+        return self.fitnessToStringForHumans()
@@ -4,5 +4,5 @@ from ec.util import Parameter
 
 class GPDefaults:
     @classmethod
-    def base()->Parameter:
+    def base(cls)->Parameter:
         return Parameter("gp")
\ No newline at end of file
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import copy
+from typing import List
+
+from ec.util import Parameter
+
+class Population:
+    '''
+    A Population is the repository for all the Individuals being bred or
+    evaluated in the evolutionary run at a given time. It is an array of
+    Subpopulations (pop.subpops of them, each one set up from pop.subpop.N).
+    '''
+
+    P_SIZE: str = "subpops"
+    P_SUBPOP: str = "subpop"
+
+    def __init__(self):
+        self.subpops:List[Subpopulation] = []
+
+    def emptyClone(self)->Population:
+        '''a population with the same subpopulations (species, sizes) but no individuals'''
+        p = copy.copy(self)
+        p.subpops = [subpop.emptyClone() for subpop in self.subpops]
+        return p
+
+    def clear(self):
+        for subpop in self.subpops:
+            subpop.clear()
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        from ec.Subpopulation import Subpopulation
+
+        size = state.parameters.getInt(base.push(self.P_SIZE), None)
+        if size <= 0:
+            state.output.fatal("Number of subpopulations must be >= 1", base.push(self.P_SIZE))
+
+        self.subpops = []
+        for x in range(size):
+            p = base.push(self.P_SUBPOP).push(str(x))
+            subpop = state.parameters.getInstanceForParameter(p, None, Subpopulation)
+            subpop.setup(state, p)
+            self.subpops.append(subpop)
+
+    def populate(self, state:EvolutionState, thread:int):
+        for subpop in self.subpops:
+            subpop.populate(state, thread)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import List
+
+import numpy as np
+
+from ec.BreedingSource import BreedingSource
+from ec.steadystate.SteadyStateBSourceForm import SteadyStateBSourceForm
+
+class SelectionMethod(BreedingSource, SteadyStateBSourceForm):
+    '''
+    A BreedingSource which picks individuals of the current population.
+    The individuals are not copied: the pipelines clone them before changing them.
+    '''
+
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        individuals = state.population.subpops[subpopulation].individuals
+        for q, index in enumerate(self.produceIndices(min, subpopulation, state, thread).tolist()):
+            inds[start + q] = individuals[index]
+        return min
+
+    @abstractmethod
+    def produceIndex(self, subpopulation:int, state:EvolutionState, thread:int)->int:
+        '''the index of one selected individual of the subpopulation'''
+        pass
+
+    def produceIndices(self, k:int, subpopulation:int, state:EvolutionState, thread:int)->np.ndarray:
+        '''the indices of k selected individuals of the subpopulation'''
+        return np.array([self.produceIndex(subpopulation, state, thread) for _ in range(k)], dtype=np.int64)
+
+    def individualReplaced(self, state:SteadyStateEvolutionState, subpopulation:int, thread:int, individual:int):
+        pass
+
+    def sourcesAreProperForm(self, state:SteadyStateEvolutionState):
+        pass
@@ -1,9 +1,17 @@
-from ec.util import *
-from ec import *
-from abc import ABC, abstractmethod
-from typing import Type
+from __future__ import annotations
 
-class Species(ABC):
+from ec.util import Parameter
+from ec.ECDefaults import ECDefaults
+
+class Species:
+    '''
+    The prototypes of the individuals of a subpopulation: the individual
+    (ind), its fitness (fitness) and the breeding pipeline (pipe) producing
+    its offspring. New individuals are clones of the prototype, rebuilt with
+    a random program.
+    '''
+
+    P_SPECIES: str = "species"
     P_INDIVIDUAL: str = "ind"
     P_PIPE: str = "pipe"
     P_FITNESS: str = "fitness"
@@ -13,6 +21,9 @@ class Species(ABC):
         self.pipe_prototype: BreedingPipeline = None
         self.f_prototype: Fitness = None
 
+    def defaultBase(self) -> Parameter:
+        return ECDefaults.base().push(self.P_SPECIES)
+
     def clone(self):
         new_species = self.__class__()
         new_species.i_prototype = self.i_prototype.clone()
@@ -20,30 +31,26 @@ class Species(ABC):
         new_species.pipe_prototype = self.pipe_prototype.clone()
         return new_species
 
-    def new_individual(self, state: EvolutionState, thread: int) -> GPIndividual:
+    def newIndividual(self, state: EvolutionState, thread: int) -> GPIndividual:
         newind = self.i_prototype.clone()
+        newind.rebuildIndividual(state, thread)
         newind.fitness = self.f_prototype.clone()
         newind.evaluated = False
         newind.species = self
         return newind
 
     def setup(self, state: EvolutionState, base: Parameter):
-        default = self.default_base()
+        default = self.defaultBase()
 
-        self.pipe_prototype = state.parameters.get_instance_for_parameter(
-            base.push(self.P_PIPE), default.push(self.P_PIPE), BreedingPipeline)
+        self.pipe_prototype = state.parameters.getInstanceForParameter(
+            base.push(self.P_PIPE), default.push(self.P_PIPE), object)
         self.pipe_prototype.setup(state, base.push(self.P_PIPE))
-        state.output.exit_if_errors()
 
-        self.i_prototype = state.parameters.get_instance_for_parameter(
-            base.push(self.P_INDIVIDUAL), default.push(self.P_INDIVIDUAL), Individual)
+        self.i_prototype = state.parameters.getInstanceForParameter(
+            base.push(self.P_INDIVIDUAL), default.push(self.P_INDIVIDUAL), object)
         self.i_prototype.species = self
         self.i_prototype.setup(state, base.push(self.P_INDIVIDUAL))
 
-        self.f_prototype = state.parameters.get_instance_for_parameter(
-            base.push(self.P_FITNESS), default.push(self.P_FITNESS), Fitness)
+        self.f_prototype = state.parameters.getInstanceForParameter(
+            base.push(self.P_FITNESS), default.push(self.P_FITNESS), object)
         self.f_prototype.setup(state, base.push(self.P_FITNESS))
-
-    @abstractmethod
-    def default_base(self) -> 'Parameter':
-        pass
\ No newline at end of file
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import List
+
+from ec.util import Parameter
+
+class Statistics:
+    '''
+    Statistics (stat) are told about every step of a run through hooks
+    called by the EvolutionState, and report what they gather at the end
+    (finalStatistics). A statistics object may have children (num-children,
+    child.N), which receive the same hooks right after their parent.
+
+    This base class gathers nothing: its hooks only call the children's.
+    '''
+
+    P_NUMCHILDREN: str = "num-children"
+    P_CHILD: str = "child"
+
+    def __init__(self):
+        self.children:List[Statistics] = []
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        numChildren = state.parameters.getIntWithDefault(base.push(self.P_NUMCHILDREN), None, 0)
+        if numChildren < 0:
+            state.output.fatal("The number of child statistics must be >= 0", base.push(self.P_NUMCHILDREN))
+        self.children = []
+        for x in range(numChildren):
+            p = base.push(self.P_CHILD).push(str(x))
+            child = state.parameters.getInstanceForParameterEq(p, None, Statistics)
+            child.setup(state, p)
+            self.children.append(child)
+
+    def preInitializationStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.preInitializationStatistics(state)
+
+    def postInitializationStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postInitializationStatistics(state)
+
+    def preCheckpointStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.preCheckpointStatistics(state)
+
+    def postCheckpointStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postCheckpointStatistics(state)
+
+    def restartFromCheckpoint(self, state:EvolutionState):
+        '''called when a run restarts from a checkpoint, before its next generation'''
+        for child in self.children:
+            child.restartFromCheckpoint(state)
+
+    def preEvaluationStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.preEvaluationStatistics(state)
+
+    def postEvaluationStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postEvaluationStatistics(state)
+
+    def prePreBreedingExchangeStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.prePreBreedingExchangeStatistics(state)
+
+    def postPreBreedingExchangeStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postPreBreedingExchangeStatistics(state)
+
+    def preBreedingStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.preBreedingStatistics(state)
+
+    def postBreedingStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postBreedingStatistics(state)
+
+    def prePostBreedingExchangeStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.prePostBreedingExchangeStatistics(state)
+
+    def postPostBreedingExchangeStatistics(self, state:EvolutionState):
+        for child in self.children:
+            child.postPostBreedingExchangeStatistics(state)
+
+    def finalStatistics(self, state:EvolutionState, result:int):
+        for child in self.children:
+            child.finalStatistics(state, result)
@@ -1,24 +1,42 @@
-from ec import ECDefaults, EvolutionState, Species
+from __future__ import annotations
 
-from ec.util import *
+from ec.ECDefaults import ECDefaults
+
+from ec.util import Parameter
 
 class Subpopulation:
+    '''
+    The individuals of one species.
+
+    With duplicate-retries = N > 0, populate() makes up to N more attempts to
+    create every new individual while it duplicates one already created.
+    Duplicates are found by hashing: individuals define __hash__/__eq__ on
+    their program. With duplicate-effective = true, only the effective code is
+    compared (getCanonicalKey), so programs differing only in their introns
+    are duplicates too.
+    '''
+
     P_SUBPOPULATION = "subpop"
     P_SUBPOPSIZE = "size"
     P_RETRIES = "duplicate-retries"
+    P_EFFECTIVEDUPLICATES = "duplicate-effective"
     P_SPECIES = "species"
 
     def __init__(self):
         self.individuals = []
         self.numDuplicateRetries = 0
+        self.effectiveDuplicates = False
         self.species = None
 
     def defaultBase(self):
         return ECDefaults.base().push(Subpopulation.P_SUBPOPULATION)
     
     def emptyClone(self):
-        clone = Subpopulation()
+        clone = self.__class__()
         clone.individuals = [None] * len(self.individuals)
+        clone.numDuplicateRetries = self.numDuplicateRetries
+        clone.effectiveDuplicates = self.effectiveDuplicates
+        clone.species = self.species
         return clone
 
     # def resize(self, to_this: int):
@@ -28,9 +46,13 @@ class Subpopulation:
         self.individuals = [None] * len(self.individuals)
 
     def setup(self, state:EvolutionState, base:Parameter):
+        from ec.Species import Species
+
         def_base = self.defaultBase()
         size_param = base.push(Subpopulation.P_SUBPOPSIZE)
         species_param = base.push(Subpopulation.P_SPECIES)
+        retries_param = base.push(Subpopulation.P_RETRIES)
+        effective_param = base.push(Subpopulation.P_EFFECTIVEDUPLICATES)
 
         self.species = state.parameters.getInstanceForParameter(
             species_param, def_base.push(Subpopulation.P_SPECIES), Species
@@ -41,9 +63,11 @@ class Subpopulation:
         if size <= 0:
             state.output.fatal("Subpopulation size must be >= 1", size_param)
 
-        self.numDuplicateRetries = state.parameters.getInt(retries_param, def_base.push(Subpopulation.P_RETRIES), 0)
+        self.numDuplicateRetries = state.parameters.getIntWithDefault(retries_param, def_base.push(Subpopulation.P_RETRIES), 0)
         if self.numDuplicateRetries < 0:
             state.output.fatal("Duplicate retries must be >= 0", retries_param)
+        self.effectiveDuplicates = state.parameters.getBoolean(
+            effective_param, def_base.push(Subpopulation.P_EFFECTIVEDUPLICATES), False)
 
         self.individuals = [None] * size
 
@@ -69,8 +93,11 @@ class Subpopulation:
         for i in range(start, len(self.individuals)):
             for _ in range(self.numDuplicateRetries + 1):
                 ind = self.species.newIndividual(state, thread)
-                if seen is None or ind not in seen:
-                    self.individuals[i] = ind
-                    if seen is not None and ind not in seen:
-                        seen.add(ind)
-                    break
\ No newline at end of file
+                if seen is None:
+                    break
+                key = ind.getCanonicalKey() if self.effectiveDuplicates else ind
+                if key not in seen:
+                    seen.add(key)
+                    break
+            # after the last retry the duplicate is kept
+            self.individuals[i] = ind
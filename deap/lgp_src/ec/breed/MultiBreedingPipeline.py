@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import contextlib
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.BreedingPipeline import BreedingPipeline
+from ec.BreedingSource import BreedingSource
+from ec.breed.BreedDefaults import BreedDefaults
+
+class MultiBreedingPipeline(BreedingPipeline):
+    '''
+    Produces individuals with one of its sources, picked at random according
+    to the sources' probabilities (source.N.prob).
+
+    With batch = true (the default), a request for up to max individuals is
+    split among the sources at once: the number of individuals bred by each
+    source is drawn from the multinomial distribution of their probabilities,
+    and each source then breeds its share in a single call. This gives the
+    same expected mix of operators as picking a source per individual, while
+    the LGP operators vary their whole share with a few array operations.
+    With batch = false, every call uses one source, as in ECJ (generate-max
+    then asks the source for as many individuals as it can produce).
+
+    When the run is profiled (profile = true), every source call is timed
+    (Profiler.source).
+    '''
+
+    P_MULTIBREED: str = "multibreed"
+    P_GEN_MAX: str = "generate-max"
+    P_BATCH: str = "batch"
+
+    def __init__(self):
+        super().__init__()
+        self.maxGeneratable:int = 0
+        self.generateMax:bool = True
+        self.batch:bool = True
+        self.cumulative:List[float] = []
+        self.probabilities = np.zeros(0)
+
+    def defaultBase(self)->Parameter:
+        return BreedDefaults.base().push(self.P_MULTIBREED)
+
+    def numSources(self)->int:
+        return self.DYNAMIC_SOURCES
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        def_ = self.defaultBase()
+
+        for x, source in enumerate(self.sources):
+            if source.getProbability() < 0.0:
+                state.output.fatal(f"Pipe #{x} must have a probability >= 0.0",
+                                   base.push(self.P_SOURCE).push(str(x)).push(self.P_PROB))
+        self.cumulative = BreedingSource.setupProbabilities(self.sources)
+        # from the probabilities themselves: differences of the cumulative ones may be slightly negative
+        probabilities = np.array([source.getProbability() for source in self.sources], dtype=np.float64)
+        self.probabilities = probabilities / probabilities.sum()
+
+        self.generateMax = state.parameters.getBoolean(base.push(self.P_GEN_MAX), def_.push(self.P_GEN_MAX), True)
+        self.batch = state.parameters.getBoolean(base.push(self.P_BATCH), def_.push(self.P_BATCH), True)
+        self.maxGeneratable = 0
+
+    def maxChildProduction(self)->int:
+        return max(s.typicalIndsProduced() for s in self.sources)
+
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        if self.batch and max > 1:
+            rng = np.random.default_rng(state.random[thread].getrandbits(64))
+            counts = rng.multinomial(max, self.probabilities)
+            index = start
+            for x, (source, count) in enumerate(zip(self.sources, counts.tolist())):
+                if count == 0:
+                    continue
+                with self.profileSource(state, x, count):
+                    produced = 0
+                    while produced < count:
+                        produced += source.produce(count - produced, count - produced, index + produced,
+                                                   subpopulation, inds, state, thread)
+                index += count
+            return max
+
+        x = BreedingSource.pickRandom(self.cumulative, state.random[thread].random())
+        s = self.sources[x]
+        if self.generateMax:
+            if self.maxGeneratable == 0:
+                self.maxGeneratable = self.maxChildProduction()
+            min = min if self.maxGeneratable < min else self.maxGeneratable
+            min = max if min > max else min
+            max = min
+        with self.profileSource(state, x, min):
+            return s.produce(min, max, start, subpopulation, inds, state, thread)
+
+    def profileSource(self, state:EvolutionState, x:int, individuals:int):
+        '''a context timing a call of source x, see Profiler.source'''
+        profiler = getattr(state, "profiler", None)
+        if profiler is None:
+            return contextlib.nullcontext()
+        return profiler.source(f"{x}:{type(self.sources[x]).__name__}", individuals)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import List
+
+from ec.util import Parameter
+from ec.BreedingPipeline import BreedingPipeline
+from ec.breed.BreedDefaults import BreedDefaults
+
+class ReproductionPipeline(BreedingPipeline):
+    '''produces copies of the individuals of its only source'''
+
+    P_REPRODUCE: str = "reproduce"
+
+    def defaultBase(self)->Parameter:
+        return BreedDefaults.base().push(self.P_REPRODUCE)
+
+    def numSources(self)->int:
+        return 1
+
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        return self.reproduce(min, start, subpopulation, inds, state, thread, True)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import collections
+import functools
+import queue
+from typing import List
+
+from ec.util import Parameter
+from ec.Exchanger import Exchanger
+from ec.SelectionMethod import SelectionMethod
+
+class IslandExchange(Exchanger):
+    '''
+    An island model: islands evolve on their own, and every mod generations
+    from generation start, each island sends copies of size individuals to
+    its destinations: its best ones, or the ones picked by select. Nobody
+    waits for migrants. Before breeding, an island takes the migrants which
+    have arrived so far, if any. They replace its worst individuals, or
+    distinct ones picked by select-to-die (the worst ones if select-to-die
+    keeps picking the same individuals).
+
+    With num-islands = K > 1, the islands are K processes started by
+    deap/lgp.py, each with its own seeds, statistics files and checkpoints
+    (island.N. prefix). Subpopulation x of an island migrates to
+    subpopulation x of its destinations through multiprocessing queues.
+    With num-islands = 1, the islands are the subpopulations of this process,
+    exchanging through in-process queues.
+
+    The destinations of island i among n islands:
+
+        topology = ring       island i + 1 (mod n), the default
+        topology = complete   every other island
+        topology = random     one other island, drawn at every migration
+
+    island.i.num-dest and island.i.dest.M list them explicitly instead.
+
+    A mailbox holds at most mailbox-size migrations. A migration sent to a
+    full mailbox is dropped: its island is behind, and newer migrants will
+    follow. When an island stops because it found an ideal individual
+    (quit-on-run-complete), the other process islands stop at their next
+    generation. A checkpoint does not keep the connections to the other
+    processes, so an island restarted from one evolves alone.
+    '''
+
+    P_NUMISLANDS: str = "num-islands"
+    P_ISLANDID: str = "island-id"
+    P_TOPOLOGY: str = "topology"
+    P_ISLAND: str = "island"
+    P_NUMDEST: str = "num-dest"
+    P_DEST: str = "dest"
+    P_MODULO: str = "mod"
+    P_START: str = "start"
+    P_SIZE: str = "size"
+    P_SELECT: str = "select"
+    P_SELECTTODIE: str = "select-to-die"
+    P_MAILBOXSIZE: str = "mailbox-size"
+
+    V_RING: str = "ring"
+    V_COMPLETE: str = "complete"
+    V_RANDOM: str = "random"
+
+    DEFAULT_MAILBOXSIZE: int = 16
+    MAXTRIES: int = 10
+
+    def __init__(self):
+        self.numIslands:int = 1
+        self.islandID:int = 0
+        self.topology:str = self.V_RING
+        # explicit destinations per island, None to use the topology
+        self.destinations:List[List[int]] = None
+        self.modulo:int = 10
+        self.start:int = 10
+        self.size:int = 1
+        self.select:SelectionMethod = None
+        self.selectToDie:SelectionMethod = None
+        self.mailboxSize:int = self.DEFAULT_MAILBOXSIZE
+        # num-islands = 1: the in-process mailbox of every subpopulation
+        self.inboxes:List[collections.deque] = None
+        # num-islands > 1: the mailbox of every island, and the event stopping them all
+        self.mailboxes = None
+        self.stop = None
+
+    @staticmethod
+    def getNumIslands(parameters:ParameterDatabase, base:Parameter=Parameter("exch"))->int:
+        '''the number of island processes the runner must start'''
+        return parameters.getIntWithDefault(base.push(IslandExchange.P_NUMISLANDS), None, 1)
+
+    @staticmethod
+    def connect(mailboxes:List, stop):
+        '''give the islands of this process the mailboxes of all the islands and the stop event'''
+        global _mailboxes, _stop
+        _mailboxes = mailboxes
+        _stop = stop
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        self.numIslands = IslandExchange.getNumIslands(state.parameters, base)
+        if self.numIslands < 1:
+            state.output.fatal("The number of islands must be >= 1", base.push(self.P_NUMISLANDS))
+        self.islandID = state.parameters.getIntWithDefault(base.push(self.P_ISLANDID), None, 0)
+        if not 0 <= self.islandID < self.numIslands:
+            state.output.fatal(f"The island id must be in [0, {self.numIslands})", base.push(self.P_ISLANDID))
+        numDemes = self.numDemes(state)
+
+        self.topology = state.parameters.getStringWithDefault(base.push(self.P_TOPOLOGY), None, self.V_RING)
+        if self.topology not in (self.V_RING, self.V_COMPLETE, self.V_RANDOM):
+            state.output.fatal(f"Unknown island topology {self.topology}", base.push(self.P_TOPOLOGY))
+        if state.parameters.exists(base.push(self.P_ISLAND).push("0").push(self.P_NUMDEST)):
+            self.destinations = []
+            for i in range(numDemes):
+                p = base.push(self.P_ISLAND).push(str(i))
+                dests = [state.parameters.getInt(p.push(self.P_DEST).push(str(m)), None)
+                         for m in range(state.parameters.getInt(p.push(self.P_NUMDEST), None))]
+                if any(not 0 <= d < numDemes or d == i for d in dests):
+                    state.output.fatal(f"The destinations of island {i} must be other islands in [0, {numDemes})",
+                                       p.push(self.P_DEST))
+                self.destinations.append(dests)
+
+        self.modulo = state.parameters.getIntWithDefault(base.push(self.P_MODULO), None, 10)
+        self.start = state.parameters.getIntWithDefault(base.push(self.P_START), None, self.modulo)
+        self.size = state.parameters.getIntWithDefault(base.push(self.P_SIZE), None, 1)
+        self.mailboxSize = state.parameters.getIntWithDefault(base.push(self.P_MAILBOXSIZE), None,
+                                                              self.DEFAULT_MAILBOXSIZE)
+        if self.modulo < 1 or self.start < 0 or self.size < 1 or self.mailboxSize < 1:
+            state.output.fatal("The migration mod, size and mailbox-size must be >= 1, and start >= 0", base)
+
+        self.select = self.setupSelection(state, base.push(self.P_SELECT))
+        self.selectToDie = self.setupSelection(state, base.push(self.P_SELECTTODIE))
+
+    def setupSelection(self, state:EvolutionState, base:Parameter)->SelectionMethod:
+        if not state.parameters.exists(base):
+            return None
+        method = state.parameters.getInstanceForParameter(base, None, SelectionMethod)
+        method.setup(state, base)
+        return method
+
+    def numDemes(self, state:EvolutionState)->int:
+        '''the number of islands: processes, or subpopulations of this process'''
+        if self.numIslands > 1:
+            return self.numIslands
+        return state.parameters.getInt(Parameter("pop").push("subpops"), None)
+
+    def initializeContacts(self, state:EvolutionState):
+        if self.numIslands == 1:
+            if self.inboxes is None:
+                self.inboxes = [collections.deque() for _ in state.population.subpops]
+        elif _mailboxes is None:
+            state.output.warning(f"Island {self.islandID} is not connected to the other islands and evolves alone")
+        else:
+            self.mailboxes = _mailboxes
+            self.stop = _stop
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d["mailboxes"] = None
+        d["stop"] = None
+        return d
+
+    def destinationsOf(self, state:EvolutionState, deme:int, numDemes:int)->List[int]:
+        if self.destinations is not None:
+            return self.destinations[deme]
+        if numDemes < 2:
+            return []
+        if self.topology == self.V_RING:
+            return [(deme + 1) % numDemes]
+        if self.topology == self.V_COMPLETE:
+            return [d for d in range(numDemes) if d != deme]
+        other = state.random[0].randrange(numDemes - 1)
+        return [other + (other >= deme)]
+
+    def emigrants(self, state:EvolutionState, subpopulation:int)->List:
+        '''the (genome, fitness) of the individuals sent by the subpopulation'''
+        individuals = state.population.subpops[subpopulation].individuals
+        if self.select is not None:
+            picked = [individuals[i] for i in self.select.produceIndices(self.size, subpopulation, state, 0).tolist()]
+        else:
+            picked = sorted(individuals, key=_betterFirst)[:self.size]
+        return [(ind.getGenome(), ind.fitness.clone()) for ind in picked]
+
+    def immigrate(self, state:EvolutionState, subpopulation:int, migrants:List):
+        '''replace individuals of the subpopulation with the migrants'''
+        individuals = state.population.subpops[subpopulation].individuals
+        migrants = migrants[:len(individuals)]
+        if self.selectToDie is not None:
+            # the victims are distinct, so that no migrant replaces another: duplicates are
+            # drawn again, up to MAXTRIES times per migrant, then the worst individuals are taken
+            victims = dict.fromkeys(self.selectToDie.produceIndices(len(migrants), subpopulation, state, 0).tolist())
+            for _ in range(self.MAXTRIES * len(migrants)):
+                if len(victims) == len(migrants):
+                    break
+                victims.setdefault(self.selectToDie.produceIndex(subpopulation, state, 0))
+            if len(victims) < len(migrants):
+                order = sorted(range(len(individuals)), key=lambda i: _betterFirst(individuals[i]))
+                for i in reversed(order):
+                    if len(victims) == len(migrants):
+                        break
+                    victims.setdefault(i)
+            victims = list(victims)
+        else:
+            order = sorted(range(len(individuals)), key=lambda i: _betterFirst(individuals[i]))
+            victims = order[len(order) - len(migrants):]
+        for index, (genome, fitness) in zip(victims, migrants):
+            ind = individuals[index].clone()
+            ind.setGenome(genome)
+            ind.fitness = fitness
+            ind.evaluated = True
+            individuals[index] = ind
+
+    def preBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        if self.numIslands == 1 and self.inboxes is None:
+            self.initializeContacts(state)
+        numDemes = self.numDemes(state)
+        if state.generation >= self.start and (state.generation - self.start) % self.modulo == 0:
+            for x in range(len(state.population.subpops)):
+                deme = x if self.numIslands == 1 else self.islandID
+                dests = self.destinationsOf(state, deme, numDemes)
+                if not dests:
+                    continue
+                migrants = self.emigrants(state, x)
+                for d in dests:
+                    self.send(d, x, migrants)
+        self.receive(state)
+        return state.population
+
+    def send(self, deme:int, subpopulation:int, migrants:List):
+        if self.numIslands == 1:
+            if len(self.inboxes[deme]) < self.mailboxSize:
+                self.inboxes[deme].append(migrants)
+        elif self.mailboxes is not None:
+            try:
+                self.mailboxes[deme].put_nowait((subpopulation, migrants))
+            except queue.Full:
+                pass
+
+    def receive(self, state:EvolutionState):
+        '''let the migrants which have arrived replace individuals, without waiting for any'''
+        if self.numIslands == 1:
+            for x, inbox in enumerate(self.inboxes):
+                while inbox:
+                    self.immigrate(state, x, inbox.popleft())
+        elif self.mailboxes is not None:
+            mailbox = self.mailboxes[self.islandID]
+            while True:
+                try:
+                    x, migrants = mailbox.get_nowait()
+                except queue.Empty:
+                    break
+                if x < len(state.population.subpops):
+                    self.immigrate(state, x, migrants)
+
+    def postBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        return state.population
+
+    def runComplete(self, state:EvolutionState)->str:
+        if self.stop is not None and self.stop.is_set():
+            return "Another island found an ideal individual"
+        return None
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        if self.mailboxes is None:
+            return
+        if result == state.R_SUCCESS and state.quitOnRunComplete:
+            self.stop.set()
+        # do not wait at exit for migrations nobody will read
+        for mailbox in self.mailboxes:
+            mailbox.cancel_join_thread()
+
+
+_betterFirst = functools.cmp_to_key(lambda a, b: -1 if a.fitness.betterThan(b.fitness)
+                                    else 1 if b.fitness.betterThan(a.fitness) else 0)
+
+# the mailboxes and the stop event of the island processes, set by IslandExchange.connect
+_mailboxes = None
+_stop = None
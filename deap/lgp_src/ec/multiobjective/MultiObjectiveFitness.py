@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.Fitness import Fitness
+
+class MultiObjectiveFitness(Fitness):
+    '''
+    A vector of num-objectives objectives, each of them maximized or
+    minimized (maximize, or maximize.N for objective N; default true).
+    A fitness is better than another one if it Pareto-dominates it, so with
+    a single objective this is the usual ordering.
+
+    The objectives are a NumPy array: a problem scoring several targets at
+    once hands its whole error vector to setObjectives.
+    '''
+
+    P_MULTIOBJECTIVE: str = "multi"
+    P_NUMOBJECTIVES: str = "num-objectives"
+    P_MAXIMIZE: str = "maximize"
+
+    def __init__(self):
+        self.objectives = np.zeros(1)
+        self.maximize = np.ones(1, dtype=bool)
+
+    def defaultBase(self)->Parameter:
+        return Parameter(self.P_MULTIOBJECTIVE).push(self.P_FITNESS)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        def_ = self.defaultBase()
+        num = state.parameters.getIntWithDefault(base.push(self.P_NUMOBJECTIVES), def_.push(self.P_NUMOBJECTIVES), 1)
+        if num < 1:
+            state.output.fatal("The number of objectives must be >= 1", base.push(self.P_NUMOBJECTIVES))
+        maximize = state.parameters.getBoolean(base.push(self.P_MAXIMIZE), def_.push(self.P_MAXIMIZE), True)
+        self.maximize = np.array([state.parameters.getBoolean(base.push(self.P_MAXIMIZE).push(str(x)),
+                                                              def_.push(self.P_MAXIMIZE).push(str(x)), maximize)
+                                  for x in range(num)], dtype=bool)
+        self.objectives = np.zeros(num)
+
+    def clone(self)->MultiObjectiveFitness:
+        newfit = self.__class__.__new__(self.__class__)
+        newfit.__dict__.update(self.__dict__)
+        newfit.objectives = self.objectives.copy()
+        return newfit
+
+    def getNumObjectives(self)->int:
+        return len(self.objectives)
+
+    def getObjectives(self)->np.ndarray:
+        return self.objectives
+
+    def getObjective(self, i:int)->float:
+        return float(self.objectives[i])
+
+    def setObjectives(self, state:EvolutionState, newObjectives):
+        newObjectives = np.asarray(newObjectives, dtype=np.float64).reshape(-1)
+        if len(newObjectives) != len(self.objectives):
+            state.output.fatal(f"Expected {len(self.objectives)} objectives, got {len(newObjectives)}")
+        if np.isnan(newObjectives).any():
+            state.output.fatal("An objective is NaN")
+        self.objectives = newObjectives.copy()
+
+    def fitness(self)->float:
+        '''the maximum of the objectives, as in ECJ'''
+        return float(self.objectives.max())
+
+    def isIdealFitness(self)->bool:
+        return False
+
+    def paretoDominates(self, other:MultiObjectiveFitness)->bool:
+        a = np.where(self.maximize, self.objectives, -self.objectives)
+        b = np.where(other.maximize, other.objectives, -other.objectives)
+        return bool((a >= b).all() and (a > b).any())
+
+    def betterThan(self, other:MultiObjectiveFitness)->bool:
+        return self.paretoDominates(other)
+
+    def equivalentTo(self, other:MultiObjectiveFitness)->bool:
+        return not self.paretoDominates(other) and not other.paretoDominates(self)
+
+    def selectionValue(self)->float:
+        '''the objective (negated if minimized) of a single-objective fitness'''
+        if len(self.objectives) != 1:
+            return None
+        return float(self.objectives[0]) if self.maximize[0] else -float(self.objectives[0])
+
+    def fitnessToStringForHumans(self)->str:
+        return "[" + " ".join(repr(float(o)) for o in self.objectives) + "]"
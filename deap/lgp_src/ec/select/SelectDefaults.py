@@ -0,0 +1,6 @@
+from ec.util import Parameter
+
+class SelectDefaults:
+    @classmethod
+    def base(cls)->Parameter:
+        return Parameter("select")
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.SelectionMethod import SelectionMethod
+from ec.select.SelectDefaults import SelectDefaults
+
+class TournamentSelection(SelectionMethod):
+    '''
+    Picks size individuals uniformly at random (with replacement) and returns
+    the best of them, or the worst with pick-worst = true.
+
+    Between prepareToProduce and finishProducing, if the fitnesses of the
+    subpopulation are ordered by a number (Fitness.selectionValue), the
+    values are gathered once into an array and the tournaments are drawn
+    in blocks of one per individual: all the aspirants of a block are drawn
+    at once and its winners are their argmax, so picking an individual
+    only returns the next winner. Ties go to the first aspirant drawn, as
+    with betterThan. Individuals replaced meanwhile (steady state) update
+    the array and the winners of the tournaments they took part in.
+    Otherwise (e.g. Pareto-ordered fitnesses, or no prepareToProduce),
+    every tournament compares the fitnesses with betterThan.
+    '''
+
+    P_TOURNAMENT: str = "tournament"
+    P_SIZE: str = "size"
+    P_PICKWORST: str = "pick-worst"
+
+    def __init__(self):
+        super().__init__()
+        self.size:int = 7
+        self.pickWorst:bool = False
+        self.resetTournaments()
+
+    def defaultBase(self)->Parameter:
+        return SelectDefaults.base().push(self.P_TOURNAMENT)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        def_ = self.defaultBase()
+        self.size = state.parameters.getInt(base.push(self.P_SIZE), def_.push(self.P_SIZE), 1)
+        self.pickWorst = state.parameters.getBoolean(base.push(self.P_PICKWORST), def_.push(self.P_PICKWORST), False)
+
+    def resetTournaments(self):
+        # per prepared subpopulation: the fitness values (larger wins), the generator of the
+        # tournaments, the aspirants and winners of the tournaments drawn, and the next one
+        self.values:Dict[int, np.ndarray] = {}
+        self.generators:Dict[int, np.random.Generator] = {}
+        self.aspirants:Dict[int, np.ndarray] = {}
+        self.winners:Dict[int, np.ndarray] = {}
+        self.nextTournament:Dict[int, int] = {}
+
+    def clone(self):
+        c = super().clone()
+        c.resetTournaments()
+        return c
+
+    @staticmethod
+    def fitnessValues(individuals:List)->np.ndarray:
+        '''the selection values of the fitnesses of the individuals, None if they have none'''
+        if len(individuals) == 0 or not hasattr(individuals[0].fitness, "selectionValue"):
+            return None
+        values = [ind.fitness.selectionValue() for ind in individuals]
+        if None in values:
+            return None
+        return np.array(values, dtype=np.float64)
+
+    def prepareToProduce(self, state:EvolutionState, subpopulation:int, thread:int):
+        super().prepareToProduce(state, subpopulation, thread)
+        values = self.fitnessValues(state.population.subpops[subpopulation].individuals)
+        if values is None:
+            self.finishProducing(state, subpopulation, thread)
+            return
+        self.values[subpopulation] = -values if self.pickWorst else values
+        self.generators[subpopulation] = np.random.default_rng(state.random[thread].getrandbits(64))
+        self.aspirants[subpopulation] = np.zeros((0, self.size), dtype=np.int64)
+        self.winners[subpopulation] = np.zeros(0, dtype=np.int64)
+        self.nextTournament[subpopulation] = 0
+
+    def finishProducing(self, state:EvolutionState, subpopulation:int, thread:int):
+        super().finishProducing(state, subpopulation, thread)
+        for tournaments in (self.values, self.generators, self.aspirants, self.winners, self.nextTournament):
+            tournaments.pop(subpopulation, None)
+
+    def drawTournaments(self, subpopulation:int, k:int):
+        '''make sure at least k tournaments drawn ahead are left'''
+        start = self.nextTournament[subpopulation]
+        left = len(self.winners[subpopulation]) - start
+        if left >= k:
+            return
+        values = self.values[subpopulation]
+        aspirants = self.generators[subpopulation].integers(0, len(values), size=(max(k - left, len(values)), self.size))
+        winners = aspirants[np.arange(len(aspirants)), values[aspirants].argmax(axis=1)]
+        self.aspirants[subpopulation] = np.concatenate((self.aspirants[subpopulation][start:], aspirants))
+        self.winners[subpopulation] = np.concatenate((self.winners[subpopulation][start:], winners))
+        self.nextTournament[subpopulation] = 0
+
+    def produceIndex(self, subpopulation:int, state:EvolutionState, thread:int)->int:
+        if subpopulation in self.values:
+            self.drawTournaments(subpopulation, 1)
+            index = self.nextTournament[subpopulation]
+            self.nextTournament[subpopulation] = index + 1
+            return int(self.winners[subpopulation][index])
+
+        individuals = state.population.subpops[subpopulation].individuals
+        rng = state.random[thread]
+        best = rng.randrange(len(individuals))
+        for _ in range(self.size - 1):
+            j = rng.randrange(len(individuals))
+            if self.pickWorst:
+                if individuals[best].fitness.betterThan(individuals[j].fitness):
+                    best = j
+            elif individuals[j].fitness.betterThan(individuals[best].fitness):
+                best = j
+        return best
+
+    def produceIndices(self, k:int, subpopulation:int, state:EvolutionState, thread:int)->np.ndarray:
+        if subpopulation not in self.values:
+            return super().produceIndices(k, subpopulation, state, thread)
+        self.drawTournaments(subpopulation, k)
+        index = self.nextTournament[subpopulation]
+        self.nextTournament[subpopulation] = index + k
+        return self.winners[subpopulation][index:index + k]
+
+    def individualReplaced(self, state:SteadyStateEvolutionState, subpopulation:int, thread:int, individual:int):
+        super().individualReplaced(state, subpopulation, thread, individual)
+        if subpopulation not in self.values:
+            return
+        value = self.fitnessValues(state.population.subpops[subpopulation].individuals[individual:individual + 1])
+        if value is None:
+            self.finishProducing(state, subpopulation, thread)
+            return
+        values = self.values[subpopulation]
+        values[individual] = -value[0] if self.pickWorst else value[0]
+        # the tournaments still to come in which the individual takes part
+        start = self.nextTournament[subpopulation]
+        aspirants = self.aspirants[subpopulation][start:]
+        rows = np.flatnonzero((aspirants == individual).any(axis=1))
+        if len(rows) > 0:
+            aspirants = aspirants[rows]
+            self.winners[subpopulation][start + rows] = aspirants[np.arange(len(rows)), values[aspirants].argmax(axis=1)]
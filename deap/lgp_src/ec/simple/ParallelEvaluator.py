@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import random
+from typing import List, Tuple
+
+from ec.util import Output
+from ec.simple.SimpleEvaluator import SimpleEvaluator
+
+class ParallelEvaluator(SimpleEvaluator):
+    '''
+    Evaluates the population in a pool of evalthreads worker processes.
+
+    The problem (with its training data) and one prototype individual per
+    subpopulation are sent to each worker once, when the pool starts. Every
+    generation, the individuals to evaluate are split into chunks of
+    eval.chunk-size individuals and only their genomes (getGenome) are
+    shipped to the workers, which send the fitnesses back.
+
+    Every chunk gets its own random stream, seeded from state.random[0] in
+    chunk order. Since the chunks do not depend on the number of workers, a
+    run gives the same results for a given seed whatever evalthreads is.
+    With evalthreads = 1 the chunks are evaluated in this process.
+
+    In the workers, Problem.evaluate receives a light state providing only
+    random, generation and output. What else the problem needs to know about
+    the generation (Problem.getEvaluationContext) is computed in this process
+    and sent with every chunk (Problem.setEvaluationContext).
+
+    In a steady-state evolution, submitIndividuals sends a batch of offspring
+    to the pool without waiting for it (apply_async), and
+    getNextEvaluatedIndividuals returns the batches in the order the workers
+    finish them, so a slow individual does not hold up the others.
+    '''
+
+    P_CHUNKSIZE: str = "chunk-size"
+
+    DEFAULT_CHUNKSIZE: int = 16
+
+    def __init__(self):
+        super().__init__()
+        self.chunkSize:int = self.DEFAULT_CHUNKSIZE
+        self.pool = None
+        self.prototypes:List = None
+        # steady-state evaluation: the submitted batches by ticket, and the (ticket, result) of the finished ones
+        self.submitted = {}
+        self.finished = queue.Queue()
+        self.nextTicket:int = 0
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.chunkSize = state.parameters.getIntWithDefault(base.push(self.P_CHUNKSIZE), None, self.DEFAULT_CHUNKSIZE)
+        if self.chunkSize < 1:
+            state.output.fatal("The chunk size of the parallel evaluator must be >= 1", base.push(self.P_CHUNKSIZE))
+
+    def initializeContacts(self, state:EvolutionState):
+        self.prototypes = [subpop.individuals[0].clone() for subpop in state.population.subpops]
+        if state.evalthreads > 1:
+            self.pool = multiprocessing.Pool(state.evalthreads, initializer=_initializeWorker,
+                                             initargs=(self.p_problem, self.prototypes))
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __getstate__(self):
+        # the pool is not saved in checkpoints, it is restarted by reinitializeContacts
+        # the steady-state batches are all returned before a checkpoint, see SteadyStateEvolutionState
+        d = self.__dict__.copy()
+        d["pool"] = None
+        d["submitted"] = {}
+        d["finished"] = None
+        return d
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+        self.finished = queue.Queue()
+
+    def groupIndividuals(self, inds:List)->List[List]:
+        '''the individuals of inds to evaluate, grouped by effective program: individuals
+        sharing the program of an earlier one just copy its fitness'''
+        pending = {}
+        for ind in inds:
+            if ind.evaluated or self.lookupFitness(ind):
+                continue
+            key = ind.getCanonicalKey() if self.cache is not None else id(ind)
+            pending.setdefault(key, []).append(ind)
+        return list(pending.values())
+
+    def receiveFitnesses(self, state:EvolutionState, chunk:List[List], result):
+        '''give the groups of a chunk the fitnesses evaluateChunk computed for them'''
+        fitnesses, nodeEvaluations = result
+        self.addNodeEvaluations(state, nodeEvaluations)
+        self.numEvaluated += len(fitnesses)
+        for group, fitness in zip(chunk, fitnesses):
+            for ind in group:
+                ind.fitness = fitness.clone()
+                ind.evaluated = True
+            self.storeFitness(group[0])
+
+    def evaluatePopulation(self, state:EvolutionState):
+        if self.prototypes is None:
+            self.initializeContacts(state)
+        self.prepareEvaluation(state)
+
+        tasks = []
+        shipped = []
+        for x, subpop in enumerate(state.population.subpops):
+            groups = self.groupIndividuals(subpop.individuals)
+            for start in range(0, len(groups), self.chunkSize):
+                chunk = groups[start:start + self.chunkSize]
+                tasks.append(self.makeTask(state, x, chunk))
+                shipped.append(chunk)
+
+        if self.pool is not None:
+            results = self.pool.map(_evaluateChunkInWorker, tasks)
+        else:
+            results = [evaluateChunk(self.p_problem, self.prototypes, task) for task in tasks]
+
+        for chunk, result in zip(shipped, results):
+            self.receiveFitnesses(state, chunk, result)
+
+    def makeTask(self, state:EvolutionState, subpopulation:int, chunk:List[List]):
+        '''the work sent to evaluateChunk: one genome per group, with the chunk's own random seed
+        and the evaluation context of the problem'''
+        genomes = [group[0].getGenome() for group in chunk]
+        problem = self.p_problem
+        context = problem.getEvaluationContext(state) if hasattr(problem, "getEvaluationContext") else None
+        return (state.generation, subpopulation, state.random[0].getrandbits(64), context, genomes)
+
+    def submitIndividuals(self, state:EvolutionState, inds:List, subpopulation:int):
+        if self.prototypes is None:
+            self.initializeContacts(state)
+        ticket = self.nextTicket
+        self.nextTicket += 1
+        chunk = self.groupIndividuals(inds)
+        self.submitted[ticket] = (inds, subpopulation, chunk)
+        if not chunk:
+            self.finished.put((ticket, ([], 0)))
+            return
+        task = self.makeTask(state, subpopulation, chunk)
+        if self.pool is None:
+            self.finished.put((ticket, evaluateChunk(self.p_problem, self.prototypes, task)))
+            return
+        finished = self.finished
+        self.pool.apply_async(_evaluateChunkInWorker, (task,),
+                              callback=lambda result: finished.put((ticket, result)),
+                              error_callback=lambda error: finished.put((ticket, error)))
+
+    def getNextEvaluatedIndividuals(self, state:EvolutionState)->Tuple[List, int]:
+        ticket, result = self.finished.get()
+        inds, subpopulation, chunk = self.submitted.pop(ticket)
+        if isinstance(result, BaseException):
+            raise result
+        self.receiveFitnesses(state, chunk, result)
+        return inds, subpopulation
+
+    def numEvaluating(self)->int:
+        return len(self.submitted)
+
+class _WorkerState:
+    '''the part of the EvolutionState a problem may use in a worker'''
+
+    def __init__(self, generation:int, seed:int):
+        self.generation = generation
+        self.random = [random.Random(seed)]
+        self.output = Output()
+
+
+def evaluateChunk(problem, prototypes:List, task):
+    '''evaluate the genomes of a chunk and return their fitnesses and the node evaluations spent'''
+    generation, subpopulation, seed, context, genomes = task
+    state = _WorkerState(generation, seed)
+    if hasattr(problem, "setEvaluationContext"):
+        problem.setEvaluationContext(context)
+    fitnesses = []
+    for genome in genomes:
+        ind = prototypes[subpopulation].clone()
+        ind.setGenome(genome)
+        problem.evaluate(state, ind, subpopulation, 0)
+        fitnesses.append(ind.fitness)
+    return fitnesses, SimpleEvaluator.takeNodeEvaluations(problem)
+
+
+# the problem and the prototypes of a worker process, set once by _initializeWorker
+_problem = None
+_prototypes = None
+
+def _initializeWorker(problem, prototypes:List):
+    global _problem, _prototypes
+    _problem = problem
+    _prototypes = prototypes
+
+def _evaluateChunkInWorker(task):
+    return evaluateChunk(_problem, _prototypes, task)
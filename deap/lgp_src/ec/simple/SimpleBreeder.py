@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from ec.util import Parameter
+from ec.Breeder import Breeder
+
+class SimpleBreeder(Breeder):
+    '''
+    Breeds each subpopulation separately, with no inter-population exchange,
+    and using a generational approach. The best breed.elite.N individuals of
+    subpopulation N are copied unchanged into the next generation.
+
+    The remaining slots of each new subpopulation are split into breedthreads
+    disjoint slices. Each breeding thread x fills its slice with its own clone
+    of the species' pipeline (cloned once, on the first generation) and its own
+    random stream state.random[x], so the new population only depends on the
+    seed, whatever the scheduling of the threads.
+
+    With breedthreads > 1, the threads are worker processes when the
+    platform can fork them, otherwise Python threads writing into their
+    slices. The workers are forked once, when the first generation is bred
+    (and again if the pipelines are cloned anew), and thread x is always
+    bred by worker x, which keeps its own pipelines from one generation to
+    the next. Every generation, each worker receives the genomes (getGenome)
+    and fitnesses of the population and the state of its random stream, and
+    sends back the genomes and fitnesses of its slice, the final state of
+    its random stream, and the breeding sources it timed for the Profiler,
+    which are merged into the record of the generation. Any other state the
+    pipelines change in a worker stays in that worker. The workers are
+    stopped by closeContacts, at the end of the run.
+    '''
+
+    P_ELITE: str = "elite"
+
+    def __init__(self):
+        self.numElites:List[int] = []
+        # pipelines[thread][subpopulation]
+        self.pipelines:List[List] = None
+        # (process, connection) of the breeding worker of every thread
+        self.workers:List = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        size = state.parameters.getInt(Parameter("pop").push("subpops"), None)
+        self.numElites = []
+        for x in range(size):
+            elites = state.parameters.getIntWithDefault(base.push(self.P_ELITE).push(str(x)), None, 0)
+            if elites < 0:
+                state.output.fatal("The number of elites must be >= 0", base.push(self.P_ELITE).push(str(x)))
+            self.numElites.append(elites)
+
+    def __getstate__(self):
+        # the workers are not saved in checkpoints, they are forked again when needed
+        d = self.__dict__.copy()
+        d["workers"] = None
+        return d
+
+    def clonePipelines(self, state:EvolutionState):
+        # workers forked with the previous pipelines would keep breeding with them
+        self.closeContacts(state, 0)
+        self.pipelines = [[subpop.species.pipe_prototype.clone() for subpop in state.population.subpops]
+                          for _ in range(state.breedthreads)]
+
+    def computeSlices(self, state:EvolutionState, newpop:Population):
+        '''from[thread][subpop], numinds[thread][subpop]: the slots bred by each thread'''
+        fromslots = [[0] * len(newpop.subpops) for _ in range(state.breedthreads)]
+        numinds = [[0] * len(newpop.subpops) for _ in range(state.breedthreads)]
+        for x, subpop in enumerate(newpop.subpops):
+            elites = self.numElites[x] if x < len(self.numElites) else 0
+            length = len(subpop.individuals) - elites
+            for y in range(state.breedthreads):
+                fromslots[y][x] = elites + length * y // state.breedthreads
+                numinds[y][x] = elites + length * (y + 1) // state.breedthreads - fromslots[y][x]
+        return fromslots, numinds
+
+    def breedPopulation(self, state:EvolutionState)->Population:
+        newpop = state.population.emptyClone()
+        self.loadElites(state, newpop)
+
+        if self.pipelines is None or len(self.pipelines) != state.breedthreads:
+            self.clonePipelines(state)
+        fromslots, numinds = self.computeSlices(state, newpop)
+
+        if state.breedthreads == 1:
+            self.breedPopChunk(newpop, state, numinds[0], fromslots[0], 0)
+            return newpop
+
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            context = None
+
+        if context is None:
+            with ThreadPoolExecutor(state.breedthreads) as executor:
+                for future in [executor.submit(self.breedPopChunk, newpop, state, numinds[y], fromslots[y], y)
+                               for y in range(state.breedthreads)]:
+                    future.result()
+            return newpop
+
+        if self.workers is None:
+            self.startWorkers(state, context)
+        population = [[(ind.getGenome(), ind.fitness, ind.evaluated) for ind in subpop.individuals]
+                      for subpop in state.population.subpops]
+        for y, (_, connection) in enumerate(self.workers):
+            connection.send((state.generation, population, numinds[y], fromslots[y], state.random[y].getstate()))
+        results = [connection.recv() for _, connection in self.workers]
+        for result in results:
+            if isinstance(result, BaseException):
+                self.closeContacts(state, 0)
+                raise result
+
+        profiler = getattr(state, "profiler", None)
+        for y, (slices, randomstate, sources) in enumerate(results):
+            state.random[y].setstate(randomstate)
+            if profiler is not None and sources:
+                profiler.mergeSources(sources)
+            for x, inds in enumerate(slices):
+                prototype = state.population.subpops[x].individuals[0]
+                for i, (genome, fitness, evaluated) in enumerate(inds):
+                    ind = prototype.clone()
+                    ind.setGenome(genome)
+                    ind.fitness = fitness
+                    ind.evaluated = evaluated
+                    newpop.subpops[x].individuals[fromslots[y][x] + i] = ind
+        return newpop
+
+    def startWorkers(self, state:EvolutionState, context):
+        '''fork the breeding workers, which inherit the pipelines and the state'''
+        self.workers = []
+        for y in range(state.breedthreads):
+            connection, child = context.Pipe()
+            process = context.Process(target=_breedingWorker, args=(self, state, y, child), daemon=True)
+            process.start()
+            child.close()
+            self.workers.append((process, connection))
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        if self.workers is None:
+            return
+        for process, connection in self.workers:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        for process, _ in self.workers:
+            process.join()
+        self.workers = None
+
+    def breedPopChunk(self, newpop:Population, state:EvolutionState, numinds:List[int], fromslots:List[int], thread:int):
+        '''fill the slots [fromslots[x], fromslots[x] + numinds[x]) of every subpopulation x'''
+        for x, subpop in enumerate(newpop.subpops):
+            if numinds[x] == 0:
+                continue
+            bp = self.pipelines[thread][x]
+            bp.prepareToProduce(state, x, thread)
+            upperbound = fromslots[x] + numinds[x]
+            index = fromslots[x]
+            while index < upperbound:
+                index += bp.produce(1, upperbound - index, index, x, subpop.individuals, state, thread)
+            bp.finishProducing(state, x, thread)
+
+    def loadElites(self, state:EvolutionState, newpop:Population):
+        for x, subpop in enumerate(state.population.subpops):
+            elites = self.numElites[x] if x < len(self.numElites) else 0
+            if elites > len(subpop.individuals):
+                state.output.fatal(f"The number of elites of subpopulation {x} exceeds its size")
+            best = sorted(subpop.individuals, key=functools.cmp_to_key(_compareFitness))[:elites]
+            for e, ind in enumerate(best):
+                newpop.subpops[x].individuals[e] = ind.clone()
+
+
+def _compareFitness(a, b)->int:
+    '''orders better individuals first'''
+    if a.fitness.betterThan(b.fitness):
+        return -1
+    if b.fitness.betterThan(a.fitness):
+        return 1
+    return 0
+
+
+def _breedingWorker(breeder:SimpleBreeder, state:EvolutionState, thread:int, connection):
+    '''breed the slices of thread every generation, until told to stop (None)'''
+    prototypes = [subpop.individuals[0].clone() for subpop in state.population.subpops]
+    profiler = getattr(state, "profiler", None)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        try:
+            generation, population, numinds, fromslots, randomstate = task
+            state.generation = generation
+            state.random[thread].setstate(randomstate)
+            state.population = state.population.emptyClone()
+            for x, inds in enumerate(population):
+                for i, (genome, fitness, evaluated) in enumerate(inds):
+                    ind = prototypes[x].clone()
+                    ind.setGenome(genome)
+                    ind.fitness = fitness
+                    ind.evaluated = evaluated
+                    state.population.subpops[x].individuals[i] = ind
+            if profiler is not None and profiler.enabled:
+                profiler.current = {"generation": generation, "phases": {}, "sources": {}}
+            newpop = state.population.emptyClone()
+            breeder.breedPopChunk(newpop, state, numinds, fromslots, thread)
+            slices = [[(ind.getGenome(), ind.fitness, ind.evaluated)
+                       for ind in subpop.individuals[fromslots[x]:fromslots[x] + numinds[x]]]
+                      for x, subpop in enumerate(newpop.subpops)]
+            sources = profiler.current["sources"] if profiler is not None and profiler.enabled else None
+            connection.send((slices, state.random[thread].getstate(), sources))
+        except Exception as e:
+            connection.send(e)
+    connection.close()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import collections
+from typing import List, Tuple
+
+from ec.Evaluator import Evaluator
+
+class SimpleEvaluator(Evaluator):
+    '''
+    The SimpleEvaluator evaluates every individual of every subpopulation
+    which has not been evaluated yet, one after another.
+
+    In a steady-state evolution, the offspring handed to submitIndividuals
+    are evaluated right away, and getNextEvaluatedIndividuals returns them
+    in the same order.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        # the submitted batches (individuals, subpopulation), evaluated but not returned yet
+        self.evaluatedBatches = collections.deque()
+
+    def evaluatePopulation(self, state:EvolutionState):
+        self.prepareEvaluation(state)
+        for x, subpop in enumerate(state.population.subpops):
+            self.evaluateIndividuals(state, subpop.individuals, x, 0)
+
+    def evaluateIndividuals(self, state:EvolutionState, inds:List, subpopulation:int, thread:int):
+        problem = self.p_problem
+        for ind in inds:
+            if ind.evaluated or self.lookupFitness(ind):
+                continue
+            problem.evaluate(state, ind, subpopulation, thread)
+            self.numEvaluated += 1
+            self.storeFitness(ind)
+        self.addNodeEvaluations(state, self.takeNodeEvaluations(problem))
+
+    def submitIndividuals(self, state:EvolutionState, inds:List, subpopulation:int):
+        '''start evaluating a batch of offspring of a subpopulation (steady-state evolution),
+        getNextEvaluatedIndividuals returns it once evaluated'''
+        self.evaluateIndividuals(state, inds, subpopulation, 0)
+        self.evaluatedBatches.append((inds, subpopulation))
+
+    def getNextEvaluatedIndividuals(self, state:EvolutionState)->Tuple[List, int]:
+        '''a submitted batch which has been evaluated and its subpopulation, waiting for one if needed'''
+        return self.evaluatedBatches.popleft()
+
+    def numEvaluating(self)->int:
+        '''the submitted batches not returned by getNextEvaluatedIndividuals yet'''
+        return len(self.evaluatedBatches)
+
+    def runComplete(self, state:EvolutionState)->bool:
+        for subpop in state.population.subpops:
+            for ind in subpop.individuals:
+                if ind.fitness.isIdealFitness():
+                    return True
+        return False
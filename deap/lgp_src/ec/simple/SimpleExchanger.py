@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from ec.Exchanger import Exchanger
+
+class SimpleExchanger(Exchanger):
+    '''Exchanges nothing: the subpopulations evolve on their own.'''
+
+    def preBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        return state.population
+
+    def postBreedingExchangePopulation(self, state:EvolutionState)->Population:
+        return state.population
+
+    def runComplete(self, state:EvolutionState)->str:
+        return None
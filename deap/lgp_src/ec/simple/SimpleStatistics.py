@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import List
+
+from ec.util import Parameter
+from ec.Statistics import Statistics
+
+class SimpleStatistics(Statistics):
+    '''
+    Writes the best individual of every subpopulation to file (stat.file)
+    after each evaluation (do-generation), and the best individual of the
+    run at the end (do-final), which the problem then describes, e.g. with
+    its test error (do-description).
+
+    Only these individuals are printed, so the log costs the same whatever
+    the population size. The file is buffered, and flushed at checkpoints
+    and at the end of the run. Without file nothing is written, but the
+    best individuals of the run are still kept (getBestSoFar).
+
+    The best individual of the run is the best of those given their final
+    fitness by Evaluator.evaluateFinal, so that with mini-batches it is
+    reported with its fitness on all the training cases.
+    '''
+
+    P_STATISTICS_FILE: str = "file"
+    P_DO_GENERATION: str = "do-generation"
+    P_DO_FINAL: str = "do-final"
+    P_DO_DESCRIPTION: str = "do-description"
+
+    BUFFERSIZE: int = 1 << 16
+
+    def __init__(self):
+        super().__init__()
+        self.filename:str = None
+        self.file = None
+        self.doGeneration:bool = True
+        self.doFinal:bool = True
+        self.doDescription:bool = True
+        # the best individual of every subpopulation so far
+        self.bestOfRun:List = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.filename = state.parameters.getFile(base.push(self.P_STATISTICS_FILE), None)
+        if self.filename is not None:
+            self.file = open(self.filename, "w", buffering=self.BUFFERSIZE)
+        self.doGeneration = state.parameters.getBoolean(base.push(self.P_DO_GENERATION), None, True)
+        self.doFinal = state.parameters.getBoolean(base.push(self.P_DO_FINAL), None, True)
+        self.doDescription = state.parameters.getBoolean(base.push(self.P_DO_DESCRIPTION), None, True)
+
+    def __getstate__(self):
+        # a restarted run appends to the file, see write
+        if self.file is not None:
+            self.file.flush()
+        d = self.__dict__.copy()
+        d["file"] = None
+        return d
+
+    def write(self, text:str):
+        if self.filename is None:
+            return
+        if self.file is None:
+            self.file = open(self.filename, "a", buffering=self.BUFFERSIZE)
+        self.file.write(text)
+
+    def getBestSoFar(self)->List:
+        return self.bestOfRun
+
+    @staticmethod
+    def bestIndividual(individuals:List):
+        best = individuals[0]
+        for ind in individuals[1:]:
+            if ind.fitness.betterThan(best.fitness):
+                best = ind
+        return best
+
+    @staticmethod
+    def individualToString(ind)->str:
+        return f"Evaluated: {ind.evaluated}\nFitness: {ind.fitness.fitnessToStringForHumans()}\n{ind}\n"
+
+    def postEvaluationStatistics(self, state:EvolutionState):
+        super().postEvaluationStatistics(state)
+        best = [self.bestIndividual(subpop.individuals) for subpop in state.population.subpops]
+        if self.bestOfRun is None:
+            self.bestOfRun = [None] * len(best)
+        for x, ind in enumerate(best):
+            if self.bestOfRun[x] is None or ind.fitness.betterThan(self.bestOfRun[x].fitness):
+                self.bestOfRun[x] = ind.clone()
+
+        if self.doGeneration:
+            self.write(f"\nGeneration: {state.generation}\nBest Individual:\n" +
+                       "".join(f"Subpopulation {x}:\n{self.individualToString(ind)}" for x, ind in enumerate(best)))
+
+    def preCheckpointStatistics(self, state:EvolutionState):
+        super().preCheckpointStatistics(state)
+        if self.file is not None:
+            self.file.flush()
+
+    def finalStatistics(self, state:EvolutionState, result:int):
+        super().finalStatistics(state, result)
+        final = getattr(state.evaluator, "finalIndividuals", None)
+        if self.bestOfRun is not None and final is not None:
+            # the fitnesses compared during the run may come from different fitness
+            # cases (mini-batches): report the best of the individuals given their
+            # final fitness, which include the best individuals of the run
+            self.bestOfRun = [self.bestIndividual(individuals).clone() if individuals else ind
+                              for ind, individuals in zip(self.bestOfRun, final)]
+        if self.bestOfRun is not None:
+            if self.doFinal:
+                self.write("\nBest Individual of Run:\n" +
+                           "".join(f"Subpopulation {x}:\n{self.individualToString(ind)}"
+                                   for x, ind in enumerate(self.bestOfRun)))
+            problem = state.evaluator.p_problem
+            if self.doDescription and hasattr(problem, "describe"):
+                for x, ind in enumerate(self.bestOfRun):
+                    problem.describe(state, ind, x, 0)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
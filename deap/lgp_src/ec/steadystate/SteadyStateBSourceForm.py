@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+class SteadyStateBSourceForm(ABC):
+    '''a breeding source which can be used by a steady-state evolution'''
+
+    @abstractmethod
+    def individualReplaced(self, state:SteadyStateEvolutionState, subpopulation:int, thread:int, individual:int):
+        '''called when the individual at index individual of the subpopulation has been replaced'''
+        pass
+
+    @abstractmethod
+    def sourcesAreProperForm(self, state:SteadyStateEvolutionState):
+        '''report an error if a source cannot be used by a steady-state evolution'''
+        pass
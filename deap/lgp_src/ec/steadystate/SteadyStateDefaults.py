@@ -0,0 +1,6 @@
+from ec.util import Parameter
+
+class SteadyStateDefaults:
+    @classmethod
+    def base(cls)->Parameter:
+        return Parameter("steady")
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from typing import List
+
+from ec.util import Parameter
+from ec.util.Checkpoint import Checkpoint
+from ec.util.Profiler import Profiler
+from ec.EvolutionState import EvolutionState
+from ec.SelectionMethod import SelectionMethod
+from ec.steadystate.SteadyStateDefaults import SteadyStateDefaults
+
+class SteadyStateEvolutionState(EvolutionState):
+    '''
+    A steady-state evolution (state = ec.steadystate.SteadyStateEvolutionState).
+    Instead of breeding a whole new population every generation, offspring
+    are bred steady.batch-size at a time (default 1) by the species'
+    pipeline, evaluated, and inserted into the population as soon as their
+    fitness is known. Each offspring replaces the individual picked by the
+    deselector of its subpopulation, breed.deselector.N (e.g. a
+    TournamentSelection with pick-worst = true), and the pipeline is told
+    which individual was replaced (individualReplaced). All the sources of
+    the pipelines must be steady-state sources (sourcesAreProperForm).
+
+    The evaluator keeps up to steady.in-flight batches (default 2 evalthreads)
+    evaluating at once (submitIndividuals): with a ParallelEvaluator and
+    evalthreads > 1, whenever a worker returns a batch, its offspring are
+    inserted and a new batch is bred and sent, so the workers never wait for
+    the slowest individual of a generation. The order in which the batches
+    come back depends on the scheduling of the workers, so such runs are not
+    reproducible. Breeding happens in this process (breedthreads is not used).
+
+    Generation 0 evaluates the initial population. Every later generation
+    inserts as many offspring as the population has individuals, so
+    generations and evaluations keep their meaning. Statistics, termination
+    (including the nodeevaluations budget), migrations (the pre-breeding
+    exchange of exch) and checkpoints happen between generations. The
+    batches still being evaluated carry over to the next generation, except
+    before a checkpoint, which waits for them. If the
+    problem changes its fitness function (mini-batches), the population is
+    evaluated again at the start of every generation.
+    '''
+
+    P_DESELECTOR: str = "deselector"
+    P_BATCHSIZE: str = "batch-size"
+    P_INFLIGHT: str = "in-flight"
+
+    def __init__(self, parameterPath:str, args:list=None):
+        super().__init__(parameterPath, args)
+        self.batchSize:int = 1
+        self.inFlight:int = 1
+        # per subpopulation: the selection method picking the individual an offspring replaces
+        self.deselectors:List[SelectionMethod] = []
+        # per subpopulation: the pipeline breeding the offspring, prepared once
+        self.pipelines:List = None
+        # the offspring inserted since generation 0, and the subpopulation of the next batch
+        self.numOffspring:int = 0
+        self.nextSubpopulation:int = 0
+
+    def setup(self, base:str):
+        super().setup(base)
+        def_ = SteadyStateDefaults.base()
+        self.batchSize = self.parameters.getIntWithDefault(def_.push(self.P_BATCHSIZE), None, 1)
+        if self.batchSize < 1:
+            self.output.fatal("The steady-state batch size must be >= 1", def_.push(self.P_BATCHSIZE))
+        self.inFlight = self.parameters.getIntWithDefault(def_.push(self.P_INFLIGHT), None, 2 * self.evalthreads)
+        if self.inFlight < 1:
+            self.output.fatal("The number of batches in flight must be >= 1", def_.push(self.P_INFLIGHT))
+
+        size = self.parameters.getInt(Parameter("pop").push("subpops"), None)
+        self.deselectors = []
+        for x in range(size):
+            p = Parameter(self.P_BREEDER).push(self.P_DESELECTOR).push(str(x))
+            if not self.parameters.exists(p):
+                self.output.fatal(f"No deselector for subpopulation {x}", p)
+            deselector = self.parameters.getInstanceForParameter(p, None, SelectionMethod)
+            deselector.setup(self, p)
+            self.deselectors.append(deselector)
+
+    def preparePipelines(self):
+        self.pipelines = []
+        for x, subpop in enumerate(self.population.subpops):
+            bp = subpop.species.pipe_prototype.clone()
+            bp.sourcesAreProperForm(self)
+            bp.prepareToProduce(self, x, 0)
+            self.pipelines.append(bp)
+
+    def breedIndividuals(self, subpopulation:int)->List:
+        '''a new batch of offspring of the subpopulation'''
+        inds = [None] * self.batchSize
+        bp = self.pipelines[subpopulation]
+        produced = 0
+        while produced < self.batchSize:
+            produced += bp.produce(1, self.batchSize - produced, produced, subpopulation, inds, self, 0)
+        return inds
+
+    def submitOffspring(self):
+        '''breed a batch for the next subpopulation (in turn) and start evaluating it'''
+        x = self.nextSubpopulation
+        self.nextSubpopulation = (x + 1) % len(self.population.subpops)
+        with self.profiler.phase(Profiler.BREEDING):
+            inds = self.breedIndividuals(x)
+        with self.profiler.phase(Profiler.EVALUATION):
+            self.evaluator.submitIndividuals(self, inds, x)
+
+    def insertIndividuals(self, inds:List, subpopulation:int):
+        '''replace an individual picked by the deselector with each evaluated offspring'''
+        individuals = self.population.subpops[subpopulation].individuals
+        for ind in inds:
+            index = self.deselectors[subpopulation].produceIndex(subpopulation, self, 0)
+            individuals[index] = ind
+            self.pipelines[subpopulation].individualReplaced(self, subpopulation, 0, index)
+        self.numOffspring += len(inds)
+
+    def insertNextIndividuals(self):
+        '''wait for the next evaluated batch and insert it'''
+        with self.profiler.phase(Profiler.EVALUATION):
+            inds, subpopulation = self.evaluator.getNextEvaluatedIndividuals(self)
+        self.insertIndividuals(inds, subpopulation)
+
+    def finishEvaluating(self):
+        '''insert the offspring still being evaluated'''
+        while self.evaluator.numEvaluating() > 0:
+            self.insertNextIndividuals()
+
+    def evolveGeneration(self):
+        '''breed, evaluate and insert offspring until the generation has as many as the population'''
+        with self.profiler.phase(Profiler.BREEDING):
+            if self.pipelines is None:
+                self.preparePipelines()
+            else:
+                # the population may have been evaluated again or exchanged since the last generation
+                for x, bp in enumerate(self.pipelines):
+                    bp.finishProducing(self, x, 0)
+                    bp.prepareToProduce(self, x, 0)
+        generationSize = sum(len(subpop.individuals) for subpop in self.population.subpops)
+        while self.numOffspring < self.generation * generationSize:
+            if self.limitNodeEvaluations and self.nodeEvaluation >= self.numNodeEva:
+                return
+            while self.evaluator.numEvaluating() < self.inFlight:
+                self.submitOffspring()
+            self.insertNextIndividuals()
+
+    def evolve(self):
+        if self.generation > 0:
+            self.output.message(f"Generation {self.generation}")
+
+        # EVALUATION
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.preEvaluationStatistics(self)
+        if self.generation == 0:
+            with self.profiler.phase(Profiler.EVALUATION):
+                self.evaluator.evaluatePopulation(self)
+        else:
+            problem = self.evaluator.p_problem
+            if hasattr(problem, "fitnessChanged") and problem.fitnessChanged(self):
+                self.finishEvaluating()
+                with self.profiler.phase(Profiler.EVALUATION):
+                    self.evaluator.evaluatePopulation(self)
+            self.evolveGeneration()
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postEvaluationStatistics(self)
+
+        # SHOULD WE QUIT?
+        if self.evaluator.runComplete(self) and self.quitOnRunComplete:
+            self.output.message("Found Ideal Individual")
+            return self.R_SUCCESS
+
+        if self.limitNodeEvaluations and self.nodeEvaluation >= self.numNodeEva:
+            self.output.message(f"Node evaluation budget used up ({self.nodeEvaluation} >= {self.numNodeEva:g})")
+            return self.R_FAILURE
+
+        if self.generation == self.numGenerations - 1:
+            return self.R_FAILURE
+
+        # EXCHANGING
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.prePreBreedingExchangeStatistics(self)
+        with self.profiler.phase(Profiler.EXCHANGE):
+            self.population = self.exchanger.preBreedingExchangePopulation(self)
+        with self.profiler.phase(Profiler.STATISTICS):
+            self.statistics.postPreBreedingExchangeStatistics(self)
+
+        exchanger_msg = self.exchanger.runComplete(self)
+        if exchanger_msg is not None:
+            self.output.message(exchanger_msg)
+            return self.R_SUCCESS
+
+        # INCREMENT GENERATION AND CHECKPOINT
+        self.generation += 1
+        if self.checkpoint and self.generation % self.checkpointModulo == 0:
+            self.finishEvaluating()
+            self.output.message("Checkpointing")
+            with self.profiler.phase(Profiler.CHECKPOINT):
+                self.statistics.preCheckpointStatistics(self)
+                Checkpoint.setCheckpoint(self)
+                self.statistics.postCheckpointStatistics(self)
+
+        return self.R_NOTDONE
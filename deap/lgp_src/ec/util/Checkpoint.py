@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import gzip
+import os
+import pickle
+import tempfile
+
+class Checkpoint:
+    '''
+    Saves and restores the whole EvolutionState of a run: the population, the
+    generation counter, the random streams of all the threads, and the state
+    of the breeder, evaluator and statistics.
+
+    A checkpoint is the gzip-compressed pickle of the state, written to
+    checkpoint-prefix.GENERATION.gz in checkpoint-directory (or the current
+    directory). The file is first written to a temporary file of the same
+    directory and then renamed over the final name, so a run interrupted while
+    checkpointing never leaves a truncated checkpoint behind.
+
+    Objects holding resources which cannot be saved (worker pools, open
+    files) drop them in __getstate__ and recreate them when the run is
+    restarted (EvolutionState.startFromCheckpoint).
+    '''
+
+    SUFFIX: str = ".gz"
+
+    @staticmethod
+    def filename(state:EvolutionState, generation:int=None)->str:
+        if generation is None:
+            generation = state.generation
+        name = f"{state.checkpointPrefix}.{generation}{Checkpoint.SUFFIX}"
+        if state.checkpointDirectory is not None:
+            return os.path.join(state.checkpointDirectory, name)
+        return name
+
+    @staticmethod
+    def setCheckpoint(state:EvolutionState)->str:
+        '''write the checkpoint of the current generation and return its file name'''
+        filename = Checkpoint.filename(state)
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, temporary = tempfile.mkstemp(prefix=".checkpoint", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temporary, filename)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        state.output.message(f"Wrote checkpoint {filename}")
+        return filename
+
+    @staticmethod
+    def restoreFromCheckpoint(filename:str)->EvolutionState:
+        with gzip.open(filename, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import importlib
+from typing import Dict
+
+class ClassRegistry:
+    '''
+    Resolves the class names of a parameter file to Python classes.
+
+    A name is resolved once and then cached, so a class used by many
+    parameters (e.g. the selection method of every pipeline source) is
+    imported only once. Names are first translated by the alias table, which
+    maps the ECJ/Java names used in existing parameter files to their Python
+    implementations, either exactly or by package prefix. Aliases are plain
+    strings, so the module behind an alias is only imported when a parameter
+    file actually uses it.
+
+    Since the Python classes follow the ECJ layout of one class per module
+    (ec/simple/SimpleEvaluator.py defines SimpleEvaluator), the name
+    "ec.simple.SimpleEvaluator" resolves to the class SimpleEvaluator of the
+    module ec.simple.SimpleEvaluator. "package.module.Class" works as well.
+
+    Subsystems a run may not use are resolved here when they are first
+    needed rather than imported with the modules using them: EvolutionState
+    resolves Checkpoint when it saves or restores a checkpoint, and the
+    runner (deap/lgp.py) only imports the exchanger a parameter file names,
+    e.g. IslandExchange.
+    '''
+
+    # exact aliases, name -> Python name
+    ALIASES: Dict[str, str] = {
+        "ec.simple.SimpleEvolutionState": "ec.EvolutionState",
+        "zhixing.symbreg_multitarget.individual.LGPIndividual4SRMT": "lgp.individual.LGPIndividual",
+        "zhixing.symbreg_multitarget.individual.primitive.InputFeature4SRMT": "lgp.individual.primitive.InputFeatureGPNode",
+        "zhixing.cpxInd.individual.GPTreeStruct": "lgp.individual.GPTree",
+        "zhixing.cpxInd.species.CpxGPSpecies": "ec.Species",
+        "zhixing.symbreg_multitarget.optimization.GPSymbolicRegressionMultiTarget":
+            "tasks.Symbreg.GPSymbolicRegressionMultiTarget",
+        "zhixing.symbolicregression.statistics.LGP4SRstatistics": "lgp.statistics.LGPStatistics",
+    }
+
+    # package prefix aliases, prefix -> Python prefix
+    PREFIXES: Dict[str, str] = {
+        "zhixing.symbolicregression.individual.primitive.": "lgp.individual.primitive.",
+        "zhixing.cpxInd.individual.primitive.": "lgp.individual.primitive.",
+        "zhixing.cpxInd.individual.reproduce.": "lgp.individual.reproduce.",
+    }
+
+    _classes: Dict[str, type] = {}
+
+    @classmethod
+    def register(cls, name:str, target):
+        '''alias name to a Python name, or directly to a class'''
+        if isinstance(target, type):
+            cls._classes[name] = target
+        else:
+            cls.ALIASES[name] = target
+            cls._classes.pop(name, None)
+
+    @classmethod
+    def translate(cls, name:str)->str:
+        if name in cls.ALIASES:
+            return cls.ALIASES[name]
+        for prefix, target in cls.PREFIXES.items():
+            if name.startswith(prefix):
+                return target + name[len(prefix):]
+        return name
+
+    @classmethod
+    def resolve(cls, name:str)->type:
+        found = cls._classes.get(name)
+        if found is None:
+            found = cls._import(cls.translate(name))
+            cls._classes[name] = found
+        return found
+
+    @staticmethod
+    def _import(path:str)->type:
+        components = path.split(".")
+        try:
+            # "package.Class" where the module package/Class.py defines Class
+            module = importlib.import_module(path)
+            found = getattr(module, components[-1], None)
+            if isinstance(found, type):
+                return found
+        except ImportError as e:
+            # only a missing module path falls back, errors raised by the module itself do not
+            if e.name != path:
+                raise
+        # "package.module.Class"
+        module = importlib.import_module(".".join(components[:-1]))
+        found = getattr(module, components[-1], None)
+        if not isinstance(found, type):
+            raise ImportError(f"{path} is not a class")
+        return found
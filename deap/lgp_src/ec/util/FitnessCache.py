@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import sys
+from collections import OrderedDict
+
+class FitnessCache:
+    '''
+    A least-recently-used map from a program key (bytes) to a fitness.
+
+    The cache holds at most maxBytes of keys and fitnesses (as estimated by
+    sizeOf) and evicts the least recently used entries beyond that. The
+    hits/misses/evictions counters are cumulative over the run, statistics
+    take differences between generations.
+    '''
+
+    # rough per-entry overhead of the OrderedDict
+    ENTRYOVERHEAD: int = 100
+
+    def __init__(self, maxBytes:int):
+        self.maxBytes = maxBytes
+        self.numBytes = 0
+        self.entries:OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def sizeOf(fitness)->int:
+        size = sys.getsizeof(fitness)
+        for value in getattr(fitness, "__dict__", {}).values():
+            size += getattr(value, "nbytes", 0) or sys.getsizeof(value)
+        return size
+
+    def get(self, key:bytes):
+        '''the cached fitness of key (do not modify it, clone it) or None'''
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key:bytes, fitness):
+        size = len(key) + self.sizeOf(fitness) + self.ENTRYOVERHEAD
+        if size > self.maxBytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.numBytes -= old[1]
+        self.entries[key] = (fitness, size)
+        self.numBytes += size
+        while self.numBytes > self.maxBytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.numBytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.numBytes = 0
+
+    def __len__(self)->int:
+        return len(self.entries)
+
+    def hitRate(self)->float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
@@ -1,14 +1,23 @@
 import sys
 
 class Output:
-    def error(self, message: str):
+    '''
+    Reports the progress of a run. With silent = true, messages are not
+    printed; warnings and fatal errors still are.
+    '''
+
+    def __init__(self, silent:bool=False):
+        self.silent:bool = silent
+
+    def error(self, message: str, *args):
         raise Exception(message)  # or a custom exception type
 
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         print(f"Warning: {message}", file=sys.stderr)
 
     def fatal(self, message: str, *args):
         raise SystemExit(f"Fatal error: {message}")
     
     def message(self, mes: str):
-        print(f"{message}")
+        if not self.silent:
+            print(f"{mes}")
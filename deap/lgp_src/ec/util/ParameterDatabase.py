@@ -1,13 +1,66 @@
+from __future__ import annotations
 
+import os
+from typing import Dict, List, Set
 
-import Parameter
+from ec.util.Parameter import Parameter
+from ec.util.ClassRegistry import ClassRegistry
 
 class ParameterDatabase:
-    def __init__(self, filename):
-        self.params = {}
-        self._load(filename)
+    '''
+    The parameters of a run, read from an ECJ-style parameter file.
 
-    def _load(self, filename):
+    A parameter file may inherit from other files with parent.0, parent.1, ...
+    (paths relative to the file). The file's own parameters win over those of
+    parent.0, which win over those of parent.1, and so on recursively. The
+    whole hierarchy is flattened once when the database is built, so a lookup
+    is a single dictionary access. The keys are also indexed as a trie on
+    their dot-separated components (getChildren), and typed values are cached.
+
+    Every get* method takes a parameter and a default parameter; the default
+    parameter is used when the parameter is not defined. Accessed parameters
+    are recorded so that the unused ones can be reported at the end of a run
+    (print-used-params, print-unaccessed-params, print-all-params).
+
+    File values (getFile) starting with "$" are relative to the directory the
+    program was started from, other relative paths are relative to the
+    parameter file defining them.
+    '''
+
+    P_PARENT: str = "parent"
+    P_PRINTUSED: str = "print-used-params"
+    P_PRINTUNACCESSED: str = "print-unaccessed-params"
+    P_PRINTALL: str = "print-all-params"
+
+    def __init__(self, filename:str=None, args:List[str]=None):
+        self.params:Dict[str, str] = {}
+        self.directories:Dict[str, str] = {}
+        self.trie:Dict = {}
+        self.accessed:Set[str] = set()
+        self.cache:Dict = {}
+
+        if filename is not None:
+            values, directories = self._load(os.path.abspath(filename), set())
+            self.params.update(values)
+            self.directories.update(directories)
+
+        # command-line style overrides: ["key=value", ...] or ["-p", "key=value", ...]
+        for arg in args or []:
+            if arg != "-p":
+                key, value = map(str.strip, arg.split("=", 1))
+                self.params[key] = value
+                self.directories[key] = os.getcwd()
+
+        for key in self.params:
+            self._index(key)
+
+    def _load(self, filename:str, loading:Set[str]):
+        if filename in loading:
+            raise ValueError(f"Parameter file {filename} inherits from itself")
+        loading = loading | {filename}
+        directory = os.path.dirname(filename)
+
+        own = {}
         with open(filename, 'r') as f:
             for line in f:
                 # Strip comments and whitespace
@@ -17,51 +70,180 @@ class ParameterDatabase:
                 if "=" not in line:
                     raise ValueError(f"Invalid line in parameter file: {line}")
                 key, value = map(str.strip, line.split("=", 1))
-                self.params[key] = value
+                own[key] = value
+
+        values = {}
+        directories = {}
+        x = 0
+        parents = []
+        while f"{self.P_PARENT}.{x}" in own:
+            parents.append(os.path.join(directory, own.pop(f"{self.P_PARENT}.{x}")))
+            x += 1
+        # the first parent has the precedence, so it is applied last
+        for parent in reversed(parents):
+            parentvalues, parentdirectories = self._load(os.path.abspath(parent), loading)
+            values.update(parentvalues)
+            directories.update(parentdirectories)
+
+        values.update(own)
+        directories.update({key: directory for key in own})
+        return values, directories
+
+    def _index(self, key:str):
+        node = self.trie
+        for part in key.split("."):
+            node = node.setdefault(part, {})
+
+    def set(self, param:Parameter, value):
+        key = str(param)
+        self.params[key] = str(value)
+        self.directories.setdefault(key, os.getcwd())
+        self._index(key)
+        self.cache.clear()
+
+    # ----------------------------- lookup -----------------------------
+
+    def _resolve(self, param:Parameter, default:Parameter=None)->str:
+        '''the key actually holding the value of param (or default), None if neither is defined'''
+        if param is not None:
+            key = str(param)
+            if key in self.params:
+                self.accessed.add(key)
+                return key
+        if default is not None:
+            key = str(default)
+            if key in self.params:
+                self.accessed.add(key)
+                return key
+        return None
 
     def getParamValue(self, param:Parameter, default:Parameter=None):
-        if self.exists(param):
-            return self.params.get(param)
-        else:
-            if self.exists(default):
-                return self.params.get(param)
-            else:
-                return None
+        key = self._resolve(param, default)
+        return self.params[key] if key is not None else None
+
+    def _getTyped(self, param:Parameter, default:Parameter, convert):
+        '''the value converted by convert, cached, or None if not defined'''
+        cachekey = (str(param), str(default), convert)
+        if cachekey in self.cache:
+            key, value = self.cache[cachekey]
+            self.accessed.add(key)
+            return value
+        key = self._resolve(param, default)
+        if key is None:
+            return None
+        value = convert(self.params[key])
+        self.cache[cachekey] = (key, value)
+        return value
+
+    def exists(self, param:Parameter, default:Parameter=None)->bool:
+        return (param is not None and str(param) in self.params) or \
+               (default is not None and str(default) in self.params)
+
+    def getChildren(self, param:Parameter)->List[str]:
+        '''the names of the components directly below param, e.g. ["0", "1"] for "targets"'''
+        node = self.trie
+        for part in str(param).split("."):
+            node = node.get(part)
+            if node is None:
+                return []
+        return list(node.keys())
 
     def getString(self, param:Parameter, default:Parameter=None)->str:
         return str(self.getParamValue(param, default))
 
-    def getInt(self, param:Parameter, default_param:Parameter=None)->int:
-        val = self.getParamValue(param, default_param)
+    def getStringWithDefault(self, param:Parameter, default:Parameter, default_val:str)->str:
+        val = self.getParamValue(param, default)
+        return val if val is not None else default_val
+
+    def getInt(self, param:Parameter, default_param:Parameter=None, minValue:int=None)->int:
+        val = self._getTyped(param, default_param, int)
+
+        if val is None:
+            raise SystemExit(f"Fatal error: cannot find the parameter either {param} or {default_param}")
+        if minValue is not None and val < minValue:
+            raise SystemExit(f"Fatal error: the parameter {param} must be >= {minValue}")
+        return val
+
+    def getIntWithDefault(self, param:Parameter, default_param:Parameter, default_val)->int:
+        val = self._getTyped(param, default_param, int)
+        return val if val is not None else default_val
 
-        if val is not None:
-            return int(val) 
-        else:
+    def getBoolean(self, param:Parameter, default_param:Parameter, default_val)->bool:
+        val = self._getTyped(param, default_param, _toBoolean)
+        return val if val is not None else default_val
+
+    def getDouble(self, param:Parameter, default_param:Parameter=None)->float:
+        val = self._getTyped(param, default_param, float)
+        if val is None:
             raise SystemExit(f"Fatal error: cannot find the parameter either {param} or {default_param}")
+        return val
 
     def getDoubleWithDefault(self, param:Parameter, default_param:Parameter, default_val)->float:
+        val = self._getTyped(param, default_param, float)
+        return val if val is not None else default_val
 
-        val = self.getParamValue(param, default_param)
-        return float(val) if val is not None else default_val
+    def getFile(self, param:Parameter, default_param:Parameter=None)->str:
+        key = self._resolve(param, default_param)
+        if key is None:
+            return None
+        value = self.params[key]
+        if value.startswith("$"):
+            return os.path.join(os.getcwd(), value[1:])
+        return os.path.join(self.directories.get(key, os.getcwd()), value)
 
-    def getInstanceForParameter(self, param:Parameter, default_param:Parameter, cls_type):
-        
+    def getClassForParameter(self, param:Parameter, default_param:Parameter, cls_type)->type:
+        '''the class named by param, which must be a subclass of cls_type'''
         class_name = self.getParamValue(param, default_param)
         if class_name is None:
             raise ValueError(f"Parameter '{param}' is not defined.")
-        
-        components = class_name.split('.')
-        
-        module = __import__(".".join(components[:-1]), fromlist=[components[-1]])
-        return getattr(module, components[-1])()
+        try:
+            found = ClassRegistry.resolve(class_name)
+        except ImportError as e:
+            raise ValueError(f"Cannot load the class {class_name} of parameter '{param}': {e}") from e
+        if isinstance(cls_type, type) and not issubclass(found, cls_type):
+            raise ValueError(f"The class {class_name} of parameter '{param}' is not a subclass of {cls_type.__name__}")
+        return found
+
+    def getInstanceForParameter(self, param:Parameter, default_param:Parameter, cls_type):
+        return self.getClassForParameter(param, default_param, cls_type)()
+
+    def getInstanceForParameterEq(self, param:Parameter, default_param:Parameter, cls_type):
+        '''as getInstanceForParameter, but the class may also be cls_type itself'''
+        return self.getInstanceForParameter(param, default_param, cls_type)
+
+    # ----------------------------- reporting -----------------------------
+
+    def listAccessed(self)->List[str]:
+        return sorted(self.accessed)
+
+    def listNotAccessed(self)->List[str]:
+        return sorted(set(self.params) - self.accessed)
+
+    def report(self, output:Output):
+        '''print the parameters requested by print-used-params, print-unaccessed-params and print-all-params'''
+        # the flags themselves do not count as used
+        flags = {}
+        for flag in (self.P_PRINTUSED, self.P_PRINTUNACCESSED, self.P_PRINTALL):
+            flags[flag] = _toBoolean(self.params.get(flag, "false"))
+
+        if flags[self.P_PRINTALL]:
+            output.message("All parameters:\n" + "\n".join(f"{k} = {self.params[k]}" for k in sorted(self.params)))
+        if flags[self.P_PRINTUSED]:
+            output.message("Used parameters:\n" + "\n".join(f"{k} = {self.params[k]}" for k in self.listAccessed()))
+        if flags[self.P_PRINTUNACCESSED]:
+            output.message("Unaccessed parameters:\n" + "\n".join(f"{k} = {self.params[k]}" for k in self.listNotAccessed()))
+
+    def __str__(self)->str:
+        return "\n".join(f"{k} = {self.params[k]}" for k in sorted(self.params))
+
+
+def _toBoolean(value:str)->bool:
+    return value.strip().lower() == "true"
 
-    def exists(self, param:Parameter, default:Parameter=None)->bool:
-        return param in self.params
-    
 
 if __name__ == "__main__":
-    db = ParameterDatabase('D:\\zhixing\\科研\\LGP4PY\\deap_LGP\\tasks\\Symbreg\\parameters\\simpleLGP_SRMT.params')
-    param = Parameter.Parameter("stat").push("child").push("0")
-    test = db.getParamValue(str(param))  # returns value
-    print(test)
+    import sys
+    db = ParameterDatabase(sys.argv[1], sys.argv[2:])
+    param = Parameter("stat").push("child").push("0")
+    print(db.getParamValue(param))
     print(db)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import json
+import time
+import tracemalloc
+from typing import Dict, List
+
+from ec.util import Parameter
+
+class Profiler:
+    '''
+    Instrumentation of a run (profile = true). Every generation gets a
+    record of:
+
+        phases      wall and CPU seconds of evaluation, breeding, exchange,
+                    statistics and checkpoint; with profile.memory = true,
+                    also the peak bytes allocated during each phase
+                    (tracemalloc, which slows the run down)
+        sources     wall and CPU seconds, calls and individuals of every
+                    source of a MultiBreedingPipeline (including those timed
+                    by the breeding workers, see SimpleBreeder)
+        evaluations the individuals evaluated, the fitness cache hits and the
+                    node evaluations (instructions times fitness cases)
+
+    The records are kept in records and appended as JSON lines to
+    profile.file. profile.cprofile = FILE also runs cProfile over the whole
+    run and dumps its statistics to FILE at the end, for pstats or any
+    viewer reading cProfile dumps (e.g. snakeviz).
+
+    When profiling is disabled, phase() and source() return a shared null
+    context, so the instrumented code costs next to nothing. Statistics
+    reporting the time of the phases (e.g. LGPStatistics) call timePhases:
+    the phases are then timed even when profiling is disabled, and read
+    with phaseTime, but nothing else is measured or recorded.
+    '''
+
+    P_PROFILE: str = "profile"
+    P_MEMORY: str = "memory"
+    P_FILE: str = "file"
+    P_CPROFILE: str = "cprofile"
+
+    EVALUATION: str = "evaluation"
+    BREEDING: str = "breeding"
+    EXCHANGE: str = "exchange"
+    STATISTICS: str = "statistics"
+    CHECKPOINT: str = "checkpoint"
+
+    _NULL = contextlib.nullcontext()
+
+    def __init__(self):
+        self.enabled:bool = False
+        # time the phases for phaseTime, even when disabled
+        self.timing:bool = False
+        self.memory:bool = False
+        self.filename:str = None
+        self.cprofileFile:str = None
+        self.records:List[Dict] = []
+        self.current:Dict = None
+        # the evaluator counters at the start of the current generation
+        self.counters = (0, 0, 0)
+        self.profile:cProfile.Profile = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        self.enabled = state.parameters.getBoolean(base, None, False)
+        if not self.enabled:
+            return
+        self.memory = state.parameters.getBoolean(base.push(self.P_MEMORY), None, False)
+        self.filename = state.parameters.getFile(base.push(self.P_FILE), None)
+        self.cprofileFile = state.parameters.getFile(base.push(self.P_CPROFILE), None)
+        if self.filename is not None:
+            open(self.filename, "w").close()
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d["profile"] = None
+        return d
+
+    def startRun(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofileFile is not None and self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def finishRun(self):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.cprofileFile)
+            self.profile = None
+
+    @staticmethod
+    def readCounters(state:EvolutionState):
+        '''(evaluations, cache hits, node evaluations) of the run so far'''
+        evaluator = state.evaluator
+        cache = getattr(evaluator, "cache", None)
+        return (getattr(evaluator, "numEvaluated", 0), cache.hits if cache is not None else 0,
+                max(getattr(state, "nodeEvaluation", 0), 0))
+
+    def timePhases(self):
+        '''time the phases of every generation, see phaseTime'''
+        self.timing = True
+
+    def phaseTime(self, name:str)->float:
+        '''the wall seconds of phase name in the current generation so far, 0 if not timed'''
+        if self.current is None or name not in self.current["phases"]:
+            return 0.0
+        return self.current["phases"][name]["wall"]
+
+    def startGeneration(self, state:EvolutionState):
+        if not self.enabled and not self.timing:
+            return
+        self.current = {"generation": state.generation, "phases": {}, "sources": {}}
+        self.counters = self.readCounters(state)
+
+    def endGeneration(self, state:EvolutionState):
+        if not self.enabled:
+            self.current = None
+        if self.current is None:
+            return
+        evaluations, hits, nodes = self.readCounters(state)
+        self.current["evaluations"] = evaluations - self.counters[0]
+        self.current["cache_hits"] = hits - self.counters[1]
+        self.current["node_evaluations"] = nodes - self.counters[2]
+        self.records.append(self.current)
+        if self.filename is not None:
+            with open(self.filename, "a") as f:
+                f.write(json.dumps(self.current) + "\n")
+        self.current = None
+
+    def mergeSources(self, sources:Dict):
+        '''add the sources timed by another process (e.g. a breeding worker) to the current generation'''
+        if not self.enabled or self.current is None:
+            return
+        entries = self.current["sources"]
+        for name, timing in sources.items():
+            entry = entries.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            for key, value in timing.items():
+                entry[key] = entry.get(key, 0) + value
+
+    def phase(self, name:str):
+        '''a context measuring a phase of the current generation'''
+        if self.current is None:
+            return self._NULL
+        return self._measure(self.current["phases"], name, self.memory, 0)
+
+    def source(self, name:str, individuals:int):
+        '''a context measuring a call of a breeding source producing individuals'''
+        if not self.enabled or self.current is None:
+            return self._NULL
+        return self._measure(self.current["sources"], name, False, individuals)
+
+    @contextlib.contextmanager
+    def _measure(self, entries:Dict, name:str, memory:bool, individuals:int):
+        memory = memory and tracemalloc.is_tracing()
+        if memory:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = entries.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            entry["wall"] += time.perf_counter() - wall
+            entry["cpu"] += time.process_time() - cpu
+            entry["calls"] += 1
+            if individuals:
+                entry["individuals"] = entry.get("individuals", 0) + individuals
+            if memory:
+                peak = tracemalloc.get_traced_memory()[1] - start
+                entry["memory"] = max(entry.get("memory", 0), peak)
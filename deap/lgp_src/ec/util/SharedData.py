@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+import numpy as np
+
+class SharedData:
+    '''
+    Read-only data (e.g. the dataset of a problem) loaded at most once per
+    process.
+
+    The job runner (deap/lgp.py) asks the problem to load its data through
+    SharedData before it forks the job processes, so all the jobs read the
+    same physical pages instead of parsing and holding their own copy. The
+    arrays are made read-only when they are stored: writing to them would
+    give the writing process a private copy of the pages.
+    '''
+
+    _data: Dict = {}
+
+    @classmethod
+    def get(cls, key, loader:Callable):
+        '''the data stored under key, loaded by loader() the first time'''
+        found = cls._data.get(key)
+        if found is None:
+            found = _freeze(loader())
+            cls._data[key] = found
+        return found
+
+    @classmethod
+    def contains(cls, key)->bool:
+        return key in cls._data
+
+    @classmethod
+    def clear(cls):
+        cls._data.clear()
+
+
+def _freeze(data):
+    if isinstance(data, np.ndarray):
+        data.setflags(write=False)
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            _freeze(item)
+    elif isinstance(data, dict):
+        for item in data.values():
+            _freeze(item)
+    return data
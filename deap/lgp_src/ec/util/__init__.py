@@ -0,0 +1,3 @@
+from ec.util.Parameter import Parameter
+from ec.util.Output import Output
+from ec.util.ParameterDatabase import ParameterDatabase
@@ -1,9 +1,13 @@
+from __future__ import annotations
+
+import copy
 from abc import ABC, abstractmethod
 from typing import List, Set
 
-from ec.util import Parameter, ParameterDatabase
+from ec.util import Parameter
 
-from ec import *
+from ec.GPNodeParent import GPNodeParent
+from ec.GPDefaults import GPDefaults
 
 class GPNode (GPNodeParent):
 
@@ -23,6 +27,10 @@ class GPNode (GPNodeParent):
 
     _NODESEARCH_CUSTOM: int = 3  # equivalent to package-private or private
 
+    # the node searches indexed by GPTree
+    INDEXED_NODESEARCHES = (NODESEARCH_ALL, NODESEARCH_TERMINALS, NODESEARCH_NONTERMINALS,
+                            NODESEARCH_CONSTANT, NODESEARCH_READREG)
+
     CHILDREN_UNKNOWN: int = -1
 
     def __init__(self):
@@ -104,28 +112,29 @@ class GPNode (GPNodeParent):
     #         s += child.numNodes_with_gatherer(g)
     #     return s + (1 if g.test(self) else 0)
 
+    def matchesNodeSearch(self, nodesearch: int) -> bool:
+        if nodesearch == self.NODESEARCH_ALL:
+            return True
+        if nodesearch == self.NODESEARCH_TERMINALS:
+            return len(self.children) == 0
+        if nodesearch == self.NODESEARCH_NONTERMINALS:
+            return len(self.children) > 0 and not isinstance(self, WriteRegisterGPNode)
+        if nodesearch == self.NODESEARCH_CONSTANT:
+            return len(self.children) == 0 and not isinstance(self, ReadRegisterGPNode)
+        if nodesearch == self.NODESEARCH_READREG:
+            return isinstance(self, ReadRegisterGPNode)
+        return False
+
     def numNodes(self, nodesearch: int) -> int:
+        '''the number of nodes of this subtree matching nodesearch, by a full traversal.
+        GPTree.numNodes answers the same question for a whole tree from its node index.'''
         s = 0
         for child in self.children:
             if child is not None:
                 s += child.numNodes(nodesearch)
             elif nodesearch == self.NODESEARCH_NULL:
                 s += 1
-
-        is_terminal = len(self.children) == 0
-        is_nonterminal = len(self.children) > 0 and not isinstance(self, WriteRegisterGPNode)
-        is_constant = len(self.children) == 0 and not isinstance(self, ReadRegisterGPNode)
-        is_readreg = isinstance(self, ReadRegisterGPNode)
-
-        include = (
-            nodesearch == self.NODESEARCH_ALL or
-            (nodesearch == self.NODESEARCH_TERMINALS and is_terminal) or
-            (nodesearch == self.NODESEARCH_NONTERMINALS and is_nonterminal) or
-            (nodesearch == self.NODESEARCH_CONSTANT and is_constant) or
-            (nodesearch == self.NODESEARCH_READREG and is_readreg)
-        )
-
-        return s + (1 if include else 0)
+        return s + (1 if self.matchesNodeSearch(nodesearch) else 0)
 
     def depth(self) -> int:
         d = 0
@@ -145,12 +154,7 @@ class GPNode (GPNodeParent):
     
     
     def nodeInPosition(self, p: int, g: GPNodeGatherer, nodesearch: int) -> int:
-        if (nodesearch == self.NODESEARCH_ALL or
-            (nodesearch == self.NODESEARCH_TERMINALS and len(self.children) == 0) or
-            (nodesearch == self.NODESEARCH_NONTERMINALS and len(self.children) > 0 and not isinstance(self, WriteRegisterGPNode)) or
-            (nodesearch == self.NODESEARCH_CONSTANT and len(self.children) == 0 and not isinstance(self, ReadRegisterGPNode)) or
-            (nodesearch == self.NODESEARCH_READREG and isinstance(self, ReadRegisterGPNode))):
-
+        if self.matchesNodeSearch(nodesearch):
             if p == 0:
                 g.node = self
                 return -1
@@ -164,6 +168,13 @@ class GPNode (GPNodeParent):
 
         return p
     
+    def rootParent(self) -> GPNodeParent:
+        '''the GPTree holding this node (or the topmost node if the subtree is detached)'''
+        cparent = self
+        while isinstance(cparent, GPNode) and cparent.parent is not None:
+            cparent = cparent.parent
+        return cparent
+
     def contains(self, subnode: GPNode) -> bool:
         if subnode == self:
             return True
@@ -176,12 +187,13 @@ class GPNode (GPNodeParent):
         pass
 
     def lightClone(self) -> GPNode:
-        import copy
-        obj = copy.deepcopy(self)
+        '''a copy of this node alone: its attributes are copied, its children are left
+        to be filled in, and it has no parent'''
+        obj = copy.copy(self)
         if len(self.children) == 0:
             obj.children = self.children  # share array (assumed to be reused zeroChildren)
         else:
-            obj.children = [GPNode] * len(self.children)
+            obj.children = [None] * len(self.children)
         obj.parent = None
         return obj
 
@@ -199,7 +211,14 @@ class GPNode (GPNodeParent):
         copied tree.  If the node oldSubtree is located somewhere in this
         tree, then its subtree is replaced with a deep-cloned copy of
         newSubtree.  The result has everything set except for the root
-        node's parent and argposition. '''
+        node's parent and argposition.
+
+        The unchanged subtrees are copied as well rather than shared with
+        this tree: every node holds its parent and argposition, which
+        replaceWith, rootParent and atDepth follow, so a node can only be in
+        one tree. Sharing without copying is done one level down instead,
+        by the instruction rows of LGPIndividual (copy-on-write, see
+        LGPIndividual.clone), from which the trees are built. '''
         if self == oldSubtree:
             return newSubtree.clone()
         else:
@@ -217,7 +236,8 @@ class GPNode (GPNodeParent):
         tree, then its subtree is replaced with
         newSubtree (<i>not</i> a copy of newSubtree).  
         The result has everything set except for the root
-        node's parent and argposition.
+        node's parent and argposition. As with cloneReplacing, the rest of
+        the tree is copied, since a node can only have one parent.
         '''
         if self == oldSubtree:
             return newSubtree
@@ -244,6 +264,10 @@ class GPNode (GPNodeParent):
             newNode.children[x].parent = newNode
             newNode.children[x].argposition = x
 
+        root = newNode.rootParent()
+        if hasattr(root, "invalidateIndex"):
+            root.invalidateIndex()
+
     def nodeEquivalentTo(self, node: GPNode) -> bool:
         return (
             type(self) == type(node) and
@@ -306,3 +330,8 @@ class GPNode (GPNodeParent):
 class GPNodeGaterer:
         def __init__(self):
             self.node:GPNode = None
+
+
+# the register primitives subclass GPNode, so they can only be imported once GPNode exists
+from lgp.individual.primitive.ReadRegisterGPNode import ReadRegisterGPNode
+from lgp.individual.primitive.WriteRegisterGPNode import WriteRegisterGPNode
@@ -1,16 +1,96 @@
-from typing import List
+from __future__ import annotations
 
-from ec.util import Parameter, ParameterDatabase
+from typing import Dict, List
 
-from ec import *
+from ec.util import Parameter
+
+from ec.GPNodeParent import GPNodeParent
+from ec.GPDefaults import GPDefaults
 
 class GPTree (GPNodeParent):
+    '''
+    A tree of GPNodes rooted at child.
+
+    The tree keeps an index of its nodes: the pre-order list of the nodes of
+    every node search (GPNode.INDEXED_NODESEARCHES) and the size of every
+    subtree. It is built by one traversal the first time it is needed, so
+    numNodes and nodeInPosition are O(1) for all the tries of a crossover or
+    mutation. Assigning child or GPNode.replaceWith drops the index; code
+    modifying the nodes of the tree in place must call invalidateIndex.
+    '''
 
     P_TREE: str = "tree"
 
     def __init__(self):
-        self.child:GPNode = None
+        self._child:GPNode = None
         self.owner:GPIndividual = None
+
+        # nodesearch -> the matching nodes, in pre-order
+        self.nodeIndex:Dict[int, List[GPNode]] = None
+        # id(node) -> the number of nodes of its subtree
+        self.subtreeSizes:Dict[int, int] = None
+        self.numNullChildren:int = 0
+
+    @property
+    def child(self)->GPNode:
+        return self._child
+
+    @child.setter
+    def child(self, node:GPNode):
+        self._child = node
+        self.invalidateIndex()
+
+    def invalidateIndex(self):
+        self.nodeIndex = None
+        self.subtreeSizes = None
+
+    def buildIndex(self):
+        index = {nodesearch: [] for nodesearch in GPNode.INDEXED_NODESEARCHES}
+        sizes = {}
+        nulls = 0
+
+        def visit(node:GPNode)->int:
+            nonlocal nulls
+            for nodesearch, nodes in index.items():
+                if node.matchesNodeSearch(nodesearch):
+                    nodes.append(node)
+            size = 1
+            for child in node.children:
+                if child is None:
+                    nulls += 1
+                else:
+                    size += visit(child)
+            sizes[id(node)] = size
+            return size
+
+        if self._child is not None:
+            visit(self._child)
+        self.nodeIndex = index
+        self.subtreeSizes = sizes
+        self.numNullChildren = nulls
+
+    def getNodes(self, nodesearch:int)->List[GPNode]:
+        '''the nodes matching nodesearch, in pre-order. The list must not be modified.'''
+        if self.nodeIndex is None:
+            self.buildIndex()
+        return self.nodeIndex[nodesearch]
+
+    def numNodes(self, nodesearch:int)->int:
+        if nodesearch == GPNode.NODESEARCH_NULL:
+            if self.nodeIndex is None:
+                self.buildIndex()
+            return self.numNullChildren
+        return len(self.getNodes(nodesearch))
+
+    def nodeInPosition(self, p:int, nodesearch:int)->GPNode:
+        '''the p-th node (in pre-order) matching nodesearch'''
+        return self.getNodes(nodesearch)[p]
+
+    def subtreeSize(self, node:GPNode)->int:
+        '''the number of nodes of the subtree rooted at node, which must belong to this tree'''
+        if self.subtreeSizes is None:
+            self.buildIndex()
+        return self.subtreeSizes[id(node)]
     
     @classmethod
     def defaultBase(cls) -> Parameter:
@@ -42,7 +122,10 @@ class GPTree (GPNodeParent):
         def_param = self.defaultBase()
 
     def __str__(self)->str:
-        self.child.printRootedTreeInString()
+        return self.child.printRootedTreeInString()
 
     def buildTree(self, state:EvolutionState, thread:int):
-        self.child = None
\ No newline at end of file
+        self.child = None
+
+
+from lgp.individual.GPNode import GPNode
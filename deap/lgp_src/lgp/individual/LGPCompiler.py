@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, List
+
+import numpy as np
+
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+class LGPCompiler:
+    '''
+    Compiles linear programs into straight-line Python functions, the
+    linear counterpart of deap.gp.compile. The program
+
+        [Add, 2, x0, 0.5]
+        [Sin, 0, r2, -]
+
+    becomes
+
+        def program(registers, inputs):
+            r0 = registers[0]
+            r2 = registers[2]
+            x0 = inputs[0]
+            f0(r2, x0, 0.5)
+            f4(r0, r2)
+
+    where fN is the execute() of function N of the instruction set, so a
+    compiled program computes exactly what LGPInterpreter.execute computes,
+    without decoding the opcodes and operands of every instruction at every
+    execution. Only the registers and inputs the program uses are bound, and
+    constants are inlined as literals (float('nan') and float('inf') for
+    the non-finite ones).
+
+    Compiled programs are cached by their instructions (cache-size programs
+    at most, the least recently used ones are dropped first), so the
+    effective code of an individual surviving several generations, or shared
+    by several individuals, is compiled once. Compiled functions cannot be
+    pickled: a pickled compiler starts with an empty cache.
+    '''
+
+    def __init__(self, instructionSet:LGPInstructionSet, cacheSize:int=4096):
+        self.instructionSet = instructionSet
+        self.cacheSize:int = cacheSize
+        self.namespace = {f"f{x}": f.execute for x, f in enumerate(instructionSet.functions)}
+        self.cache:OrderedDict = OrderedDict()
+        self.hits:int = 0
+        self.misses:int = 0
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d["namespace"] = None
+        d["cache"] = OrderedDict()
+        return d
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+        self.namespace = {f"f{x}": f.execute for x, f in enumerate(self.instructionSet.functions)}
+
+    def operandToSource(self, operand:int)->str:
+        iset = self.instructionSet
+        if operand < iset.inputStart:
+            return f"r{operand}"
+        if operand < iset.constantStart:
+            return f"x{operand - iset.inputStart}"
+        constant = float(iset.constants[operand - iset.constantStart])
+        # nan and inf are not literals: repr would give undefined names
+        return repr(constant) if np.isfinite(constant) else f"float('{constant!r}')"
+
+    def toSource(self, instructions:np.ndarray, name:str="program")->str:
+        '''the Python source of the function running instructions'''
+        iset = self.instructionSet
+        noop = LGPInstructionSet.NOOPERAND
+        rows = instructions.tolist()
+        registers = set()
+        inputs = set()
+        body:List[str] = []
+        for op, dest, src0, src1 in rows:
+            sources = (src0,) if src1 == noop else (src0, src1)
+            registers.add(dest)
+            for operand in sources:
+                if operand < iset.inputStart:
+                    registers.add(operand)
+                elif operand < iset.constantStart:
+                    inputs.add(operand - iset.inputStart)
+            args = ", ".join(self.operandToSource(operand) for operand in sources)
+            body.append(f"    f{op}(r{dest}, {args})")
+
+        lines = [f"def {name}(registers, inputs):"]
+        lines += [f"    r{r} = registers[{r}]" for r in sorted(registers)]
+        lines += [f"    x{x} = inputs[{x}]" for x in sorted(inputs)]
+        lines += body if body else ["    pass"]
+        return "\n".join(lines) + "\n"
+
+    def compile(self, instructions:np.ndarray)->Callable:
+        '''the function (registers, inputs) running instructions, writing the registers in place'''
+        key = instructions.tobytes()
+        program = self.cache.get(key)
+        if program is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return program
+
+        self.misses += 1
+        namespace = dict(self.namespace)
+        exec(compile(self.toSource(instructions), "<lgp program>", "exec"), namespace)
+        program = namespace["program"]
+        if self.cacheSize > 0:
+            self.cache[key] = program
+            if len(self.cache) > self.cacheSize:
+                self.cache.popitem(last=False)
+        return program
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+
+from lgp.LGPDefaults import LGPDefaults
+from lgp.individual.GPTree import GPTree
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+class LGPIndividual:
+    '''
+    An LGP individual whose genome is an instruction matrix.
+
+    Every row of self.instructions is one instruction [opcode, destination,
+    source0, source1] (see LGPInstructionSet for the operand encoding).
+    A program of 100 instructions is therefore one 100x4 int32 array instead
+    of hundreds of GPTree/GPNode objects. The GPTree view of an instruction
+    is still available (getTree, setTree, getTrees, setTrees) and converts
+    losslessly in both directions.
+
+    The individual also caches which instructions are effective, i.e., can
+    influence the output registers. The cache is a backward data-flow pass:
+    liveRegisters[i] is the bit set of the registers read before being
+    overwritten by instructions i..end (liveRegisters[n] is the set of output
+    registers), and instruction i is effective iff it writes a register of
+    liveRegisters[i+1]. Since the status of an instruction only depends on the
+    code after it, a change at position p only makes the status of [0, p]
+    stale. Variation must go through setInstruction, insertInstructions,
+    removeInstructions or setInstructions (or call invalidateStatus after
+    writing self.instructions directly) so that only that prefix is recomputed.
+
+    The recomputation also stops early: the edit methods record in
+    statusValid the last position whose stored live set still belongs to
+    the unchanged code before the edits. Once the backward pass reaches that
+    part of the program and finds the live set it had before, the status of
+    the remaining instructions cannot have changed. A mutation therefore
+    only costs the region it changed plus the instructions upstream whose
+    liveness it actually affected.
+
+    clone() does not copy the arrays: the clone and the original share them
+    until one of them modifies its program, which first copies them
+    (ownGenome). Reproduction and the offspring of a mutation that ends up
+    rejected therefore cost no copy at all.
+
+    The structural hash (getStructuralKey, __hash__) is the sum modulo 2^64
+    of one mixed 64-bit term per instruction, salted with its position.
+    Once computed, the edit methods keep it up to date by subtracting the
+    terms of the rows they change (or shift) and adding the new ones: a
+    mutation of one instruction costs one term, whatever the program length.
+    '''
+
+    # registers are the bits of a 64-bit live set
+    MAXREGISTERS: int = 64
+
+    # constants of the structural hash (splitmix64)
+    HASHMASK: int = (1 << 64) - 1
+    _GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+    _MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+    _MIX2 = np.uint64(0x94D049BB133111EB)
+
+    P_INDIVIDUAL: str = "individual"
+    P_MAXNUMTREES: str = "maxnumtrees"
+    P_MINNUMTREES: str = "minnumtrees"
+    P_INITMAXNUMTREES: str = "init_maxnumtrees"
+    P_INITMINNUMTREES: str = "init_minnumtrees"
+    P_NUMREGISTERS: str = "numregisters"
+    P_EFFECTIVE_INITIAL: str = "effective_initial"
+    P_NUMOUTPUTREGISTERS: str = "num-output-register"
+    P_OUTPUTREGISTER: str = "output-register"
+
+    # columns of the instruction matrix
+    OPCODE: int = 0
+    DEST: int = 1
+    SRC0: int = 2
+    SRC1: int = 3
+    NUMCOLUMNS: int = 4
+
+    def __init__(self):
+        self._instructions = np.zeros((0, self.NUMCOLUMNS), dtype=np.int32)
+        # the instruction and status arrays may be shared with clones, see ownGenome
+        self.shared:bool = False
+
+        # effectiveness cache, instructions [0, statusStale) are not up to date,
+        # liveRegisters[0..statusValid] are those of the code before the edits
+        self.effective = np.zeros(0, dtype=bool)
+        self.liveRegisters = np.zeros(1, dtype=np.uint64)
+        self.statusStale:int = 0
+        self.statusValid:int = -1
+        self.canonicalKey:bytes = None
+        # the structural hash of the instructions, None until computed, see getStructuralKey
+        self.structuralHash:int = None
+
+        # shared by all the individuals of the run
+        self.instructionSet:LGPInstructionSet = None
+
+        self.outputRegisters = np.zeros(1, dtype=np.int32)
+
+        self.maxNumTrees:int = 100
+        self.minNumTrees:int = 1
+        self.initMaxNumTrees:int = 20
+        self.initMinNumTrees:int = 5
+        self.effectiveInitial:bool = False
+
+        self.fitness = None
+        self.evaluated:bool = False
+        self.species = None
+
+    @classmethod
+    def defaultBase(cls) -> Parameter:
+        return LGPDefaults.base().push(cls.P_INDIVIDUAL)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        def_param = self.defaultBase()
+        params = state.parameters
+
+        self.maxNumTrees = params.getInt(base.push(self.P_MAXNUMTREES), def_param.push(self.P_MAXNUMTREES))
+        self.minNumTrees = params.getInt(base.push(self.P_MINNUMTREES), def_param.push(self.P_MINNUMTREES))
+        if self.minNumTrees < 1 or self.maxNumTrees < self.minNumTrees:
+            state.output.fatal("An LGP individual needs 1 <= minnumtrees <= maxnumtrees", base.push(self.P_MINNUMTREES))
+
+        self.initMaxNumTrees = params.getInt(base.push(self.P_INITMAXNUMTREES), def_param.push(self.P_INITMAXNUMTREES))
+        self.initMinNumTrees = params.getInt(base.push(self.P_INITMINNUMTREES), def_param.push(self.P_INITMINNUMTREES))
+        if self.initMinNumTrees < self.minNumTrees or self.initMaxNumTrees > self.maxNumTrees \
+                or self.initMaxNumTrees < self.initMinNumTrees:
+            state.output.fatal("The initial program length must lie within [minnumtrees, maxnumtrees]",
+                               base.push(self.P_INITMINNUMTREES))
+
+        self.effectiveInitial = params.getBoolean(
+            base.push(self.P_EFFECTIVE_INITIAL), def_param.push(self.P_EFFECTIVE_INITIAL), False)
+
+        self.instructionSet = LGPInstructionSet()
+        self.instructionSet.setup(state, LGPInstructionSet.defaultBase().push("0"))
+        self.instructionSet.numregisters = params.getIntWithDefault(
+            base.push(self.P_NUMREGISTERS), def_param.push(self.P_NUMREGISTERS), self.instructionSet.numregisters)
+        if self.instructionSet.numregisters > self.MAXREGISTERS:
+            state.output.fatal(f"An LGP individual has at most {self.MAXREGISTERS} registers", base.push(self.P_NUMREGISTERS))
+
+        # the problem, set up before the population, knows the number of input features
+        problem = getattr(getattr(state, "evaluator", None), "p_problem", None)
+        if hasattr(problem, "getNumInputs"):
+            self.instructionSet.setNumInputs(problem.getNumInputs())
+
+        numoutputs = params.getIntWithDefault(
+            base.push(self.P_NUMOUTPUTREGISTERS), def_param.push(self.P_NUMOUTPUTREGISTERS), 1)
+        outputs = []
+        for x in range(numoutputs):
+            reg = params.getIntWithDefault(base.push(self.P_OUTPUTREGISTER).push(str(x)),
+                                           def_param.push(self.P_OUTPUTREGISTER).push(str(x)), x)
+            if reg < 0 or reg >= self.instructionSet.numregisters:
+                state.output.fatal(f"Output register {reg} does not exist", base.push(self.P_OUTPUTREGISTER).push(str(x)))
+            outputs.append(reg)
+        self.setOutputRegisters(outputs)
+
+    def clone(self)->LGPIndividual:
+        '''the clone shares the arrays of this individual until one of them modifies its program'''
+        newind = copy.copy(self)
+        self.shared = newind.shared = True
+        if self.fitness is not None:
+            newind.fitness = self.fitness.clone()
+        return newind
+
+    def ownGenome(self):
+        '''copy-on-write: give this individual private copies of the arrays it may share with clones'''
+        if self.shared:
+            self._instructions = self._instructions.copy()
+            self.effective = self.effective.copy()
+            self.liveRegisters = self.liveRegisters.copy()
+            self.shared = False
+
+    def getGenome(self)->tuple:
+        '''the arrays defining the program (and its effectiveness), cheap to send to another process'''
+        self.shared = True
+        return (self._instructions, self.outputRegisters, self.effective, self.liveRegisters,
+                self.statusStale, self.statusValid)
+
+    def setGenome(self, genome:tuple):
+        '''the inverse of getGenome, the individual is then not evaluated'''
+        (self._instructions, self.outputRegisters, self.effective, self.liveRegisters,
+         self.statusStale, self.statusValid) = genome
+        self.shared = True
+        self.canonicalKey = None
+        self.structuralHash = None
+        self.evaluated = False
+
+    def rebuildIndividual(self, state:EvolutionState, thread:int):
+        '''replace the program with random instructions of a random initial length.
+        With effective_initial, every instruction is made effective by building
+        the program backward and writing only registers that are live there.'''
+        rng = LGPInstructionSet.getRandom(state, thread)
+        length = int(rng.integers(self.initMinNumTrees, self.initMaxNumTrees + 1))
+        instructions = self.instructionSet.randomInstructions(rng, length)
+
+        if self.effectiveInitial:
+            numregisters = self.instructionSet.numregisters
+            live = set(self.outputRegisters.tolist())
+            for i in range(length - 1, -1, -1):
+                dest = sorted(live)[int(rng.integers(len(live)))]
+                instructions[i, self.DEST] = dest
+                live.discard(dest)
+                live.update(r for r in instructions[i, self.SRC0:].tolist() if 0 <= r < numregisters)
+                if not live:
+                    # nothing before could be effective, so read the destination register again
+                    instructions[i, self.SRC0] = dest
+                    live.add(dest)
+
+        self.setInstructions(instructions)
+
+    # ----------------------------- the program -----------------------------
+
+    @property
+    def instructions(self)->np.ndarray:
+        '''the (length, NUMCOLUMNS) instruction matrix. Modifying it in place is allowed,
+        but the effectiveness is only updated by the edit methods (setInstruction, ...).'''
+        self.ownGenome()
+        self.structuralHash = None
+        return self._instructions
+
+    @instructions.setter
+    def instructions(self, instructions:np.ndarray):
+        self.setInstructions(instructions)
+
+    def getInstructions(self)->np.ndarray:
+        '''the instruction matrix for reading: it may be shared with clones and must not be modified'''
+        return self._instructions
+
+    def getTreesLength(self)->int:
+        return len(self._instructions)
+
+    def getOutputRegisters(self)->np.ndarray:
+        return self.outputRegisters
+
+    def setOutputRegisters(self, registers):
+        self.outputRegisters = np.asarray(registers, dtype=np.int32)
+        self.invalidateStatus()
+
+    def setInstructions(self, instructions:np.ndarray):
+        self._instructions = np.ascontiguousarray(instructions, dtype=np.int32).reshape(-1, self.NUMCOLUMNS)
+        self.effective = np.zeros(len(self._instructions), dtype=bool)
+        self.liveRegisters = np.zeros(len(self._instructions) + 1, dtype=np.uint64)
+        self.shared = False
+        self.statusStale = 0
+        self.statusValid = -1
+        self.structuralHash = None
+        self.invalidateStatus()
+
+    def setInstruction(self, index:int, instruction:np.ndarray):
+        self.ownGenome()
+        self.unhashRows(index, index + 1)
+        self._instructions[index] = instruction
+        self.hashRows(index, index + 1)
+        self.invalidateStatus(index)
+
+    def insertInstructions(self, index:int, instructions:np.ndarray):
+        '''insert the rows before position index'''
+        instructions = np.asarray(instructions, dtype=np.int32).reshape(-1, self.NUMCOLUMNS)
+        count = len(instructions)
+        self.unhashRows(index)
+        self._instructions = np.insert(self._instructions, index, instructions, axis=0)
+        self.hashRows(index)
+        self.effective = np.insert(self.effective, index, np.zeros(count, dtype=bool))
+        self.liveRegisters = np.insert(self.liveRegisters, index, np.zeros(count, dtype=np.uint64))
+        self.shared = False
+        if index < self.statusStale:
+            self.statusStale += count
+        self.statusValid = min(self.statusValid, index - 1)
+        self.invalidateStatus(index + count - 1)
+
+    def removeInstructions(self, index:int, count:int=1):
+        '''remove the rows [index, index + count)'''
+        span = np.arange(index, index + count)
+        self.unhashRows(index)
+        self._instructions = np.delete(self._instructions, span, axis=0)
+        self.hashRows(index)
+        self.effective = np.delete(self.effective, span)
+        self.liveRegisters = np.delete(self.liveRegisters, span)
+        self.shared = False
+        if index < self.statusStale:
+            self.statusStale -= min(count, self.statusStale - index)
+        self.statusValid = min(self.statusValid, index - 1)
+        self.invalidateStatus(index - 1)
+
+    def replaceInstructions(self, index:int, count:int, instructions:np.ndarray):
+        '''replace the rows [index, index + count) by instructions, which may have another length'''
+        instructions = np.asarray(instructions, dtype=np.int32).reshape(-1, self.NUMCOLUMNS)
+        new = len(instructions)
+        end = index + count
+        self.unhashRows(index)
+        self._instructions = np.concatenate((self._instructions[:index], instructions, self._instructions[end:]))
+        self.hashRows(index)
+        self.effective = np.concatenate((self.effective[:index], np.zeros(new, dtype=bool), self.effective[end:]))
+        self.liveRegisters = np.concatenate(
+            (self.liveRegisters[:index], np.zeros(new, dtype=np.uint64), self.liveRegisters[end:]))
+        self.shared = False
+        if self.statusStale >= end:
+            self.statusStale += new - count
+        elif self.statusStale > index:
+            self.statusStale = index + new
+        self.statusValid = min(self.statusValid, index - 1)
+        self.invalidateStatus(index + new - 1)
+
+    # ----------------------------- effective code -----------------------------
+
+    def invalidateStatus(self, position:int=None):
+        '''mark the status of the instructions [0, position] as stale (all of them by default)
+        and the individual as not evaluated. Without position, none of the stored
+        live sets is trusted (e.g. after writing self.instructions directly).'''
+        n = len(self._instructions)
+        if position is None or position >= n:
+            self.ownGenome()
+            self.liveRegisters[n] = self.registerMask(self.outputRegisters)
+            self.statusValid = min(self.statusValid, -1 if position is None else n - 1)
+            position = n - 1
+        else:
+            self.statusValid = min(self.statusValid, position)
+        self.statusStale = max(self.statusStale, position + 1)
+        self.canonicalKey = None
+        self.evaluated = False
+
+    @staticmethod
+    def registerMask(registers)->int:
+        mask = 0
+        for r in np.asarray(registers).tolist():
+            mask |= 1 << r
+        return mask
+
+    def updateStatus(self):
+        '''recompute the effectiveness of the stale prefix of the program, backward
+        from its end down to the first unchanged live set of the unedited code'''
+        stale = self.statusStale
+        if stale == 0:
+            return
+        self.ownGenome()
+        numregisters = self.instructionSet.numregisters
+        effective = self.effective
+        liveRegisters = self.liveRegisters
+        valid = self.statusValid
+        live = int(liveRegisters[stale])
+        rows = self._instructions[:stale].tolist()
+        for i in range(stale - 1, -1, -1):
+            _, dest, src0, src1 = rows[i]
+            if live >> dest & 1:
+                effective[i] = True
+                live &= ~(1 << dest)
+                if 0 <= src0 < numregisters:
+                    live |= 1 << src0
+                if 0 <= src1 < numregisters:
+                    live |= 1 << src1
+            else:
+                effective[i] = False
+            if i <= valid and live == liveRegisters[i]:
+                break
+            liveRegisters[i] = live
+        self.statusStale = 0
+        self.statusValid = len(self._instructions)
+
+    def getEffectiveMask(self)->np.ndarray:
+        self.updateStatus()
+        return self.effective
+
+    def getLiveRegisters(self, position:int)->int:
+        '''the bit set of the registers live before instruction position (position = length: the outputs)'''
+        self.updateStatus()
+        return int(self.liveRegisters[position])
+
+    def getEffectiveInstructions(self)->np.ndarray:
+        return self._instructions[self.getEffectiveMask()]
+
+    def getEffTreesLength(self)->int:
+        return int(np.count_nonzero(self.getEffectiveMask()))
+
+    def isEffective(self, index:int)->bool:
+        return bool(self.getEffectiveMask()[index])
+
+    def getCanonicalKey(self)->bytes:
+        '''a digest of the canonical effective program: introns are dropped and
+        the sources of commutative functions are sorted, so programs with the same
+        key compute the same outputs'''
+        if self.canonicalKey is None:
+            ins = self.getEffectiveInstructions().copy()
+            commutative = self.instructionSet.commutative[ins[:, self.OPCODE]]
+            sources = ins[commutative, self.SRC0:]
+            sources.sort(axis=1)
+            ins[commutative, self.SRC0:] = sources
+            digest = hashlib.blake2b(ins.tobytes(), digest_size=16)
+            digest.update(self.outputRegisters.tobytes())
+            self.canonicalKey = digest.digest()
+        return self.canonicalKey
+
+    @classmethod
+    def rowHashes(cls, rows:np.ndarray, start:int)->np.ndarray:
+        '''the structural hash terms of rows, the first of which is at position start'''
+        words = np.ascontiguousarray(rows, dtype=np.int32).view(np.uint64)
+        positions = np.arange(start + 1, start + 1 + len(words), dtype=np.uint64)
+        x = (words[:, 0] * cls._MIX1 ^ words[:, 1]) + positions * cls._GOLDEN
+        x = (x ^ (x >> np.uint64(30))) * cls._MIX1
+        x = (x ^ (x >> np.uint64(27))) * cls._MIX2
+        return x ^ (x >> np.uint64(31))
+
+    def hashOf(self, start:int, end:int=None)->int:
+        '''the sum of the structural hash terms of the instructions [start, end)'''
+        rows = self._instructions[start:end]
+        return int(self.rowHashes(rows, start).sum(dtype=np.uint64)) if len(rows) > 0 else 0
+
+    def unhashRows(self, start:int, end:int=None):
+        '''remove the instructions [start, end) from the structural hash, before they change'''
+        if self.structuralHash is not None:
+            self.structuralHash = (self.structuralHash - self.hashOf(start, end)) & self.HASHMASK
+
+    def hashRows(self, start:int, end:int=None):
+        '''add the instructions [start, end) to the structural hash, after they changed'''
+        if self.structuralHash is not None:
+            self.structuralHash = (self.structuralHash + self.hashOf(start, end)) & self.HASHMASK
+
+    def getStructuralKey(self)->bytes:
+        '''a key of the whole program, introns included, and of the output registers.
+        The hash of the instructions is computed once, then updated by the edits.'''
+        if self.structuralHash is None:
+            self.structuralHash = self.hashOf(0)
+        return self.structuralHash.to_bytes(8, "little") + self.outputRegisters.tobytes()
+
+    def __hash__(self)->int:
+        return hash(self.getStructuralKey())
+
+    def __eq__(self, other)->bool:
+        '''individuals are equal if they have the same program and output registers'''
+        if self is other:
+            return True
+        if not isinstance(other, LGPIndividual):
+            return NotImplemented
+        return self.getStructuralKey() == other.getStructuralKey() and \
+            np.array_equal(self._instructions, other._instructions) and \
+            np.array_equal(self.outputRegisters, other.outputRegisters)
+
+    # ----------------------------- the GPTree view -----------------------------
+
+    def getTree(self, index:int)->GPTree:
+        tree = self.instructionSet.toGPTree(self._instructions[index])
+        tree.owner = self
+        return tree
+
+    def getTrees(self)->List[GPTree]:
+        return [self.getTree(i) for i in range(len(self._instructions))]
+
+    def setTree(self, index:int, tree:GPTree):
+        self.setInstruction(index, self.instructionSet.fromGPTree(tree))
+
+    def addTree(self, index:int, tree:GPTree):
+        self.insertInstructions(index, self.instructionSet.fromGPTree(tree))
+
+    def removeTree(self, index:int):
+        self.removeInstructions(index)
+
+    def setTrees(self, trees:List[GPTree]):
+        self.setInstructions(np.array([self.instructionSet.fromGPTree(t) for t in trees], dtype=np.int32))
+
+    def __str__(self)->str:
+        # non-effective instructions are printed as comments
+        effective = self.getEffectiveMask()
+        return "\n".join(f"{'' if effective[i] else '//'}Ins {i}:\t{self.instructionSet.instructionToString(row)}"
+                         for i, row in enumerate(self._instructions))
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.util.ClassRegistry import ClassRegistry
+from ec.GPDefaults import GPDefaults
+
+from lgp.individual.GPTree import GPTree
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+from lgp.individual.primitive.Add import Add
+from lgp.individual.primitive.Sub import Sub
+from lgp.individual.primitive.Mul import Mul
+from lgp.individual.primitive.Div import Div
+from lgp.individual.primitive.Sin import Sin
+from lgp.individual.primitive.Exp import Exp
+from lgp.individual.primitive.ReadRegisterGPNode import ReadRegisterGPNode
+from lgp.individual.primitive.WriteRegisterGPNode import WriteRegisterGPNode
+from lgp.individual.primitive.InputFeatureGPNode import InputFeatureGPNode
+from lgp.individual.primitive.ConstantGPNode import ConstantGPNode
+
+class LGPInstructionSet:
+    '''
+    The opcode table of the linear genome.
+
+    An LGP instruction is stored as one row of four integers
+    [opcode, destination, source0, source1]. The opcode indexes self.functions.
+    The destination is a register. The sources share one operand address space:
+
+        [0, numregisters)                         registers
+        [inputStart, inputStart + numinputs)      input features
+        [constantStart, constantStart + #pool)    constants of the constant pool
+
+    Unused sources (e.g., the second source of Sin) are NOOPERAND.
+
+    The instruction set is set up from the GP function set (gp.fs.0) of the
+    parameter file, and it is shared by all the individuals of a run.
+    '''
+
+    P_FUNCTIONSET: str = "fs"
+    P_SIZE: str = "size"
+    P_FUNC: str = "func"
+    P_PROBCONSTANT: str = "prob_constant"
+
+    NOOPERAND: int = -1
+
+    # the primitives known by the linear genome, keyed by their class name
+    FUNCTIONS: Dict[str, type] = {c.__name__: c for c in (Add, Sub, Mul, Div, Sin, Exp)}
+
+    def __init__(self):
+        self.functions: List[type] = []
+        self.arity = np.zeros(0, dtype=np.int32)
+        self.commutative = np.zeros(0, dtype=bool)
+
+        self.numregisters: int = 8
+        self.numinputs: int = 0
+        self.constants = np.zeros(0)
+
+        # the probability of using a non-register terminal (input or constant) as a source
+        self.probConstant: float = 0.5
+
+    @classmethod
+    def defaultBase(cls) -> Parameter:
+        return GPDefaults.base().push(cls.P_FUNCTIONSET)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        def_param = self.defaultBase()
+
+        size = state.parameters.getInt(base.push(self.P_SIZE), def_param.push(self.P_SIZE))
+        functions = []
+        for x in range(size):
+            p = base.push(self.P_FUNC).push(str(x))
+            classname = state.parameters.getString(p, def_param.push(self.P_FUNC).push(str(x)))
+            name = classname.split(".")[-1]
+            try:
+                primitive = ClassRegistry.resolve(classname)
+            except ImportError:
+                primitive = self.FUNCTIONS.get(name)
+
+            if primitive is not None and issubclass(primitive, FunctionGPNode):
+                functions.append(primitive)
+            elif name == WriteRegisterGPNode.__name__:
+                self.numregisters = state.parameters.getIntWithDefault(
+                    p.push(WriteRegisterGPNode.P_NUMREGISTERS), None, self.numregisters)
+            elif name == ReadRegisterGPNode.__name__ or name.startswith("InputFeature"):
+                # registers are always readable, inputs are announced by the problem (setNumInputs)
+                pass
+            elif name == ConstantGPNode.__name__:
+                low = state.parameters.getDoubleWithDefault(p.push(ConstantGPNode.P_LOWBOUND), None, 0.0)
+                up = state.parameters.getDoubleWithDefault(p.push(ConstantGPNode.P_UPBOUND), None, 1.0)
+                step = state.parameters.getDoubleWithDefault(p.push(ConstantGPNode.P_STEP), None, 0.1)
+                if step <= 0.0 or up < low:
+                    state.output.fatal("The constant pool needs step > 0 and upbound >= lowbound", p)
+                self.constants = np.arange(low, up + step / 2.0, step)
+            else:
+                state.output.warning(f"The primitive {classname} is not supported by the linear genome and is ignored", p)
+
+        if len(functions) == 0:
+            state.output.fatal("The LGP function set has no function", base.push(self.P_FUNC))
+        self.setFunctions(functions)
+
+        self.probConstant = state.parameters.getDoubleWithDefault(
+            GPDefaults.base().push("koza").push("half").push(self.P_PROBCONSTANT), None, self.probConstant)
+
+    def setFunctions(self, functions:List[type]):
+        self.functions = list(functions)
+        self.arity = np.array([f().expectedChildren for f in self.functions], dtype=np.int32)
+        self.commutative = np.array([f.COMMUTATIVE for f in self.functions], dtype=bool)
+
+    def setNumInputs(self, numinputs:int):
+        '''called by the problem once it knows the number of input features'''
+        self.numinputs = numinputs
+
+    @property
+    def inputStart(self)->int:
+        return self.numregisters
+
+    @property
+    def constantStart(self)->int:
+        return self.numregisters + self.numinputs
+
+    @property
+    def numOperands(self)->int:
+        return self.numregisters + self.numinputs + len(self.constants)
+
+    def numFunctions(self)->int:
+        return len(self.functions)
+
+    @staticmethod
+    def getRandom(state:EvolutionState, thread:int)->np.random.Generator:
+        '''a NumPy generator seeded from the random stream of the thread, so
+        vectorized variation is still reproducible for a given seed'''
+        return np.random.default_rng(state.random[thread].getrandbits(64))
+
+    # ----------------------------- random instructions -----------------------------
+
+    def randomOperands(self, rng:np.random.Generator, n:int)->np.ndarray:
+        registers = rng.integers(0, self.numregisters, size=n)
+        numterminals = self.numinputs + len(self.constants)
+        if numterminals == 0:
+            return registers.astype(np.int32)
+        terminals = self.inputStart + rng.integers(0, numterminals, size=n)
+        return np.where(rng.random(n) < self.probConstant, terminals, registers).astype(np.int32)
+
+    def randomInstructions(self, rng:np.random.Generator, n:int)->np.ndarray:
+        ins = np.empty((n, 4), dtype=np.int32)
+        ins[:, 0] = rng.integers(0, len(self.functions), size=n)
+        ins[:, 1] = rng.integers(0, self.numregisters, size=n)
+        ins[:, 2] = self.randomOperands(rng, n)
+        ins[:, 3] = np.where(self.arity[ins[:, 0]] > 1, self.randomOperands(rng, n), self.NOOPERAND)
+        return ins
+
+    # ----------------------------- GPTree conversion -----------------------------
+
+    def operandToGPNode(self, operand:int):
+        if operand < self.inputStart:
+            return ReadRegisterGPNode(operand)
+        if operand < self.constantStart:
+            return InputFeatureGPNode(operand - self.inputStart)
+        index = operand - self.constantStart
+        return ConstantGPNode(index, float(self.constants[index]))
+
+    def GPNodeToOperand(self, node)->int:
+        if isinstance(node, ReadRegisterGPNode):
+            return node.index
+        if isinstance(node, InputFeatureGPNode):
+            return self.inputStart + node.index
+        if isinstance(node, ConstantGPNode):
+            return self.constantStart + node.index
+        raise ValueError(f"{node} is not a terminal of the linear genome")
+
+    def toGPTree(self, instruction:np.ndarray)->GPTree:
+        '''build the WriteRegister -> function -> terminals tree of one instruction'''
+        opcode, dest, src0, src1 = (int(v) for v in instruction)
+        func:FunctionGPNode = self.functions[opcode]()
+        for x, operand in enumerate((src0, src1)[:len(func.children)]):
+            child = self.operandToGPNode(operand)
+            child.parent = func
+            child.argposition = x
+            func.children[x] = child
+
+        root = WriteRegisterGPNode(dest)
+        root.children[0] = func
+        func.parent = root
+        func.argposition = 0
+
+        tree = GPTree()
+        tree.child = root
+        root.parent = tree
+        root.argposition = 0
+        return tree
+
+    def fromGPTree(self, tree:GPTree)->np.ndarray:
+        '''the inverse of toGPTree'''
+        root = tree.child
+        if not isinstance(root, WriteRegisterGPNode) or not isinstance(root.children[0], FunctionGPNode):
+            raise ValueError(f"{tree} is not a linear instruction")
+        func = root.children[0]
+        opcode = self.functions.index(type(func))
+        sources = [self.GPNodeToOperand(child) for child in func.children]
+        sources += [self.NOOPERAND] * (2 - len(sources))
+        return np.array([opcode, root.index, sources[0], sources[1]], dtype=np.int32)
+
+    def instructionToString(self, instruction:np.ndarray)->str:
+        return str(self.toGPTree(instruction))
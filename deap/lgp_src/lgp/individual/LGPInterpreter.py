@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.LGPCompiler import LGPCompiler
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+class LGPInterpreter:
+    '''
+    A register machine that executes a linear program over all the fitness
+    cases at once.
+
+    The registers are one (numregisters, n_cases) array and the inputs are a
+    (numinputs, n_cases) array, so every instruction is a single whole-column
+    NumPy operation written in place into its destination register. Constants
+    are passed to the functions as Python floats and broadcast by NumPy.
+
+    An interpreter also provides the "registers" and "inputs" expected by the
+    eval() of the register and input primitives, so it can stand in for the
+    problem when a GPTree is evaluated.
+
+    With a compiler (LGPCompiler), every program is compiled once into a
+    straight-line function, which then runs on the same registers and
+    inputs instead of the instruction loop.
+
+    nodeEvaluations counts the executed instructions times the fitness cases
+    (one addition per executed program), the measure of the nodeevaluations
+    budget of a run.
+    '''
+
+    def __init__(self, instructionSet:LGPInstructionSet, inputs:np.ndarray, compiler:LGPCompiler=None):
+        self.instructionSet = instructionSet
+        self.functions = [f.execute for f in instructionSet.functions]
+        self.compiler = compiler
+        self.nodeEvaluations:int = 0
+        self.setInputs(inputs)
+
+    def setInputs(self, inputs:np.ndarray):
+        '''inputs is a (numinputs, n_cases) array, one row per input feature. A contiguous
+        float64 version of it is kept in self.inputs, and inputs itself in sourceInputs.'''
+        iset = self.instructionSet
+        self.sourceInputs = inputs
+        self.inputs = np.ascontiguousarray(inputs, dtype=np.float64)
+        if self.inputs.shape[0] != iset.numinputs:
+            raise ValueError(f"Expected {iset.numinputs} input features, got {self.inputs.shape[0]}")
+        self.registers = np.zeros((iset.numregisters, self.inputs.shape[1]))
+
+        # operand address -> value, following the operand encoding of LGPInstructionSet
+        self.operands = list(self.registers) + list(self.inputs) + [float(c) for c in iset.constants]
+
+    @property
+    def numCases(self)->int:
+        return self.registers.shape[1]
+
+    def resetRegisters(self):
+        self.registers.fill(0.0)
+
+    def execute(self, instructions:np.ndarray)->np.ndarray:
+        '''run the instructions on freshly reset registers and return the register matrix.
+        The returned array is reused by the next execution.'''
+        self.resetRegisters()
+        self.nodeEvaluations += len(instructions) * self.registers.shape[1]
+        if self.compiler is not None:
+            program = self.compiler.compile(instructions)
+            with np.errstate(all="ignore"):
+                program(self.registers, self.inputs)
+            return self.registers
+        functions = self.functions
+        operands = self.operands
+        noop = LGPInstructionSet.NOOPERAND
+        with np.errstate(all="ignore"):
+            for op, dest, src0, src1 in instructions.tolist():
+                if src1 == noop:
+                    functions[op](operands[dest], operands[src0])
+                else:
+                    functions[op](operands[dest], operands[src0], operands[src1])
+        return self.registers
+
+    def executeIndividual(self, ind:LGPIndividual)->np.ndarray:
+        '''the (num output registers, n_cases) outputs of the individual.
+        Only the effective instructions are executed, introns cannot change the outputs.'''
+        return self.execute(ind.getEffectiveInstructions())[ind.getOutputRegisters()]
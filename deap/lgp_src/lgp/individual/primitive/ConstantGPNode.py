@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from lgp.individual.GPNode import GPNode
+
+class ConstantGPNode(GPNode):
+    '''
+    a terminal holding a constant. Constants are taken from the discrete pool
+    [lowbound, upbound] with the given step, so "index" is the position of
+    the value in that pool.
+    '''
+
+    P_LOWBOUND: str = "lowbound"
+    P_UPBOUND: str = "upbound"
+    P_STEP: str = "step"
+
+    def __init__(self, index:int=0, value:float=0.0):
+        super().__init__()
+        self.index = index
+        self.value = value
+
+    @property
+    def expectedChildren(self)->int:
+        return 0
+
+    def nodeEquivalentTo(self, node: GPNode) -> bool:
+        return super().nodeEquivalentTo(node) and self.index == node.index
+
+    def __str__(self)->str:
+        return f"{self.value:g}"
+
+    def eval(self, state: EvolutionState, thread: int, input: GPData,
+             individual: GPIndividual, problem: Problem):
+        input.x = self.value
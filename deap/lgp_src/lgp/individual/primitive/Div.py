@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+class Div(FunctionGPNode):
+    '''protected division: returns 1.0 where the divisor is (nearly) zero'''
+
+    EPSILON: float = 1e-6
+
+    @property
+    def expectedChildren(self)->int:
+        return 2
+
+    @staticmethod
+    def execute(out:np.ndarray, a:np.ndarray, b:np.ndarray)->np.ndarray:
+        # the mask must be taken before out is written, since out may be b
+        protect = np.abs(b) < Div.EPSILON
+        np.divide(a, b, out=out, where=~protect)
+        out[protect] = 1.0
+        return out
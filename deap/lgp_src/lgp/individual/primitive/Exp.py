@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+class Exp(FunctionGPNode):
+    '''protected exponential: the argument is capped at MAXEXPONENT to avoid overflow'''
+
+    MAXEXPONENT: float = 100.0
+
+    @property
+    def expectedChildren(self)->int:
+        return 1
+
+    @staticmethod
+    def execute(out:np.ndarray, a:np.ndarray)->np.ndarray:
+        np.minimum(a, Exp.MAXEXPONENT, out=out)
+        return np.exp(out, out=out)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+
+import numpy as np
+
+from lgp.individual.GPNode import GPNode
+
+class FunctionGPNode(GPNode):
+    '''
+    A function of an LGP instruction, e.g., Add or Sin. Every function defines
+    its semantics once in execute(), which works on whole columns of fitness
+    cases. Both the tree evaluation (eval) and the linear interpreter call it,
+    so the two representations of an instruction always compute the same values.
+    '''
+
+    # f(a, b) == f(b, a), used to canonicalize programs
+    COMMUTATIVE: bool = False
+
+    def __init__(self):
+        super().__init__()
+        self.children = [None] * self.expectedChildren
+
+    @staticmethod
+    @abstractmethod
+    def execute(out:np.ndarray, *args:np.ndarray)->np.ndarray:
+        '''write the function value of the arguments into out and return out.
+        out may be one of the arguments.'''
+        pass
+
+    def __str__(self)->str:
+        return self.__class__.__name__
+
+    def eval(self, state: EvolutionState, thread: int, input: GPData,
+             individual: GPIndividual, problem: Problem):
+        args = []
+        for child in self.children:
+            child.eval(state, thread, input, individual, problem)
+            args.append(input.x)
+        out = np.empty(np.broadcast(*args).shape)
+        input.x = self.execute(out, *args)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from lgp.individual.GPNode import GPNode
+
+class InputFeatureGPNode(GPNode):
+    '''a terminal reading the input feature "index" of the fitness cases'''
+
+    def __init__(self, index:int=0):
+        super().__init__()
+        self.index = index
+
+    @property
+    def expectedChildren(self)->int:
+        return 0
+
+    def nodeEquivalentTo(self, node: GPNode) -> bool:
+        return super().nodeEquivalentTo(node) and self.index == node.index
+
+    def __str__(self)->str:
+        return f"In{self.index}"
+
+    def eval(self, state: EvolutionState, thread: int, input: GPData,
+             individual: GPIndividual, problem: Problem):
+        input.x = problem.inputs[self.index]
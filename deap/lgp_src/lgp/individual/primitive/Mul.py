@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+class Mul(FunctionGPNode):
+    '''Multiplication of two arguments'''
+
+    COMMUTATIVE: bool = True
+
+    @property
+    def expectedChildren(self)->int:
+        return 2
+
+    @staticmethod
+    def execute(out:np.ndarray, a:np.ndarray, b:np.ndarray)->np.ndarray:
+        return np.multiply(a, b, out=out)
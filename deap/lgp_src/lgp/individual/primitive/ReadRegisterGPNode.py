@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from lgp.individual.GPNode import GPNode
+
+class ReadRegisterGPNode(GPNode):
+    '''a terminal reading the value of register "index"'''
+
+    P_NUMREGISTERS: str = "numregisters"
+
+    def __init__(self, index:int=0):
+        super().__init__()
+        self.index = index
+
+    @property
+    def expectedChildren(self)->int:
+        return 0
+
+    def getIndex(self)->int:
+        return self.index
+
+    def nodeEquivalentTo(self, node: GPNode) -> bool:
+        return super().nodeEquivalentTo(node) and self.index == node.index
+
+    def __str__(self)->str:
+        return f"R{self.index}"
+
+    def eval(self, state: EvolutionState, thread: int, input: GPData,
+             individual: GPIndividual, problem: Problem):
+        input.x = problem.registers[self.index]
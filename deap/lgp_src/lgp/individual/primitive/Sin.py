@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+class Sin(FunctionGPNode):
+    '''sine of one argument'''
+
+    @property
+    def expectedChildren(self)->int:
+        return 1
+
+    @staticmethod
+    def execute(out:np.ndarray, a:np.ndarray)->np.ndarray:
+        return np.sin(a, out=out)
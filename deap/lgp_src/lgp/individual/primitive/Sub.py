@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import numpy as np
+
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+class Sub(FunctionGPNode):
+    '''Subtraction of two arguments'''
+
+    @property
+    def expectedChildren(self)->int:
+        return 2
+
+    @staticmethod
+    def execute(out:np.ndarray, a:np.ndarray, b:np.ndarray)->np.ndarray:
+        return np.subtract(a, b, out=out)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from lgp.individual.GPNode import GPNode
+
+class WriteRegisterGPNode(GPNode):
+    '''the root of every LGP instruction: writes the value of its only child into register "index"'''
+
+    P_NUMREGISTERS: str = "numregisters"
+
+    def __init__(self, index:int=0):
+        super().__init__()
+        self.index = index
+        self.children = [None]
+
+    @property
+    def expectedChildren(self)->int:
+        return 1
+
+    def getIndex(self)->int:
+        return self.index
+
+    def nodeEquivalentTo(self, node: GPNode) -> bool:
+        return super().nodeEquivalentTo(node) and self.index == node.index
+
+    def __str__(self)->str:
+        return f"R{self.index}="
+
+    def eval(self, state: EvolutionState, thread: int, input: GPData,
+             individual: GPIndividual, problem: Problem):
+        self.children[0].eval(state, thread, input, individual, problem)
+        problem.registers[self.index] = input.x
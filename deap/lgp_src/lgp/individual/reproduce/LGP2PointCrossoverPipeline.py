@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.reproduce.LGPBreedingPipeline import LGPBreedingPipeline
+
+class LGP2PointCrossoverPipeline(LGPBreedingPipeline):
+    '''
+    Brameier and Banzhaf's linear (two-point) crossover: a segment of each
+    parent is exchanged with a segment of the other one.
+
+    The first crossover point i1 is uniform in the first parent (among the
+    effective instructions with effective = true), and the second one lies
+    within maxdistancecrosspoint of it in the second parent. The segments
+    hold at most maxseglength instructions and their lengths differ by at
+    most maxlendiffseg. When an exchange would make an offspring leave
+    [minnumtrees, maxnumtrees], the segments are given the same length.
+
+    Offspring come in pairs, both children of a crossover are kept (the
+    last second child is dropped if an odd number is requested).
+    '''
+
+    P_CROSSOVER: str = "2pcross"
+    P_MAXSEGMENTLENGTH: str = "maxseglength"
+    P_MAXLENGTHDIFFSEGMENT: str = "maxlendiffseg"
+    P_MAXDISTANCECROSSPOINT: str = "maxdistancecrosspoint"
+    P_EFFECTIVE: str = "effective"
+
+    NUM_SOURCES: int = 2
+
+    def __init__(self):
+        super().__init__()
+        self.maxSegmentLength:int = 60
+        self.maxLengthDiffSegment:int = 10
+        self.maxDistanceCrossPoint:int = 60
+        self.effective:bool = False
+
+    def defaultBase(self)->Parameter:
+        return self.kozaBase("xover")
+
+    def operatorBase(self)->Parameter:
+        return self.lgpBase(self.P_CROSSOVER)
+
+    def numSources(self)->int:
+        return self.NUM_SOURCES
+
+    def typicalIndsProduced(self)->int:
+        return 2
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.maxSegmentLength = self.getOperatorInt(state, base, self.P_MAXSEGMENTLENGTH, 60, 1)
+        self.maxLengthDiffSegment = self.getOperatorInt(state, base, self.P_MAXLENGTHDIFFSEGMENT, 10, 0)
+        self.maxDistanceCrossPoint = self.getOperatorInt(state, base, self.P_MAXDISTANCECROSSPOINT, 60, 0)
+        self.effective = self.getOperatorBoolean(state, base, self.P_EFFECTIVE, False)
+
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        n = self.typicalIndsProduced()
+        if n < min:
+            n = min
+        if n > max:
+            n = max
+
+        pairs = (n + 1) // 2
+        first = self.selectParents(self.sources[0], pairs, subpopulation, state, thread)
+        second = self.selectParents(self.sources[1], pairs, subpopulation, state, thread)
+        children = [ind for pair in zip(first, second) for ind in pair]
+
+        if self.likelihood < 1.0:
+            rng = state.random[thread]
+            crossed = [ind for x in range(pairs) if rng.random() < self.likelihood
+                       for ind in children[2 * x:2 * x + 2]]
+        else:
+            crossed = children
+        self.vary(state, thread, crossed)
+
+        inds[start:start + n] = children[:n]
+        return n
+
+    def varyBatch(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        '''cross inds[0] with inds[1], inds[2] with inds[3], ...'''
+        rng = self.getRandom(state, thread)
+        pairs = len(inds) // 2
+        uniform = rng.random((pairs, 3))
+        first = self.pickPositions(rng, inds[0::2], self.effective)
+
+        for x in range(pairs):
+            a, b = inds[2 * x], inds[2 * x + 1]
+            la, lb = a.getTreesLength(), b.getTreesLength()
+            i1 = int(first[x])
+
+            # the second crossover point, within maxdistancecrosspoint of the first one
+            low = max(0, i1 - self.maxDistanceCrossPoint)
+            high = min(lb - 1, i1 + self.maxDistanceCrossPoint)
+            if low > high:
+                low = high = lb - 1
+            if self.effective:
+                candidates = np.flatnonzero(b.getEffectiveMask()[low:high + 1])
+                i2 = low + int(candidates[int(uniform[x, 0] * len(candidates))]) if len(candidates) > 0 \
+                    else low + int(uniform[x, 0] * (high - low + 1))
+            else:
+                i2 = low + int(uniform[x, 0] * (high - low + 1))
+
+            # the segment lengths
+            sa = 1 + int(uniform[x, 1] * min(self.maxSegmentLength, la - i1))
+            sa = min(sa, lb - i2 + self.maxLengthDiffSegment)
+            low = max(1, sa - self.maxLengthDiffSegment)
+            high = min(self.maxSegmentLength, lb - i2, sa + self.maxLengthDiffSegment)
+            sb = low + int(uniform[x, 2] * (high - low + 1))
+
+            if not (a.minNumTrees <= la - sa + sb <= a.maxNumTrees and b.minNumTrees <= lb - sb + sa <= b.maxNumTrees):
+                if sa <= lb - i2:
+                    sb = sa
+                else:
+                    sa = sb
+
+            segmenta = a.getInstructions()[i1:i1 + sa].copy()
+            segmentb = b.getInstructions()[i2:i2 + sb].copy()
+            if np.array_equal(segmenta, segmentb):
+                continue
+            a.replaceInstructions(i1, sa, segmentb)
+            b.replaceInstructions(i2, sb, segmenta)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.BreedingPipeline import BreedingPipeline
+from ec.GPDefaults import GPDefaults
+from ec.SelectionMethod import SelectionMethod
+from lgp.LGPDefaults import LGPDefaults
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+class LGPBreedingPipeline(BreedingPipeline):
+    '''
+    The base of the LGP variation pipelines, which work directly on the
+    instruction matrices of LGPIndividuals.
+
+    A pipeline varies a whole batch of offspring in one call (varyBatch): the
+    random choices of all the offspring are drawn as arrays from one NumPy
+    generator seeded from state.random[thread], and the offspring are then
+    edited through the LGPIndividual edit methods, which keep the effective
+    code cache up to date. produce() selects the parents of all the requested
+    offspring, clones them (copy-on-write, see LGPIndividual.clone) and varies
+    them together.
+
+    The sources of a pipeline are set up from its base or, by default, from
+    the Koza operator base of ECJ (e.g. gp.koza.mutate.source.0), while the
+    operator parameters are read from its base or from operatorBase()
+    (e.g. lgp.micromut.step).
+
+    micro_base is the parameter base of another LGP pipeline (usually a micro
+    mutation) applied to every offspring after this one, or null.
+    '''
+
+    P_MICROBASE: str = "micro_base"
+    V_NULL: str = "null"
+
+    P_KOZA: str = "koza"
+
+    def __init__(self):
+        super().__init__()
+        self.microMutation:LGPBreedingPipeline = None
+
+    @abstractmethod
+    def operatorBase(self)->Parameter:
+        '''the default base of the operator parameters, under lgp'''
+        pass
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        def_ = self.operatorBase()
+        microbase = state.parameters.getParamValue(base.push(self.P_MICROBASE), def_.push(self.P_MICROBASE))
+        self.microMutation = None
+        if microbase is not None and microbase != self.V_NULL:
+            p = Parameter(microbase)
+            self.microMutation = state.parameters.getInstanceForParameter(p, None, LGPBreedingPipeline)
+            self.microMutation.setup(state, p)
+
+    def clone(self):
+        c = super().clone()
+        if self.microMutation is not None:
+            c.microMutation = self.microMutation.clone()
+        return c
+
+    def numSources(self)->int:
+        return 1
+
+    # ----------------------------- parameters -----------------------------
+
+    def getOperatorInt(self, state:EvolutionState, base:Parameter, name:str, default:int, minValue:int=0)->int:
+        value = state.parameters.getIntWithDefault(base.push(name), self.operatorBase().push(name), default)
+        if value < minValue:
+            state.output.fatal(f"{name} must be >= {minValue}", base.push(name), self.operatorBase().push(name))
+        return value
+
+    def getOperatorProbability(self, state:EvolutionState, base:Parameter, name:str, default:float)->float:
+        value = state.parameters.getDoubleWithDefault(base.push(name), self.operatorBase().push(name), default)
+        if value < 0.0 or value > 1.0:
+            state.output.fatal(f"{name} must be between 0.0 and 1.0", base.push(name), self.operatorBase().push(name))
+        return value
+
+    def getOperatorBoolean(self, state:EvolutionState, base:Parameter, name:str, default:bool)->bool:
+        return state.parameters.getBoolean(base.push(name), self.operatorBase().push(name), default)
+
+    # ----------------------------- breeding -----------------------------
+
+    @abstractmethod
+    def varyBatch(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        '''vary the individuals, which are offspring owned by the caller, in place'''
+        pass
+
+    def vary(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        '''varyBatch followed by the micro mutation, if any'''
+        if len(inds) == 0:
+            return
+        self.varyBatch(state, thread, inds)
+        if self.microMutation is not None:
+            self.microMutation.vary(state, thread, inds)
+
+    def selectLikely(self, state:EvolutionState, thread:int, inds:List)->List:
+        '''the individuals to vary, each one with probability likelihood (the others are just copies)'''
+        if self.likelihood >= 1.0:
+            return inds
+        rng = state.random[thread]
+        return [ind for ind in inds if rng.random() < self.likelihood]
+
+    def produce(self, min:int, max:int, start:int, subpopulation:int,
+                inds:List, state:EvolutionState, thread:int)->int:
+        n = self.reproduce(min, start, subpopulation, inds, state, thread, True)
+        self.vary(state, thread, self.selectLikely(state, thread, inds[start:start + n]))
+        return n
+
+    def selectParents(self, source, n:int, subpopulation:int, state:EvolutionState, thread:int)->List:
+        '''n parents produced by source, cloned if they are members of the population'''
+        parents = [None] * n
+        produced = 0
+        while produced < n:
+            produced += source.produce(n - produced, n - produced, produced, subpopulation, parents, state, thread)
+        if isinstance(source, SelectionMethod):
+            parents = [ind.clone() for ind in parents]
+        return parents
+
+    # ----------------------------- helpers -----------------------------
+
+    @staticmethod
+    def getRandom(state:EvolutionState, thread:int)->np.random.Generator:
+        return LGPInstructionSet.getRandom(state, thread)
+
+    @staticmethod
+    def pickPositions(rng:np.random.Generator, inds:List[LGPIndividual], effective:bool)->np.ndarray:
+        '''a random instruction of every individual; an effective one if effective is set and there is one'''
+        uniform = rng.random(len(inds))
+        positions = np.empty(len(inds), dtype=np.int64)
+        for i, ind in enumerate(inds):
+            if effective:
+                candidates = np.flatnonzero(ind.getEffectiveMask())
+                if len(candidates) > 0:
+                    positions[i] = candidates[int(uniform[i] * len(candidates))]
+                    continue
+            positions[i] = int(uniform[i] * ind.getTreesLength())
+        return positions
+
+    @staticmethod
+    def pickRegisters(rng:np.random.Generator, masks:np.ndarray, numregisters:int)->np.ndarray:
+        '''a random register of every register bit set of masks, -1 for the empty sets'''
+        bits = (masks.astype(np.uint64)[:, None] >> np.arange(numregisters, dtype=np.uint64)) & np.uint64(1)
+        weights = np.where(bits.astype(bool), rng.random(bits.shape) + 1.0, 0.0)
+        return np.where(weights.max(axis=1) > 0.0, weights.argmax(axis=1), -1)
+
+    @staticmethod
+    def fixArity(iset:LGPInstructionSet, rng:np.random.Generator, rows:np.ndarray):
+        '''give binary functions a second source and unary functions none'''
+        arity = iset.arity[rows[:, LGPIndividual.OPCODE]]
+        missing = (arity > 1) & (rows[:, LGPIndividual.SRC1] == LGPInstructionSet.NOOPERAND)
+        rows[missing, LGPIndividual.SRC1] = iset.randomOperands(rng, int(missing.sum()))
+        rows[arity < 2, LGPIndividual.SRC1] = LGPInstructionSet.NOOPERAND
+
+    @classmethod
+    def kozaBase(cls, operator:str)->Parameter:
+        return GPDefaults.base().push(cls.P_KOZA).push(operator)
+
+    @classmethod
+    def lgpBase(cls, operator:str)->Parameter:
+        return LGPDefaults.base().push(operator)
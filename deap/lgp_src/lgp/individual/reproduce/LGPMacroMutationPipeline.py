@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.reproduce.LGPBreedingPipeline import LGPBreedingPipeline
+
+class LGPMacroMutationPipeline(LGPBreedingPipeline):
+    '''
+    Macro mutation: step times, every offspring gets a random instruction
+    inserted (with probability prob_insert) or one of its instructions
+    deleted (prob_delete), within [minnumtrees, maxnumtrees].
+
+    type = freemut inserts and deletes anywhere. type = effmut (Brameier and
+    Banzhaf's effective mutation) makes the inserted instruction write a
+    register which is read afterwards, so it is effective, and deletes
+    effective instructions only (introns would not change the program's
+    behaviour).
+    '''
+
+    P_MACROMUTATION: str = "macromut"
+    P_TYPE: str = "type"
+    P_STEP: str = "step"
+    P_PROBINSERT: str = "prob_insert"
+    P_PROBDELETE: str = "prob_delete"
+
+    V_FREEMUT: str = "freemut"
+    V_EFFMUT: str = "effmut"
+    # insertion-bias variants of the Java implementation, run as effmut
+    V_EFFMUT_VARIANTS = ("effmut2", "effmut3")
+
+    def __init__(self):
+        super().__init__()
+        self.effective:bool = True
+        self.step:int = 1
+        self.probInsert:float = 0.5
+
+    def defaultBase(self)->Parameter:
+        return self.kozaBase("mutate")
+
+    def operatorBase(self)->Parameter:
+        return self.lgpBase(self.P_MACROMUTATION)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        type_ = state.parameters.getStringWithDefault(base.push(self.P_TYPE), self.operatorBase().push(self.P_TYPE),
+                                                      self.V_EFFMUT)
+        if type_ in self.V_EFFMUT_VARIANTS:
+            state.output.warning(f"The macro mutation {type_} is run as {self.V_EFFMUT}", base.push(self.P_TYPE))
+        elif type_ not in (self.V_FREEMUT, self.V_EFFMUT):
+            state.output.fatal(f"Unknown macro mutation type {type_}", base.push(self.P_TYPE))
+        self.effective = type_ != self.V_FREEMUT
+        self.step = self.getOperatorInt(state, base, self.P_STEP, 1, 1)
+
+        insert = self.getOperatorProbability(state, base, self.P_PROBINSERT, 0.5)
+        delete = self.getOperatorProbability(state, base, self.P_PROBDELETE, 0.5)
+        if insert + delete <= 0.0:
+            state.output.fatal("prob_insert and prob_delete sum to 0", base.push(self.P_PROBINSERT))
+        self.probInsert = insert / (insert + delete)
+
+    def varyBatch(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        rng = self.getRandom(state, thread)
+        iset = inds[0].instructionSet
+        n = len(inds)
+        for _ in range(self.step):
+            lengths = np.array([ind.getTreesLength() for ind in inds])
+            caninsert = lengths < np.array([ind.maxNumTrees for ind in inds])
+            candelete = lengths > np.array([ind.minNumTrees for ind in inds])
+            insert = np.where(caninsert & candelete, rng.random(n) < self.probInsert, caninsert)
+            delete = ~insert & candelete
+
+            # insertions: a random instruction at a random position in [0, length]
+            rows = iset.randomInstructions(rng, n)
+            at = (rng.random(n) * (lengths + 1)).astype(np.int64)
+            if self.effective:
+                masks = np.array([ind.getLiveRegisters(p) for ind, p in zip(inds, at.tolist())], dtype=np.uint64)
+                live = self.pickRegisters(rng, masks, iset.numregisters)
+                rows[:, LGPIndividual.DEST] = np.where(live >= 0, live, rows[:, LGPIndividual.DEST])
+
+            # deletions: a random (effective) instruction
+            victims = self.pickPositions(rng, inds, self.effective)
+
+            for i in np.flatnonzero(insert).tolist():
+                inds[i].insertInstructions(int(at[i]), rows[i])
+            for i in np.flatnonzero(delete).tolist():
+                inds[i].removeInstructions(int(victims[i]))
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.reproduce.LGPBreedingPipeline import LGPBreedingPipeline
+
+class LGPMicroMutationPipeline(LGPBreedingPipeline):
+    '''
+    Micro mutation: step times, one instruction of every offspring (an
+    effective one with effective = true) gets one of its parts replaced:
+
+        probfunc        the function, by a random function
+        probcons        a constant source, moved by at most conststep in the constant pool
+        probwritereg    the destination register; with effective = true, by a
+                        register read afterwards, so the instruction stays effective
+        probreadreg     a source, by a random register
+
+    The probabilities are normalized. An instruction without constant source
+    gets a read register mutation instead of a constant one.
+    '''
+
+    P_MICROMUTATION: str = "micromut"
+    P_STEP: str = "step"
+    P_EFFECTIVE: str = "effective"
+    P_PROBFUNC: str = "probfunc"
+    P_PROBCONS: str = "probcons"
+    P_PROBWRITEREG: str = "probwritereg"
+    P_PROBREADREG: str = "probreadreg"
+    P_CONSTSTEP: str = "conststep"
+
+    # the kinds of micro mutation, in the order of the probabilities
+    FUNCTION: int = 0
+    CONSTANT: int = 1
+    WRITEREGISTER: int = 2
+    READREGISTER: int = 3
+
+    def __init__(self):
+        super().__init__()
+        self.step:int = 1
+        self.effective:bool = True
+        self.probabilities = np.array([0.5, 0.125, 0.25, 0.125])
+        self.constStep:int = 1
+
+    def defaultBase(self)->Parameter:
+        return self.kozaBase("mutate")
+
+    def operatorBase(self)->Parameter:
+        return self.lgpBase(self.P_MICROMUTATION)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.step = self.getOperatorInt(state, base, self.P_STEP, 1, 1)
+        self.effective = self.getOperatorBoolean(state, base, self.P_EFFECTIVE, True)
+        probabilities = np.array([self.getOperatorProbability(state, base, name, default) for name, default in
+                                  ((self.P_PROBFUNC, 0.5), (self.P_PROBCONS, 0.125),
+                                   (self.P_PROBWRITEREG, 0.25), (self.P_PROBREADREG, 0.125))])
+        if probabilities.sum() <= 0.0:
+            state.output.fatal("The micro mutation probabilities sum to 0", base)
+        self.probabilities = probabilities / probabilities.sum()
+        self.constStep = self.getOperatorInt(state, base, self.P_CONSTSTEP, 1, 1)
+
+    def varyBatch(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        rng = self.getRandom(state, thread)
+        iset = inds[0].instructionSet
+        n = len(inds)
+        for _ in range(self.step):
+            positions = self.pickPositions(rng, inds, self.effective)
+            rows = np.array([ind.getInstructions()[p] for ind, p in zip(inds, positions.tolist())], dtype=np.int32)
+            new = rows.copy()
+            kinds = rng.choice(len(self.probabilities), size=n, p=self.probabilities)
+
+            # a source of every row: src1 for half of the binary instructions
+            binary = iset.arity[rows[:, LGPIndividual.OPCODE]] > 1
+            slot = np.where(binary & (rng.random(n) < 0.5), LGPIndividual.SRC1, LGPIndividual.SRC0)
+
+            # constants: prefer a slot holding a constant, fall back to a register mutation
+            isconst = rows[:, LGPIndividual.SRC0:] >= iset.constantStart
+            hasconst = isconst.any(axis=1) & (len(iset.constants) > 0)
+            kinds[(kinds == self.CONSTANT) & ~hasconst] = self.READREGISTER
+            constant = kinds == self.CONSTANT
+            constslot = np.where(isconst[:, 0] & ~(isconst[:, 1] & (rng.random(n) < 0.5)),
+                                 LGPIndividual.SRC0, LGPIndividual.SRC1)
+            slot = np.where(constant, constslot, slot)
+
+            function = kinds == self.FUNCTION
+            new[function, LGPIndividual.OPCODE] = rng.integers(0, iset.numFunctions(), int(function.sum()))
+
+            index = np.arange(n)
+            if constant.any():
+                delta = rng.integers(1, self.constStep + 1, n) * np.where(rng.random(n) < 0.5, -1, 1)
+                moved = np.clip(rows[index, slot] - iset.constantStart + delta, 0, len(iset.constants) - 1)
+                new[index[constant], slot[constant]] = (iset.constantStart + moved)[constant]
+
+            read = kinds == self.READREGISTER
+            new[index[read], slot[read]] = rng.integers(0, iset.numregisters, int(read.sum()))
+
+            write = kinds == self.WRITEREGISTER
+            if write.any():
+                dest = rng.integers(0, iset.numregisters, n)
+                if self.effective:
+                    masks = np.array([ind.getLiveRegisters(p + 1) for ind, p in zip(inds, positions.tolist())],
+                                     dtype=np.uint64)
+                    live = self.pickRegisters(rng, masks, iset.numregisters)
+                    dest = np.where(live >= 0, live, dest)
+                new[write, LGPIndividual.DEST] = dest[write]
+
+            self.fixArity(iset, rng, new)
+            changed = (new != rows).any(axis=1)
+            for i in np.flatnonzero(changed).tolist():
+                inds[i].setInstruction(int(positions[i]), new[i])
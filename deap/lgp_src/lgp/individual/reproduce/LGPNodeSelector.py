@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from ec.util import Parameter
+from lgp.LGPDefaults import LGPDefaults
+from lgp.individual.GPNode import GPNode
+from lgp.individual.GPTree import GPTree
+
+class LGPNodeSelector:
+    '''
+    Picks a node of an instruction tree for crossover and mutation.
+
+    With probability root the root (the WriteRegister node) is picked, with
+    probability nonterminals a function node, with probability constants a
+    non-register terminal, with probability read_registers a ReadRegister
+    node, and with the remaining probability any node. If the tree has no
+    node of the chosen kind, any node is picked.
+
+    The candidates come from the node index of the tree (GPTree.getNodes), so
+    picking a node costs O(1) once the tree has been indexed, however many
+    tries the calling pipeline makes.
+    '''
+
+    P_NODESELECTOR: str = "ns"
+    P_NONTERMINAL_PROBABILITY: str = "nonterminals"
+    P_ROOT_PROBABILITY: str = "root"
+    P_CONSTANT_PROBABILITY: str = "constants"
+    P_READREGISTER_PROBABILITY: str = "read_registers"
+
+    def __init__(self):
+        self.nonterminalProbability:float = 0.0
+        self.rootProbability:float = 0.0
+        self.constantProbability:float = 0.0
+        self.readRegisterProbability:float = 0.0
+
+    @classmethod
+    def defaultBase(cls)->Parameter:
+        return LGPDefaults.base().push(cls.P_NODESELECTOR)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        def_param = self.defaultBase()
+        probabilities = []
+        for name in (self.P_NONTERMINAL_PROBABILITY, self.P_ROOT_PROBABILITY,
+                     self.P_CONSTANT_PROBABILITY, self.P_READREGISTER_PROBABILITY):
+            probability = state.parameters.getDoubleWithDefault(base.push(name), def_param.push(name), 0.0)
+            if probability < 0.0 or probability > 1.0:
+                state.output.fatal(f"The {name} probability must be between 0.0 and 1.0", base.push(name), def_param.push(name))
+            probabilities.append(probability)
+        if sum(probabilities) > 1.0:
+            state.output.fatal("The node selector probabilities must not sum to more than 1.0", base)
+        (self.nonterminalProbability, self.rootProbability,
+         self.constantProbability, self.readRegisterProbability) = probabilities
+
+    def clone(self)->LGPNodeSelector:
+        newselector = LGPNodeSelector()
+        newselector.__dict__.update(self.__dict__)
+        return newselector
+
+    def reset(self):
+        pass
+
+    def pickNode(self, state:EvolutionState, subpopulation:int, thread:int, ind:GPIndividual, tree:GPTree)->GPNode:
+        rnd = state.random[thread].random()
+
+        if rnd < self.nonterminalProbability:
+            nodesearch = GPNode.NODESEARCH_NONTERMINALS
+        elif rnd < self.nonterminalProbability + self.rootProbability:
+            return tree.child
+        elif rnd < self.nonterminalProbability + self.rootProbability + self.constantProbability:
+            nodesearch = GPNode.NODESEARCH_CONSTANT
+        elif rnd < (self.nonterminalProbability + self.rootProbability +
+                    self.constantProbability + self.readRegisterProbability):
+            nodesearch = GPNode.NODESEARCH_READREG
+        else:
+            nodesearch = GPNode.NODESEARCH_ALL
+
+        nodes = tree.getNodes(nodesearch)
+        if len(nodes) == 0:
+            nodes = tree.getNodes(GPNode.NODESEARCH_ALL)
+        return nodes[state.random[thread].randrange(len(nodes))]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.reproduce.LGPBreedingPipeline import LGPBreedingPipeline
+
+class LGPSwapPipeline(LGPBreedingPipeline):
+    '''
+    Swaps two instructions of every offspring, step times. With
+    effective = true, the first instruction of a swap is an effective one.
+    '''
+
+    P_SWAP: str = "swap"
+    P_STEP: str = "step"
+    P_EFFECTIVE: str = "effective"
+
+    def __init__(self):
+        super().__init__()
+        self.step:int = 1
+        self.effective:bool = True
+
+    def defaultBase(self)->Parameter:
+        return self.kozaBase("mutate")
+
+    def operatorBase(self)->Parameter:
+        return self.lgpBase(self.P_SWAP)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.step = self.getOperatorInt(state, base, self.P_STEP, 1, 1)
+        self.effective = self.getOperatorBoolean(state, base, self.P_EFFECTIVE, True)
+
+    def varyBatch(self, state:EvolutionState, thread:int, inds:List[LGPIndividual]):
+        rng = self.getRandom(state, thread)
+        for _ in range(self.step):
+            lengths = np.array([ind.getTreesLength() for ind in inds])
+            first = self.pickPositions(rng, inds, self.effective)
+            # the second position is uniform among the other instructions
+            second = (rng.random(len(inds)) * (lengths - 1)).astype(np.int64)
+            second += second >= first
+            for i in np.flatnonzero(lengths > 1).tolist():
+                ind = inds[i]
+                a, b = int(first[i]), int(second[i])
+                rows = ind.getInstructions()
+                if np.array_equal(rows[a], rows[b]):
+                    continue
+                rowa = rows[a].copy()
+                ind.setInstruction(a, rows[b])
+                ind.setInstruction(b, rowa)
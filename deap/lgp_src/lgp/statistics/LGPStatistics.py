@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ec.util import Parameter
+from ec.util.Profiler import Profiler
+from ec.Statistics import Statistics
+
+class LGPStatistics(Statistics):
+    '''
+    Tabular statistics of LGP runs, one row per generation and
+    subpopulation (see COLUMNS): the best and mean fitness (Fitness.fitness),
+    the length and effective length of the best individual and their means,
+    the node evaluations of the run so far, and the seconds spent evaluating
+    and breeding the generation, as timed by the Profiler (state.profiler).
+
+    The rows live in a NumPy structured array preallocated for the whole
+    run (and grown if the run is longer). A generation fills its rows from
+    arrays gathered once over the population, and nothing is formatted
+    until the rows are written to file in bulk: every flush-modulo
+    generations (default 0, never), before checkpoints, and at the end of
+    the run. With format = csv (the default) the rows are appended to a
+    text file with a header line. With format = npy the whole table is
+    saved as a binary NumPy array (np.load(file) reads it back). A run
+    restarted from a checkpoint rewrites the file with the rows written
+    before the checkpoint, dropping those of the generations it runs again.
+    '''
+
+    P_STATISTICS_FILE: str = "file"
+    P_FORMAT: str = "format"
+    P_FLUSHMODULO: str = "flush-modulo"
+
+    V_CSV: str = "csv"
+    V_NPY: str = "npy"
+
+    COLUMNS = [("generation", np.int64), ("subpop", np.int64),
+               ("best_fitness", np.float64), ("mean_fitness", np.float64),
+               ("best_length", np.int64), ("mean_length", np.float64),
+               ("best_efflength", np.int64), ("mean_efflength", np.float64),
+               ("node_evaluations", np.float64),
+               ("evaluation_time", np.float64), ("breeding_time", np.float64)]
+
+    def __init__(self):
+        super().__init__()
+        self.filename:str = None
+        self.format:str = self.V_CSV
+        self.flushModulo:int = 0
+        self.table:np.ndarray = np.zeros(0, dtype=self.COLUMNS)
+        # rows filled, rows written, and the first row of the last generation
+        self.numRows:int = 0
+        self.numFlushed:int = 0
+        self.generationStart:int = 0
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.filename = state.parameters.getFile(base.push(self.P_STATISTICS_FILE), None)
+        self.format = state.parameters.getStringWithDefault(base.push(self.P_FORMAT), None, self.V_CSV)
+        if self.format not in (self.V_CSV, self.V_NPY):
+            state.output.fatal(f"Unknown statistics format {self.format}", base.push(self.P_FORMAT))
+        self.flushModulo = state.parameters.getIntWithDefault(base.push(self.P_FLUSHMODULO), None, 0)
+        if self.flushModulo < 0:
+            state.output.fatal("The flush modulo must be >= 0", base.push(self.P_FLUSHMODULO))
+        if self.filename is not None and self.format == self.V_CSV:
+            with open(self.filename, "w") as f:
+                f.write(",".join(name for name, _ in self.COLUMNS) + "\n")
+        profiler = getattr(state, "profiler", None)
+        if profiler is not None:
+            profiler.timePhases()
+
+    @staticmethod
+    def phaseTime(state:EvolutionState, name:str)->float:
+        profiler = getattr(state, "profiler", None)
+        return profiler.phaseTime(name) if profiler is not None else 0.0
+
+    def reserve(self, state:EvolutionState, rows:int):
+        '''make room for rows more rows'''
+        if self.numRows + rows <= len(self.table):
+            return
+        generations = state.numGenerations if state.numGenerations > 0 else 64
+        capacity = max(generations * len(state.population.subpops), 2 * len(self.table), self.numRows + rows)
+        table = np.zeros(capacity, dtype=self.COLUMNS)
+        table[:self.numRows] = self.table[:self.numRows]
+        self.table = table
+
+    def preEvaluationStatistics(self, state:EvolutionState):
+        super().preEvaluationStatistics(state)
+        if self.flushModulo > 0 and state.generation > 0 and state.generation % self.flushModulo == 0:
+            self.flush()
+
+    def postEvaluationStatistics(self, state:EvolutionState):
+        super().postEvaluationStatistics(state)
+        elapsed = self.phaseTime(state, Profiler.EVALUATION)
+        # steady-state runs breed while evaluating and never call postBreedingStatistics
+        breeding = self.phaseTime(state, Profiler.BREEDING)
+        subpops = state.population.subpops
+        self.reserve(state, len(subpops))
+        self.generationStart = self.numRows
+        for x, subpop in enumerate(subpops):
+            inds = subpop.individuals
+            n = len(inds)
+            fitness = np.fromiter((ind.fitness.fitness() for ind in inds), np.float64, n)
+            lengths = np.fromiter((ind.getTreesLength() for ind in inds), np.int64, n)
+            efflengths = np.fromiter((ind.getEffTreesLength() for ind in inds), np.int64, n)
+            best = 0
+            for i in range(1, n):
+                if inds[i].fitness.betterThan(inds[best].fitness):
+                    best = i
+            self.table[self.numRows] = (state.generation, x, fitness[best], fitness.mean(),
+                                        lengths[best], lengths.mean(), efflengths[best], efflengths.mean(),
+                                        max(getattr(state, "nodeEvaluation", 0), 0), elapsed, breeding)
+            self.numRows += 1
+
+    def postBreedingStatistics(self, state:EvolutionState):
+        super().postBreedingStatistics(state)
+        self.table["breeding_time"][self.generationStart:self.numRows] = self.phaseTime(state, Profiler.BREEDING)
+
+    def getTable(self)->np.ndarray:
+        '''the rows so far'''
+        return self.table[:self.numRows]
+
+    def flush(self):
+        '''write the rows not written yet'''
+        if self.filename is None or self.numFlushed == self.numRows:
+            return
+        if self.format == self.V_NPY:
+            with open(self.filename, "wb") as f:
+                np.save(f, self.getTable(), allow_pickle=False)
+        else:
+            with open(self.filename, "a") as f:
+                self.writeRows(f, self.table[self.numFlushed:self.numRows])
+        self.numFlushed = self.numRows
+
+    def writeRows(self, f, rows:np.ndarray):
+        fmt = ["%d" if np.issubdtype(dtype, np.integer) else "%.17g" for _, dtype in self.COLUMNS]
+        np.savetxt(f, rows, fmt=fmt, delimiter=",")
+
+    def restartFromCheckpoint(self, state:EvolutionState):
+        super().restartFromCheckpoint(state)
+        # the rows of the checkpoint are those written before it (see preCheckpointStatistics)
+        self.numRows = self.numFlushed
+        if self.filename is None:
+            return
+        if self.format == self.V_NPY:
+            with open(self.filename, "wb") as f:
+                np.save(f, self.getTable(), allow_pickle=False)
+        else:
+            with open(self.filename, "w") as f:
+                f.write(",".join(name for name, _ in self.COLUMNS) + "\n")
+                self.writeRows(f, self.getTable())
+
+    def preCheckpointStatistics(self, state:EvolutionState):
+        super().preCheckpointStatistics(state)
+        self.flush()
+
+    def finalStatistics(self, state:EvolutionState, result:int):
+        super().finalStatistics(state, result)
+        self.flush()
@@ -60,7 +60,8 @@ def selTournament(individuals, k, tournsize, fit_attr="fitness"):
     :returns: A list of selected individuals.
 
     This function uses the :func:`~random.choice` function from the python base
-    :mod:`random` module.
+    :mod:`random` module. See :func:`selTournamentIndices` for a vectorized
+    version working on an array of fitness values.
     """
     chosen = []
     for i in range(k):
@@ -69,6 +70,39 @@ def selTournament(individuals, k, tournsize, fit_attr="fitness"):
     return chosen
 
 
+def selTournamentIndices(fitnesses, k, tournsize):
+    """Select the best individual among *tournsize* randomly chosen
+    individuals, *k* times, all the tournaments being drawn at once over an
+    array of fitness values. The indices of the selected individuals are
+    returned instead of the individuals themselves.
+
+    :param fitnesses: The weighted fitness values of the individuals to
+                      select from, an array of shape (n,) or, with several
+                      objectives, (n, number of objectives), e.g.
+                      ``numpy.array([ind.fitness.wvalues for ind in population])``.
+    :param k: The number of individuals to select.
+    :param tournsize: The number of individuals participating in each tournament.
+    :returns: An array of *k* indices into *fitnesses*.
+
+    As with :func:`selTournament`, the fitnesses are compared
+    lexicographically and larger is better, and a tie goes to the aspirant
+    drawn first. The array only needs to be built once per generation, so
+    a whole generation of tournaments costs a few NumPy operations instead
+    of *k* times *tournsize* fitness comparisons in Python.
+
+    This function draws the tournaments with a :func:`numpy.random.default_rng`
+    generator seeded from the python base :mod:`random` module.
+    """
+    fitnesses = np.asarray(fitnesses, dtype=np.float64)
+    if fitnesses.ndim > 1:
+        # the lexicographic rank of every row, equal rows sharing their rank
+        _, fitnesses = np.unique(fitnesses, axis=0, return_inverse=True)
+        fitnesses = fitnesses.reshape(-1)
+    rng = np.random.default_rng(random.getrandbits(64))
+    aspirants = rng.integers(0, len(fitnesses), size=(k, tournsize))
+    return aspirants[np.arange(k), fitnesses[aspirants].argmax(axis=1)]
+
+
 def selRoulette(individuals, k, fit_attr="fitness"):
     """Select *k* individuals from the input *individuals* using *k*
     spins of a roulette. The selection is made by looking only at the first
@@ -322,5 +356,6 @@ def selAutomaticEpsilonLexicase(individuals, k):
 
 
 __all__ = ['selRandom', 'selBest', 'selWorst', 'selRoulette',
-           'selTournament', 'selDoubleTournament', 'selStochasticUniversalSampling',
+           'selTournament', 'selTournamentIndices', 'selDoubleTournament',
+           'selStochasticUniversalSampling',
            'selLexicase', 'selEpsilonLexicase', 'selAutomaticEpsilonLexicase']
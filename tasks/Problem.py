@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+
+from ec.util import Parameter
+
+class Problem(ABC):
+    '''
+    The problem an Evaluator applies to the individuals (eval.problem).
+
+    A problem is set up once and may then be sent to the evaluator's worker
+    processes, so everything it needs to evaluate an individual must be
+    reachable from the problem itself (see ParallelEvaluator). Problems
+    holding large data should make sure it is not copied every time the
+    problem is pickled (see SupervisedProblem).
+    '''
+
+    P_PROBLEM: str = "problem"
+
+    @classmethod
+    def defaultBase(cls)->Parameter:
+        return Parameter(cls.P_PROBLEM)
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        pass
+
+    def clone(self)->Problem:
+        return copy.copy(self)
+
+    def prepareToEvaluate(self, state:EvolutionState, threadnum:int):
+        '''called before a batch of evaluations'''
+        pass
+
+    def finishEvaluating(self, state:EvolutionState, threadnum:int):
+        '''called after a batch of evaluations'''
+        pass
+
+    def getEvaluationContext(self, state:EvolutionState):
+        '''what the problem needs to know about the generation to evaluate its individuals
+        in another process (e.g. a threshold computed from the population), sent with
+        every task of the evaluator's workers. None by default.'''
+        return None
+
+    def setEvaluationContext(self, context):
+        '''called in a worker, before evaluating a task, with the context of getEvaluationContext'''
+        pass
+
+    def initializeContacts(self, state:EvolutionState):
+        pass
+
+    def reinitializeContacts(self, state:EvolutionState):
+        self.initializeContacts(state)
+
+    def closeContacts(self, state:EvolutionState, result:int):
+        pass
+
+    def fitnessChanged(self, state:EvolutionState)->bool:
+        '''True if the fitnesses computed in earlier generations cannot be compared with the new
+        ones (e.g. the individuals are evaluated on a new mini-batch every generation): the
+        evaluator then evaluates all the individuals again and forgets its cached fitnesses'''
+        return False
+
+    def reevaluate(self, state:EvolutionState, ind, subpopulation:int, threadnum:int):
+        '''give ind the fitness reported at the end of the run. By default, the fitness
+        computed by evaluate is final and nothing is done.'''
+        pass
+
+    def takeNodeEvaluations(self)->int:
+        '''the instructions times fitness cases executed since the last call'''
+        return 0
+
+    @abstractmethod
+    def evaluate(self, state:EvolutionState, ind, subpopulation:int, threadnum:int):
+        '''set the fitness of ind and mark it evaluated'''
+        pass
+
+    def describe(self, state:EvolutionState, ind, subpopulation:int, threadnum:int, log:int=0):
+        '''report how ind performs, e.g. on the test data, at the end of the run'''
+        pass
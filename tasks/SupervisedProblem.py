@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from ec.util import Output, Parameter
+from ec.util.SharedData import SharedData
+from tasks.Problem import Problem
+
+class SupervisedProblem(Problem):
+    '''
+    A problem learning some columns (the targets) of a dataset from the
+    other columns (the input features).
+
+    The dataset is the file dataname(.npy|.csv|.txt) of the directory
+    location, one row per case. targets.0 .. targets.(target_num - 1) are the
+    column indices of the targets. The cases are shuffled (seed Kfold_seed)
+    and split into Kfold_num folds: fold Kfold_index is the test set and the
+    other folds the training set (with Kfold_num = 1, all the cases are
+    training cases).
+
+    The data is held as four read-only, C-contiguous float64 matrices with
+    one row per variable and one column per case, the layout of the
+    interpreter's registers:
+
+        trainingInputs    (number of features, training cases)
+        trainingTargets   (target_num, training cases)
+        testInputs, testTargets
+
+    They are loaded once per process through SharedData, so the problems of
+    all the evaluators of a process (and, when the job runner preloads the
+    data before forking, all the jobs) use the same arrays. With
+    memmap = true, the matrices of the split are also written once as .npy
+    files to memmap-dir (by default the system temporary directory) and
+    memory-mapped from there: the operating system then shares their pages
+    between all the processes using the split, including evaluator workers
+    started with spawn and runs restarted from a checkpoint.
+
+    The data is never pickled with the problem: a problem sent to a worker
+    process or saved in a checkpoint loads it again when it first needs it.
+
+    With batch-size = B > 0, the individuals of a generation are evaluated on
+    a mini-batch of B training cases only (getTrainingData), drawn anew every
+    generation: uniformly (batch-type = random) or one case from each of B
+    strata of the cases sorted by their first target (batch-type =
+    stratified). The batch only depends on the generation and on a seed
+    drawn at setup, so all the worker processes use the same batch.
+    '''
+
+    P_LOCATION: str = "location"
+    P_DATANAME: str = "dataname"
+    P_KFOLDINDEX: str = "Kfold_index"
+    P_KFOLDNUM: str = "Kfold_num"
+    P_KFOLDSEED: str = "Kfold_seed"
+    P_TARGETNUM: str = "target_num"
+    P_TARGETS: str = "targets"
+    P_MEMMAP: str = "memmap"
+    P_MEMMAPDIR: str = "memmap-dir"
+    P_BATCHSIZE: str = "batch-size"
+    P_BATCHTYPE: str = "batch-type"
+
+    V_RANDOM: str = "random"
+    V_STRATIFIED: str = "stratified"
+
+    EXTENSIONS = (".npy", ".csv", ".txt", "")
+
+    # the directory of the datasets when location is not given
+    DEFAULT_LOCATION: str = "."
+
+    # the matrices of a split, in the order they are stored
+    MATRICES = ("trainingInputs", "trainingTargets", "testInputs", "testTargets")
+
+    def __init__(self):
+        super().__init__()
+        self.filename:str = None
+        self.targets:List[int] = [0]
+        self.kfoldIndex:int = 0
+        self.kfoldNum:int = 1
+        self.kfoldSeed:int = 0
+        self.memmap:bool = False
+        self.memmapDirectory:str = None
+        self.batchSize:int = 0
+        self.batchType:str = self.V_RANDOM
+        self.batchSeed:int = 0
+        self._data:Dict[str, np.ndarray] = None
+        # (generation, inputs, targets) of the current mini-batch
+        self._batch = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        self.setupData(state.parameters, base, state.output)
+        data = self.getData()
+
+        def_ = self.defaultBase()
+        self.batchSize = state.parameters.getIntWithDefault(base.push(self.P_BATCHSIZE), def_.push(self.P_BATCHSIZE), 0)
+        if self.batchSize < 0:
+            state.output.fatal("batch-size must be >= 0", base.push(self.P_BATCHSIZE))
+        if self.batchSize >= self.numTrainingCases:
+            self.batchSize = 0
+        self.batchType = state.parameters.getStringWithDefault(base.push(self.P_BATCHTYPE),
+                                                               def_.push(self.P_BATCHTYPE), self.V_RANDOM)
+        if self.batchType not in (self.V_RANDOM, self.V_STRATIFIED):
+            state.output.fatal(f"Unknown batch type {self.batchType}", base.push(self.P_BATCHTYPE))
+        if self.batchSize > 0:
+            self.batchSeed = state.random[0].getrandbits(32)
+        state.output.message(f"Dataset {self.filename}: {data['trainingInputs'].shape[0]} features, "
+                             f"{len(self.targets)} targets, {self.numTrainingCases} training and "
+                             f"{self.numTestCases} test cases")
+
+    def setupData(self, parameters:ParameterDatabase, base:Parameter, output:Output):
+        '''read the data parameters; this does not need an EvolutionState, see preloadData'''
+        def_ = self.defaultBase()
+        location = parameters.getFile(base.push(self.P_LOCATION), def_.push(self.P_LOCATION)) or self.DEFAULT_LOCATION
+        dataname = parameters.getString(base.push(self.P_DATANAME), def_.push(self.P_DATANAME))
+        self.filename = self.findDataset(location, dataname)
+        if self.filename is None:
+            output.fatal(f"Cannot find the dataset {dataname} in {location}", base.push(self.P_DATANAME))
+
+        self.kfoldNum = parameters.getIntWithDefault(base.push(self.P_KFOLDNUM), def_.push(self.P_KFOLDNUM), 1)
+        self.kfoldIndex = parameters.getIntWithDefault(base.push(self.P_KFOLDINDEX), def_.push(self.P_KFOLDINDEX), 0)
+        if self.kfoldNum < 1 or not 0 <= self.kfoldIndex < self.kfoldNum:
+            output.fatal("K-fold splitting needs Kfold_num >= 1 and 0 <= Kfold_index < Kfold_num",
+                         base.push(self.P_KFOLDINDEX))
+        self.kfoldSeed = parameters.getIntWithDefault(base.push(self.P_KFOLDSEED), def_.push(self.P_KFOLDSEED), 0)
+
+        numtargets = parameters.getIntWithDefault(base.push(self.P_TARGETNUM), def_.push(self.P_TARGETNUM), 1)
+        if numtargets < 1:
+            output.fatal("target_num must be >= 1", base.push(self.P_TARGETNUM))
+        self.targets = [parameters.getIntWithDefault(base.push(self.P_TARGETS).push(str(x)),
+                                                     def_.push(self.P_TARGETS).push(str(x)), x)
+                        for x in range(numtargets)]
+        if len(set(self.targets)) != numtargets or min(self.targets) < 0:
+            output.fatal("The targets must be distinct column indices", base.push(self.P_TARGETS))
+
+        self.memmap = parameters.getBoolean(base.push(self.P_MEMMAP), def_.push(self.P_MEMMAP), False)
+        self.memmapDirectory = parameters.getFile(base.push(self.P_MEMMAPDIR), def_.push(self.P_MEMMAPDIR))
+        self._data = None
+
+    @classmethod
+    def preloadData(cls, parameters:ParameterDatabase, base:Parameter):
+        '''load the data of the problem defined at base into SharedData, e.g. before the jobs are forked'''
+        problem = cls()
+        problem.setupData(parameters, base, Output())
+        problem.getData()
+
+    @classmethod
+    def findDataset(cls, location:str, dataname:str)->str:
+        for extension in cls.EXTENSIONS:
+            filename = os.path.join(location, dataname + extension)
+            if os.path.isfile(filename):
+                return filename
+        return None
+
+    # ----------------------------- the data -----------------------------
+
+    def getData(self)->Dict[str, np.ndarray]:
+        if self._data is None:
+            self._data = SharedData.get(self.dataKey(), self.loadData)
+        return self._data
+
+    @property
+    def trainingInputs(self)->np.ndarray:
+        return self.getData()["trainingInputs"]
+
+    @property
+    def trainingTargets(self)->np.ndarray:
+        return self.getData()["trainingTargets"]
+
+    @property
+    def testInputs(self)->np.ndarray:
+        return self.getData()["testInputs"]
+
+    @property
+    def testTargets(self)->np.ndarray:
+        return self.getData()["testTargets"]
+
+    @property
+    def numTrainingCases(self)->int:
+        return self.trainingInputs.shape[1]
+
+    @property
+    def numTestCases(self)->int:
+        return self.testInputs.shape[1]
+
+    def getNumInputs(self)->int:
+        '''the number of input features, announced to the instruction set of the individuals'''
+        return self.trainingInputs.shape[0]
+
+    def getTrainingData(self, generation:int):
+        '''the (inputs, targets) evaluated in generation: the mini-batch of the
+        generation, or all the training cases without batch-size'''
+        if self.batchSize == 0:
+            return self.trainingInputs, self.trainingTargets
+        if self._batch is None or self._batch[0] != generation:
+            cases = self.batchIndices(generation)
+            self._batch = (generation, np.ascontiguousarray(self.trainingInputs[:, cases]),
+                           np.ascontiguousarray(self.trainingTargets[:, cases]))
+        return self._batch[1], self._batch[2]
+
+    def batchIndices(self, generation:int)->np.ndarray:
+        '''the sorted training cases of the mini-batch of generation'''
+        rng = np.random.default_rng([self.batchSeed, generation])
+        n = self.numTrainingCases
+        if self.batchType == self.V_RANDOM:
+            return np.sort(rng.choice(n, self.batchSize, replace=False))
+        order = np.argsort(self.trainingTargets[0], kind="stable")
+        bounds = np.linspace(0, n, self.batchSize + 1).astype(np.int64)
+        picks = bounds[:-1] + (rng.random(self.batchSize) * np.diff(bounds)).astype(np.int64)
+        return np.sort(order[picks])
+
+    def fitnessChanged(self, state:EvolutionState)->bool:
+        return self.batchSize > 0
+
+    def dataKey(self)->str:
+        '''identifies the split: the dataset file (and its version), the targets and the folds'''
+        stat = os.stat(self.filename)
+        description = (f"{os.path.abspath(self.filename)}:{stat.st_size}:{stat.st_mtime_ns}:{self.targets}:"
+                       f"{self.kfoldNum}:{self.kfoldIndex}:{self.kfoldSeed}")
+        return hashlib.blake2b(description.encode(), digest_size=12).hexdigest()
+
+    def loadData(self)->Dict[str, np.ndarray]:
+        if not self.memmap:
+            return self.splitData(self.readDataset(self.filename))
+
+        directory = os.path.join(self.memmapDirectory or tempfile.gettempdir(),
+                                 f"{os.path.basename(self.filename)}.{self.dataKey()}")
+        if not all(os.path.isfile(os.path.join(directory, name + ".npy")) for name in self.MATRICES):
+            os.makedirs(directory, exist_ok=True)
+            for name, matrix in self.splitData(self.readDataset(self.filename)).items():
+                # write and rename, so a concurrent job never maps a partial file
+                fd, temporary = tempfile.mkstemp(suffix=".npy", dir=directory)
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, matrix)
+                os.replace(temporary, os.path.join(directory, name + ".npy"))
+        return {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in self.MATRICES}
+
+    @staticmethod
+    def readDataset(filename:str)->np.ndarray:
+        '''the (cases, columns) matrix of a .npy file or of a text file with an optional header line'''
+        if filename.endswith(".npy"):
+            return np.load(filename)
+        delimiter = "," if filename.endswith(".csv") else None
+        with open(filename) as f:
+            first = f.readline()
+        try:
+            [float(v) for v in first.replace(",", " ").split()]
+            skip = 0
+        except ValueError:
+            skip = 1
+        return np.loadtxt(filename, delimiter=delimiter, skiprows=skip, ndmin=2)
+
+    def splitIndices(self, numcases:int):
+        '''the sorted (training, test) case indices of the fold'''
+        if self.kfoldNum == 1:
+            return np.arange(numcases), np.zeros(0, dtype=np.int64)
+        folds = np.array_split(np.random.default_rng(self.kfoldSeed).permutation(numcases), self.kfoldNum)
+        test = np.sort(folds[self.kfoldIndex])
+        training = np.sort(np.concatenate([f for x, f in enumerate(folds) if x != self.kfoldIndex]))
+        return training, test
+
+    def splitData(self, dataset:np.ndarray)->Dict[str, np.ndarray]:
+        dataset = np.asarray(dataset, dtype=np.float64)
+        if max(self.targets) >= dataset.shape[1]:
+            raise ValueError(f"The dataset {self.filename} has no column {max(self.targets)}")
+        features = [c for c in range(dataset.shape[1]) if c not in self.targets]
+        training, test = self.splitIndices(dataset.shape[0])
+        # gathering transposed blocks gives the (variables, cases) layout, one contiguous row per variable
+        return {"trainingInputs": np.ascontiguousarray(dataset[np.ix_(training, features)].T),
+                "trainingTargets": np.ascontiguousarray(dataset[np.ix_(training, self.targets)].T),
+                "testInputs": np.ascontiguousarray(dataset[np.ix_(test, features)].T),
+                "testTargets": np.ascontiguousarray(dataset[np.ix_(test, self.targets)].T)}
+
+    def __getstate__(self):
+        # the data is loaded again where the problem is unpickled, see getData
+        d = self.__dict__.copy()
+        d["_data"] = None
+        d["_batch"] = None
+        return d
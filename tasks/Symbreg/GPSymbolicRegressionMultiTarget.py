@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from ec.util import Parameter
+from lgp.individual.LGPCompiler import LGPCompiler
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+from lgp.individual.LGPInterpreter import LGPInterpreter
+from tasks.SupervisedProblem import SupervisedProblem
+
+class GPSymbolicRegressionMultiTarget(SupervisedProblem):
+    '''
+    Multi-target symbolic regression: output register x of an individual
+    predicts target x (targets.x) of the dataset.
+
+    A program is executed once over all the training cases, and the errors
+    of all the targets are computed together from the output rows of the
+    final register matrix:
+
+        RSE     relative squared error, sum((y - p)^2) / sum((y - mean(y))^2)
+        MSE     mean squared error
+        RMSE    root mean squared error
+
+    With linear-scaling = true, every output p is first replaced by a + b p,
+    where a and b are the least-squares fit of the target (Keijzer's linear
+    scaling), computed for all the targets at once. The outputs on the test
+    cases (describe) are scaled with the a and b fitted on the training
+    cases.
+
+    If the fitness has one objective per target, the objectives are the
+    errors of the targets, otherwise (one objective) their mean. Errors that
+    are not finite (e.g. overflowing programs) are replaced by MAXERROR.
+
+    With a mini-batch (batch-size, see SupervisedProblem), the fitness is
+    the error on the batch of the generation, and the elites of the final
+    population are evaluated again on all the training cases (reevaluate).
+
+    early-stop = true abandons hopeless individuals: the cases are run in
+    early-stop-chunks chunks and, since the errors only grow with the
+    cases, the error of the chunks run so far is a lower bound of the
+    final one. Once that bound exceeds the threshold of the generation, the
+    individual is abandoned and the bound becomes its fitness, marked as
+    truncated (Fitness.truncated) so the evaluator does not cache it. The
+    threshold is the early-stop-rank-th best exact error of the individuals
+    already evaluated when the generation starts (prepareToEvaluate), e.g.
+    the elites: with at least early-stop-rank elites, an abandoned
+    individual cannot be among the early-stop-rank best ones. The threshold
+    only depends on the population, and is shipped to the evaluator's
+    workers with every task (getEvaluationContext), so the fitnesses do not
+    depend on evalthreads, chunk-size or the order of the evaluations. There
+    is no threshold in generation 0, or after the fitness function changed
+    (mini-batches). Early termination needs a single objective and no
+    linear scaling (the scaled errors of a part of the cases do not bound
+    those of all of them).
+
+    compile = true compiles the effective code of the individuals into
+    straight-line functions (LGPCompiler) shared by all the data sets of a
+    process, keeping the compile.cache-size most recently run programs.
+    '''
+
+    P_FITNESS: str = "fitness"
+    P_LINEARSCALING: str = "linear-scaling"
+    P_EARLYSTOP: str = "early-stop"
+    P_EARLYSTOPRANK: str = "early-stop-rank"
+    P_EARLYSTOPCHUNKS: str = "early-stop-chunks"
+    P_COMPILE: str = "compile"
+    P_CACHESIZE: str = "cache-size"
+
+    V_RSE: str = "RSE"
+    V_MSE: str = "MSE"
+    V_RMSE: str = "RMSE"
+
+    MAXERROR: float = 1e10
+
+    DEFAULT_LOCATION: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset")
+
+    def __init__(self):
+        super().__init__()
+        self.errorMeasure:str = self.V_RSE
+        self.linearScaling:bool = False
+        self.earlyStop:bool = False
+        self.earlyStopRank:int = 1
+        self.earlyStopChunks:int = 4
+        self.compile:bool = False
+        self.compileCacheSize:int = 4096
+        self.compiler:LGPCompiler = None
+        self.interpreters = {}
+        # (inputs, [(chunk inputs, chunk targets), ...]) of the data set split by early stopping
+        self._chunks = None
+        # (generation, early termination threshold of the generation)
+        self._threshold = None
+
+    def setup(self, state:EvolutionState, base:Parameter):
+        super().setup(state, base)
+        def_ = self.defaultBase()
+        self.errorMeasure = state.parameters.getStringWithDefault(base.push(self.P_FITNESS),
+                                                                  def_.push(self.P_FITNESS), self.V_RSE)
+        if self.errorMeasure not in (self.V_RSE, self.V_MSE, self.V_RMSE):
+            state.output.fatal(f"Unknown error measure {self.errorMeasure}", base.push(self.P_FITNESS))
+        self.linearScaling = state.parameters.getBoolean(base.push(self.P_LINEARSCALING),
+                                                         def_.push(self.P_LINEARSCALING), False)
+        self.earlyStop = state.parameters.getBoolean(base.push(self.P_EARLYSTOP), def_.push(self.P_EARLYSTOP), False)
+        if self.earlyStop and self.linearScaling:
+            state.output.warning("Early termination is not possible with linear scaling and is disabled",
+                                 base.push(self.P_EARLYSTOP))
+            self.earlyStop = False
+        self.earlyStopRank = state.parameters.getIntWithDefault(base.push(self.P_EARLYSTOPRANK),
+                                                                def_.push(self.P_EARLYSTOPRANK), 1)
+        self.earlyStopChunks = state.parameters.getIntWithDefault(base.push(self.P_EARLYSTOPCHUNKS),
+                                                                  def_.push(self.P_EARLYSTOPCHUNKS), 4)
+        if self.earlyStopRank < 1 or self.earlyStopChunks < 1:
+            state.output.fatal("early-stop-rank and early-stop-chunks must be >= 1", base.push(self.P_EARLYSTOP))
+        self.compile = state.parameters.getBoolean(base.push(self.P_COMPILE), def_.push(self.P_COMPILE), False)
+        self.compileCacheSize = state.parameters.getIntWithDefault(
+            base.push(self.P_COMPILE).push(self.P_CACHESIZE), def_.push(self.P_COMPILE).push(self.P_CACHESIZE), 4096)
+        if self.compileCacheSize < 0:
+            state.output.fatal("The compile cache size must be >= 0", base.push(self.P_COMPILE).push(self.P_CACHESIZE))
+
+    def __getstate__(self):
+        d = super().__getstate__()
+        d["compiler"] = None
+        d["interpreters"] = {}
+        d["_chunks"] = None
+        d["_threshold"] = None
+        return d
+
+    def takeNodeEvaluations(self)->int:
+        count = 0
+        for interpreter in self.interpreters.values():
+            count += interpreter.nodeEvaluations
+            interpreter.nodeEvaluations = 0
+        return count
+
+    def getInterpreter(self, ind:LGPIndividual, training:bool=True)->LGPInterpreter:
+        '''the interpreter of all the training (or test) inputs'''
+        if training:
+            return self.interpreterFor(ind, "training", self.trainingInputs)
+        return self.interpreterFor(ind, "test", self.testInputs)
+
+    def interpreterFor(self, ind:LGPIndividual, key, inputs:np.ndarray)->LGPInterpreter:
+        '''the interpreter of inputs, one per process and kind of data set (key)'''
+        interpreter = self.interpreters.get(key)
+        if interpreter is None or interpreter.instructionSet is not ind.instructionSet:
+            interpreter = LGPInterpreter(ind.instructionSet, inputs, self.getCompiler(ind.instructionSet))
+            self.interpreters[key] = interpreter
+        elif interpreter.sourceInputs is not inputs:
+            # compared with the array given to setInputs, which may differ from interpreter.inputs
+            # (e.g. a memory-mapped matrix)
+            interpreter.setInputs(inputs)
+        return interpreter
+
+    def getCompiler(self, instructionSet:LGPInstructionSet)->LGPCompiler:
+        '''the compiler of the instruction set (one per process), None without compile'''
+        if not self.compile:
+            return None
+        if self.compiler is None or self.compiler.instructionSet is not instructionSet:
+            self.compiler = LGPCompiler(instructionSet, self.compileCacheSize)
+        return self.compiler
+
+    def predict(self, ind:LGPIndividual, training:bool=True)->np.ndarray:
+        '''the (number of targets, cases) outputs of the individual on all the training
+        (or test) cases, linearly scaled if required. The test outputs are scaled with the
+        coefficients fitted on the training cases, so the test targets are never used.'''
+        if training:
+            return self.predictOn(ind, "training", self.trainingInputs, self.trainingTargets)
+        predictions = self.outputsOn(ind, "test", self.testInputs)
+        if self.linearScaling:
+            intercept, slope = self.scaling(self.outputsOn(ind, "training", self.trainingInputs),
+                                            self.trainingTargets)
+            with np.errstate(all="ignore"):
+                predictions = intercept + slope * predictions
+        return predictions
+
+    def outputsOn(self, ind:LGPIndividual, key, inputs:np.ndarray)->np.ndarray:
+        '''the unscaled outputs of the individual on inputs'''
+        outputs = ind.getOutputRegisters()[:len(self.targets)]
+        registers = self.interpreterFor(ind, key, inputs).execute(ind.getEffectiveInstructions())
+        return registers[outputs]
+
+    def predictOn(self, ind:LGPIndividual, key, inputs:np.ndarray, targets:np.ndarray)->np.ndarray:
+        predictions = self.outputsOn(ind, key, inputs)
+        if self.linearScaling:
+            predictions = self.scale(predictions, targets)
+        return predictions
+
+    @staticmethod
+    def scaling(predictions:np.ndarray, targets:np.ndarray):
+        '''the intercepts a and slopes b of the least-squares fits a + b p of the targets, one per row'''
+        with np.errstate(all="ignore"):
+            pmean = predictions.mean(axis=1, keepdims=True)
+            tmean = targets.mean(axis=1, keepdims=True)
+            centered = predictions - pmean
+            variance = np.einsum("ij,ij->i", centered, centered)
+            covariance = np.einsum("ij,ij->i", centered, targets - tmean)
+            slope = np.where(variance > 0.0, covariance / np.where(variance > 0.0, variance, 1.0), 0.0)[:, None]
+            return tmean - slope * pmean, slope
+
+    @classmethod
+    def scale(cls, predictions:np.ndarray, targets:np.ndarray)->np.ndarray:
+        '''the least-squares fits a + b p of the targets, one per row'''
+        intercept, slope = cls.scaling(predictions, targets)
+        with np.errstate(all="ignore"):
+            return intercept + slope * predictions
+
+    def errors(self, predictions:np.ndarray, targets:np.ndarray)->np.ndarray:
+        '''the error of every target, computed from the whole prediction matrix at once'''
+        with np.errstate(all="ignore"):
+            residuals = targets - predictions
+            return self.measure(np.einsum("ij,ij->i", residuals, residuals), targets)
+
+    def measure(self, errors:np.ndarray, targets:np.ndarray)->np.ndarray:
+        '''the errors of the targets from their sums of squared residuals (over the cases of targets,
+        or a part of them: the result is then a lower bound)'''
+        with np.errstate(all="ignore"):
+            if self.errorMeasure == self.V_RSE:
+                centered = targets - targets.mean(axis=1, keepdims=True)
+                spread = np.einsum("ij,ij->i", centered, centered)
+                errors = errors / np.where(spread > 0.0, spread, 1.0)
+            else:
+                errors = errors / max(targets.shape[1], 1)
+                if self.errorMeasure == self.V_RMSE:
+                    errors = np.sqrt(errors)
+        return np.where(np.isfinite(errors), np.minimum(errors, self.MAXERROR), self.MAXERROR)
+
+    def evaluate(self, state:EvolutionState, ind:LGPIndividual, subpopulation:int, threadnum:int):
+        if len(ind.getOutputRegisters()) < len(self.targets):
+            state.output.fatal(f"{len(self.targets)} targets need as many output registers, "
+                               f"the individual has {len(ind.getOutputRegisters())}")
+        inputs, targets = self.getTrainingData(state.generation)
+        if self.earlyStop and ind.fitness.getNumObjectives() == 1:
+            errors, truncated = self.earlyStopErrors(state, ind, inputs, targets)
+        else:
+            errors, truncated = self.errors(self.predictOn(ind, "batch", inputs, targets), targets), False
+        self.setFitness(state, ind, errors, truncated)
+        ind.evaluated = True
+
+    def reevaluate(self, state:EvolutionState, ind:LGPIndividual, subpopulation:int, threadnum:int):
+        if self.batchSize > 0 or self.earlyStop:
+            self.setFitness(state, ind, self.errors(self.predict(ind), self.trainingTargets))
+            ind.evaluated = True
+
+    def getChunks(self, inputs:np.ndarray, targets:np.ndarray):
+        if self._chunks is None or self._chunks[0] is not inputs:
+            bounds = np.linspace(0, inputs.shape[1], min(self.earlyStopChunks, inputs.shape[1]) + 1).astype(np.int64)
+            self._chunks = (inputs, [(np.ascontiguousarray(inputs[:, a:b]), np.ascontiguousarray(targets[:, a:b]))
+                                     for a, b in zip(bounds[:-1], bounds[1:])])
+        return self._chunks[1]
+
+    def earlyStopThreshold(self, population:Population)->float:
+        '''the earlyStopRank-th best exact error of the evaluated individuals of population'''
+        errors = [ind.fitness.getObjective(0) for subpop in population.subpops for ind in subpop.individuals
+                  if ind.evaluated and not ind.fitness.truncated and ind.fitness.getNumObjectives() == 1]
+        if len(errors) < self.earlyStopRank:
+            return np.inf
+        return float(np.partition(errors, self.earlyStopRank - 1)[self.earlyStopRank - 1])
+
+    def prepareToEvaluate(self, state:EvolutionState, threadnum:int):
+        '''fix the early termination threshold of the generation before any individual is evaluated'''
+        super().prepareToEvaluate(state, threadnum)
+        if self.earlyStop:
+            population = getattr(state, "population", None)
+            threshold = self.earlyStopThreshold(population) if population is not None else np.inf
+            self._threshold = (state.generation, threshold)
+
+    def getEvaluationContext(self, state:EvolutionState):
+        if not self.earlyStop:
+            return None
+        if self._threshold is None or self._threshold[0] != state.generation:
+            self.prepareToEvaluate(state, 0)
+        return self._threshold
+
+    def setEvaluationContext(self, context):
+        if context is not None:
+            self._threshold = context
+
+    def earlyStopErrors(self, state:EvolutionState, ind:LGPIndividual, inputs:np.ndarray,
+                        targets:np.ndarray):
+        '''the errors of ind and False, or a lower bound of them worse than the threshold of the
+        generation and True'''
+        threshold = self.getEvaluationContext(state)[1]
+
+        outputs = ind.getOutputRegisters()[:len(self.targets)]
+        instructions = ind.getEffectiveInstructions()
+        chunks = self.getChunks(inputs, targets)
+        squared = np.zeros(len(self.targets))
+        for c, (chunkinputs, chunktargets) in enumerate(chunks):
+            registers = self.interpreterFor(ind, ("chunk", c), chunkinputs).execute(instructions)
+            with np.errstate(all="ignore"):
+                residuals = chunktargets - registers[outputs]
+                squared += np.einsum("ij,ij->i", residuals, residuals)
+            errors = self.measure(squared, targets)
+            if c < len(chunks) - 1 and errors.mean() > threshold:
+                return errors, True
+        return errors, False
+
+    def setFitness(self, state:EvolutionState, ind:LGPIndividual, errors:np.ndarray, truncated:bool=False):
+        ind.fitness.truncated = truncated
+        if ind.fitness.getNumObjectives() == len(errors):
+            ind.fitness.setObjectives(state, errors)
+        else:
+            ind.fitness.setObjectives(state, [errors.mean()])
+
+    def describe(self, state:EvolutionState, ind:LGPIndividual, subpopulation:int, threadnum:int, log:int=0):
+        if self.numTestCases == 0:
+            return
+        errors = self.errors(self.predict(ind, False), self.testTargets)
+        state.output.message(f"Test {self.errorMeasure}: " + " ".join(repr(float(e)) for e in errors))
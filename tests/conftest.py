@@ -0,0 +1,85 @@
+'''
+The shared setup of the tests of the LGP port (deap/lgp_src). Like
+deap/lgp.py, it makes the packages of the port (ec, lgp) and of the
+problems (tasks) importable, and it gives the tests stubs of the parts of
+an EvolutionState and of a fitness they need.
+'''
+
+import os
+import random
+import sys
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(_ROOT, "deap", "lgp_src"))
+sys.path.append(_ROOT)
+
+from ec.Population import Population
+from ec.Subpopulation import Subpopulation
+from ec.util import ParameterDatabase
+from ec.util.Output import Output
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+
+class Fitness(object):
+    '''a fitness to minimize, ideal at 0'''
+
+    def __init__(self, value=0.0):
+        self.value = value
+
+    def clone(self):
+        return type(self)(self.value)
+
+    def fitness(self):
+        return self.value
+
+    def betterThan(self, other):
+        return self.value < other.value
+
+    def isIdealFitness(self):
+        return self.value == 0.0
+
+    def fitnessToStringForHumans(self):
+        return repr(self.value)
+
+
+class State(object):
+    '''an EvolutionState reduced to its parameters (args), output, one random
+    number generator per thread (seeded seed, seed + 1, ...) and generation'''
+
+    def __init__(self, args=(), seed=0, threads=1):
+        self.parameters = ParameterDatabase(None, list(args))
+        self.output = Output()
+        self.random = [random.Random(seed + x) for x in range(threads)]
+        self.generation = 0
+
+
+def makeInstructionSet(numInputs=None, constants=None):
+    '''an instruction set with every function'''
+    iset = LGPInstructionSet()
+    iset.setFunctions(list(LGPInstructionSet.FUNCTIONS.values()))
+    if numInputs is not None:
+        iset.setNumInputs(numInputs)
+    if constants is not None:
+        iset.constants = constants
+    return iset
+
+
+def populate(state, iset, size, numSubpops=1, numTrees=None, evaluated=False):
+    '''give state a population of random individuals, individual x of every
+    subpopulation with fitness x (numTrees: their minimum and maximum length)'''
+    state.population = Population()
+    state.population.subpops = []
+    for _ in range(numSubpops):
+        subpop = Subpopulation()
+        for x in range(size):
+            ind = LGPIndividual()
+            ind.instructionSet = iset
+            if numTrees is not None:
+                ind.minNumTrees, ind.maxNumTrees = numTrees
+            ind.rebuildIndividual(state, 0)
+            ind.fitness = Fitness(float(x))
+            ind.evaluated = evaluated
+            subpop.individuals.append(ind)
+        state.population.subpops.append(subpop)
+    return state.population
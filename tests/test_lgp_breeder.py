@@ -0,0 +1,112 @@
+import unittest
+
+import numpy
+
+from conftest import State, makeInstructionSet, populate
+from ec.simple.SimpleBreeder import SimpleBreeder
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+
+class _MutationPipeline(object):
+    '''picks a random parent and rewrites one of its instructions'''
+
+    def clone(self):
+        return _MutationPipeline()
+
+    def prepareToProduce(self, state, subpopulation, thread):
+        pass
+
+    def finishProducing(self, state, subpopulation, thread):
+        pass
+
+    def produce(self, min, max, start, subpopulation, inds, state, thread):
+        parents = state.population.subpops[subpopulation].individuals
+        child = parents[state.random[thread].randrange(len(parents))].clone()
+        rng = LGPInstructionSet.getRandom(state, thread)
+        child.setInstruction(int(rng.integers(child.getTreesLength())), child.instructionSet.randomInstructions(rng, 1)[0])
+        inds[start] = child
+        return 1
+
+
+class _Species(object):
+    pipe_prototype = _MutationPipeline()
+
+
+def _makeState(breedthreads):
+    state = State(seed=10, threads=breedthreads)
+    state.breedthreads = breedthreads
+    populate(state, makeInstructionSet(), 20)
+    state.population.subpops[0].species = _Species()
+    return state
+
+
+def _breed(breedthreads):
+    state = _makeState(breedthreads)
+    breeder = SimpleBreeder()
+    breeder.numElites = [2]
+    newpop = breeder.breedPopulation(state)
+    breeder.closeContacts(state, 0)
+    return state, [ind.instructions for ind in newpop.subpops[0].individuals]
+
+
+class SimpleBreederTest(unittest.TestCase):
+
+    def test_elites_and_size(self):
+        state, children = _breed(1)
+        self.assertEqual(len(children), 20)
+        numpy.testing.assert_array_equal(children[0], state.population.subpops[0].individuals[0].instructions)
+        numpy.testing.assert_array_equal(children[1], state.population.subpops[0].individuals[1].instructions)
+
+    def test_parallel_breeding_is_reproducible(self):
+        _, first = _breed(3)
+        state, second = _breed(3)
+        for a, b in zip(first, second):
+            numpy.testing.assert_array_equal(a, b)
+
+        # the workers hand the state of their random streams back
+        reference = _makeState(3)
+        breeder = SimpleBreeder()
+        breeder.numElites = [2]
+        breeder.clonePipelines(reference)
+        newpop = reference.population.emptyClone()
+        fromslots, numinds = breeder.computeSlices(reference, newpop)
+        for y in range(3):
+            breeder.breedPopChunk(newpop, reference, numinds[y], fromslots[y], y)
+        for a, b in zip(newpop.subpops[0].individuals[2:], second[2:]):
+            numpy.testing.assert_array_equal(a.instructions, b)
+        self.assertEqual([r.getstate() for r in reference.random], [r.getstate() for r in state.random])
+
+    def test_breeding_workers_persist(self):
+        state = _makeState(2)
+        breeder = SimpleBreeder()
+        breeder.numElites = [2]
+        try:
+            state.population = breeder.breedPopulation(state)
+            workers = breeder.workers
+            state.generation = 1
+            second = breeder.breedPopulation(state)
+            self.assertIs(breeder.workers, workers)
+            self.assertTrue(all(process.is_alive() for process, _ in workers))
+        finally:
+            breeder.closeContacts(state, 0)
+        self.assertIsNone(breeder.workers)
+        self.assertFalse(any(process.is_alive() for process, _ in workers))
+
+        # two generations bred in this process give the same population
+        reference = _makeState(2)
+        breeder = SimpleBreeder()
+        breeder.numElites = [2]
+        breeder.clonePipelines(reference)
+        for _ in range(2):
+            newpop = reference.population.emptyClone()
+            breeder.loadElites(reference, newpop)
+            fromslots, numinds = breeder.computeSlices(reference, newpop)
+            for y in range(2):
+                breeder.breedPopChunk(newpop, reference, numinds[y], fromslots[y], y)
+            reference.population = newpop
+        for a, b in zip(reference.population.subpops[0].individuals, second.subpops[0].individuals):
+            numpy.testing.assert_array_equal(a.instructions, b.instructions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from ec.EvolutionState import EvolutionState
+from ec.Population import Population
+from ec.Subpopulation import Subpopulation
+from ec.util.Checkpoint import Checkpoint
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        filename = os.path.join(self.directory, "run.params")
+        with open(filename, "w") as f:
+            f.write("seed.0 = 4\nbreedthreads = 2\ncheckpoint = true\ncheckpoint-prefix = lgp\n")
+        self.state = EvolutionState(filename)
+        self.state.setupThreads()
+        self.state.checkpointPrefix = "lgp"
+        self.state.checkpointDirectory = self.directory
+        self.state.generation = 7
+
+        iset = LGPInstructionSet()
+        iset.setFunctions(list(LGPInstructionSet.FUNCTIONS.values()))
+        subpop = Subpopulation()
+        for _ in range(5):
+            ind = LGPIndividual()
+            ind.instructionSet = iset
+            ind.rebuildIndividual(self.state, 0)
+            subpop.individuals.append(ind)
+        self.state.population = Population()
+        self.state.population.subpops = [subpop]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_restore(self):
+        filename = Checkpoint.setCheckpoint(self.state)
+        self.assertEqual(filename, os.path.join(self.directory, "lgp.7.gz"))
+        # no temporary file left behind
+        self.assertEqual(sorted(os.listdir(self.directory)), ["lgp.7.gz", "run.params"])
+
+        restored = EvolutionState.restoreFromCheckpoint(filename)
+        self.assertEqual(restored.generation, 7)
+        self.assertEqual([r.random() for r in restored.random], [r.random() for r in self.state.random])
+        for a, b in zip(restored.population.subpops[0].individuals, self.state.population.subpops[0].individuals):
+            numpy.testing.assert_array_equal(a.instructions, b.instructions)
+            numpy.testing.assert_array_equal(a.getEffectiveMask(), b.getEffectiveMask())
+        self.assertEqual(restored.parameters.getInt(EvolutionState.P_BREEDTHREADS), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
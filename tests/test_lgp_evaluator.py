@@ -0,0 +1,185 @@
+import unittest
+
+import numpy
+
+from conftest import Fitness, State, makeInstructionSet
+from ec.simple.ParallelEvaluator import ParallelEvaluator
+from ec.simple.SimpleEvaluator import SimpleEvaluator
+from ec.util.FitnessCache import FitnessCache
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+
+
+class _CountingProblem(object):
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate(self, state, ind, subpopulation, thread):
+        self.calls += 1
+        ind.fitness.value = float(ind.getEffTreesLength())
+        ind.evaluated = True
+
+
+class _NoisyProblem(object):
+    def __init__(self):
+        self.nodeEvaluations = 0
+
+    def evaluate(self, state, ind, subpopulation, thread):
+        ind.fitness.value = ind.getEffTreesLength() + state.random[thread].random()
+        self.nodeEvaluations += ind.getEffTreesLength()
+        ind.evaluated = True
+
+    def takeNodeEvaluations(self):
+        count, self.nodeEvaluations = self.nodeEvaluations, 0
+        return count
+
+
+class _ContextProblem(_NoisyProblem):
+    '''adds a value known only to the process running the evolution'''
+
+    def __init__(self):
+        super().__init__()
+        self.offset = 0.0
+
+    def getEvaluationContext(self, state):
+        return 1000.0 * (state.generation + 1)
+
+    def setEvaluationContext(self, context):
+        self.offset = context
+
+    def evaluate(self, state, ind, subpopulation, thread):
+        super().evaluate(state, ind, subpopulation, thread)
+        ind.fitness.value += self.offset
+
+
+class _Subpopulation(object):
+    def __init__(self, individuals):
+        self.individuals = individuals
+
+
+class _Population(object):
+    def __init__(self, individuals):
+        self.subpops = [_Subpopulation(individuals)]
+
+
+def _makeState(individuals=(), evalthreads=1):
+    state = State(seed=3)
+    state.population = _Population(list(individuals))
+    state.evalthreads = evalthreads
+    return state
+
+
+def _makeIndividual(state):
+    ind = LGPIndividual()
+    ind.instructionSet = makeInstructionSet(2)
+    ind.fitness = Fitness(None)
+    ind.rebuildIndividual(state, 0)
+    return ind
+
+
+class FitnessCacheTest(unittest.TestCase):
+
+    def test_lru_eviction_within_budget(self):
+        entry = 16 + FitnessCache.sizeOf(Fitness(1.0)) + FitnessCache.ENTRYOVERHEAD
+        cache = FitnessCache(2 * entry)
+        cache.put(b"a" * 16, Fitness(1.0))
+        cache.put(b"b" * 16, Fitness(2.0))
+        self.assertEqual(cache.get(b"a" * 16).value, 1.0)
+        cache.put(b"c" * 16, Fitness(3.0))
+        self.assertIsNone(cache.get(b"b" * 16))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 1))
+        self.assertTrue(cache.numBytes <= cache.maxBytes)
+
+
+class EvaluatorCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = _makeState()
+        self.evaluator = SimpleEvaluator()
+        self.evaluator.p_problem = _CountingProblem()
+        self.evaluator.cache = FitnessCache(1 << 20)
+
+    def test_intron_variants_are_not_reevaluated(self):
+        parent = _makeIndividual(self.state)
+        child = parent.clone()
+        child.evaluated = False
+        # append an instruction writing a register which is not an output: an intron
+        row = parent.instructions[:1].copy()
+        row[0, LGPIndividual.DEST] = 7
+        child.insertInstructions(child.getTreesLength(), row)
+        self.assertFalse(child.isEffective(child.getTreesLength() - 1))
+
+        self.state.population = _Population([parent, child])
+        self.evaluator.evaluatePopulation(self.state)
+        self.assertEqual(self.evaluator.p_problem.calls, 1)
+        self.assertEqual(child.fitness.value, parent.fitness.value)
+        self.assertIsNot(child.fitness, parent.fitness)
+        self.assertEqual(self.evaluator.cache.hits, 1)
+
+    def test_truncated_fitnesses_are_not_cached(self):
+        ind = _makeIndividual(self.state)
+        ind.evaluated = True
+        ind.fitness = Fitness(1.0)
+        ind.fitness.truncated = True
+        self.evaluator.storeFitness(ind)
+        self.assertEqual(len(self.evaluator.cache), 0)
+        ind.fitness.truncated = False
+        self.evaluator.storeFitness(ind)
+        self.assertEqual(len(self.evaluator.cache), 1)
+
+    def test_commutative_sources_share_a_key(self):
+        ind = _makeIndividual(self.state)
+        add = ind.instructionSet.functions.index(LGPInstructionSet.FUNCTIONS["Add"])
+        sub = ind.instructionSet.functions.index(LGPInstructionSet.FUNCTIONS["Sub"])
+        ind.setInstructions([[add, 0, 1, 2]])
+        swapped = ind.clone()
+        swapped.setInstructions([[add, 0, 2, 1]])
+        self.assertEqual(ind.getCanonicalKey(), swapped.getCanonicalKey())
+        swapped.setInstructions([[sub, 0, 2, 1]])
+        other = swapped.clone()
+        other.setInstructions([[sub, 0, 1, 2]])
+        self.assertNotEqual(swapped.getCanonicalKey(), other.getCanonicalKey())
+
+    def test_changed_fitness_function_reevaluates(self):
+        ind = _makeIndividual(self.state)
+        self.state.population = _Population([ind])
+        self.evaluator.evaluatePopulation(self.state)
+        self.evaluator.evaluatePopulation(self.state)
+        self.assertEqual(self.evaluator.p_problem.calls, 1)
+
+        self.evaluator.p_problem.fitnessChanged = lambda state: True
+        self.evaluator.evaluatePopulation(self.state)
+        self.assertEqual(self.evaluator.p_problem.calls, 2)
+        self.assertEqual(len(self.evaluator.cache), 1)
+
+
+class ParallelEvaluatorTest(unittest.TestCase):
+
+    def _run(self, evalthreads, problem=None):
+        state = _makeState(evalthreads=evalthreads)
+        state.population = _Population([_makeIndividual(state) for _ in range(30)])
+        evaluator = ParallelEvaluator()
+        evaluator.p_problem = problem if problem is not None else _NoisyProblem()
+        evaluator.chunkSize = 4
+        evaluator.initializeContacts(state)
+        try:
+            evaluator.evaluatePopulation(state)
+        finally:
+            evaluator.closeContacts(state, 0)
+        self.assertEqual(state.nodeEvaluation,
+                         sum(ind.getEffTreesLength() for ind in state.population.subpops[0].individuals))
+        return [ind.fitness.value for ind in state.population.subpops[0].individuals]
+
+    def test_results_do_not_depend_on_worker_count(self):
+        serial = self._run(1)
+        self.assertEqual(serial, self._run(3))
+        self.assertTrue(all(value is not None for value in serial))
+
+    def test_evaluation_context_reaches_the_workers(self):
+        values = self._run(3, _ContextProblem())
+        self.assertEqual(values, [value + 1000.0 for value in self._run(1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
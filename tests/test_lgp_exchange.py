@@ -0,0 +1,128 @@
+import queue
+import threading
+import unittest
+
+import numpy
+
+from conftest import Fitness, State, makeInstructionSet, populate
+from ec.SelectionMethod import SelectionMethod
+from ec.exchange.IslandExchange import IslandExchange
+from ec.util import Parameter
+
+
+class _Second(SelectionMethod):
+    '''always picks the second individual'''
+
+    def defaultBase(self):
+        return Parameter("second")
+
+    def produceIndex(self, subpopulation, state, thread):
+        return 1
+
+
+class _State(State):
+    R_SUCCESS = 0
+
+    def __init__(self, args, numSubpops=1, seed=3):
+        super().__init__([f"pop.subpops={numSubpops}"] + args, seed)
+        self.quitOnRunComplete = True
+        populate(self, makeInstructionSet(2), 10, numSubpops, evaluated=True)
+
+
+def _exchanger(state):
+    exchanger = IslandExchange()
+    exchanger.setup(state, Parameter("exch"))
+    exchanger.initializeContacts(state)
+    return exchanger
+
+
+class IslandExchangeTest(unittest.TestCase):
+
+    def tearDown(self):
+        IslandExchange.connect(None, None)
+
+    def test_subpopulations_migrate_along_a_ring(self):
+        state = _State(["exch.mod=2", "exch.start=1", "exch.size=2"], numSubpops=3)
+        exchanger = _exchanger(state)
+        best = [[ind.getGenome() for ind in subpop.individuals[:2]] for subpop in state.population.subpops]
+
+        exchanger.preBreedingExchangePopulation(state)
+        self.assertTrue(all(len(inbox) == 0 for inbox in exchanger.inboxes))
+        for subpop in state.population.subpops:
+            self.assertEqual([ind.fitness.value for ind in subpop.individuals], [float(x) for x in range(10)])
+
+        state.generation = 1
+        exchanger.preBreedingExchangePopulation(state)
+        for x, subpop in enumerate(state.population.subpops):
+            # the two best of the previous subpopulation replaced the two worst
+            migrants = subpop.individuals[8:]
+            self.assertEqual([ind.fitness.value for ind in migrants], [0.0, 1.0])
+            for ind, genome in zip(migrants, best[(x - 1) % 3]):
+                numpy.testing.assert_array_equal(ind.getInstructions(), genome[0])
+                self.assertTrue(ind.evaluated)
+
+    def test_explicit_destinations(self):
+        state = _State(["exch.mod=1", "exch.start=0", "exch.island.0.num-dest=2", "exch.island.0.dest.0=1",
+                        "exch.island.0.dest.1=2", "exch.island.1.num-dest=0", "exch.island.2.num-dest=0"],
+                       numSubpops=3)
+        exchanger = _exchanger(state)
+        exchanger.preBreedingExchangePopulation(state)
+        values = [[ind.fitness.value for ind in subpop.individuals] for subpop in state.population.subpops]
+        self.assertEqual(values[0][-1], 9.0)
+        self.assertEqual(values[1][-1], 0.0)
+        self.assertEqual(values[2][-1], 0.0)
+
+    def test_migrants_replace_distinct_individuals(self):
+        state = _State(["exch.mod=1", "exch.start=0", "exch.size=5",
+                        "exch.select-to-die=ec.select.TournamentSelection",
+                        "exch.select-to-die.size=2", "exch.select-to-die.pick-worst=true"], numSubpops=2)
+        exchanger = _exchanger(state)
+        initial = [list(subpop.individuals) for subpop in state.population.subpops]
+        exchanger.preBreedingExchangePopulation(state)
+        for individuals, subpop in zip(initial, state.population.subpops):
+            self.assertEqual(sum(ind is not old for ind, old in zip(subpop.individuals, individuals)), 5)
+
+        # a selection picking the same individual again and again: the worst ones are taken
+        exchanger.selectToDie = _Second()
+        initial = list(state.population.subpops[0].individuals)
+        exchanger.immigrate(state, 0, [(ind.getGenome(), Fitness(-1.0)) for ind in initial[:3]])
+        replaced = [i for i, ind in enumerate(state.population.subpops[0].individuals) if ind is not initial[i]]
+        worst = sorted(range(10), key=lambda i: initial[i].fitness.value)[-2:]
+        self.assertEqual(sorted(replaced), sorted([1] + worst))
+
+    def test_islands_exchange_without_waiting(self):
+        mailboxes = [queue.Queue(4), queue.Queue(4)]
+        stop = threading.Event()
+        IslandExchange.connect(mailboxes, stop)
+        args = ["exch.num-islands=2", "exch.mod=1", "exch.start=0", "exch.topology=complete"]
+        sender = _State(args + ["exch.island-id=0"], seed=3)
+        receiver = _State(args + ["exch.island-id=1"], seed=4)
+        for ind in receiver.population.subpops[0].individuals:
+            ind.fitness.value += 1.0
+        first = _exchanger(sender)
+        second = _exchanger(receiver)
+
+        # nothing has arrived yet: the receiver does not wait
+        second.receive(receiver)
+        self.assertEqual(receiver.population.subpops[0].individuals[-1].fitness.value, 10.0)
+
+        first.preBreedingExchangePopulation(sender)
+        self.assertEqual(mailboxes[1].qsize(), 1)
+        second.receive(receiver)
+        migrant = receiver.population.subpops[0].individuals[-1]
+        self.assertEqual(migrant.fitness.value, 0.0)
+        numpy.testing.assert_array_equal(migrant.getInstructions(),
+                                         sender.population.subpops[0].individuals[0].getInstructions())
+
+        # a full mailbox drops the migration instead of blocking the sender
+        for _ in range(6):
+            first.preBreedingExchangePopulation(sender)
+        self.assertEqual(mailboxes[1].qsize(), 4)
+
+        self.assertIsNone(second.runComplete(receiver))
+        stop.set()
+        self.assertIsNotNone(second.runComplete(receiver))
+
+
+if __name__ == "__main__":
+    unittest.main()
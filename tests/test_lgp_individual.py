@@ -0,0 +1,217 @@
+import unittest
+
+import numpy
+
+from conftest import Fitness, State, makeInstructionSet
+from ec.Species import Species
+from ec.Subpopulation import Subpopulation
+from lgp.individual.GPNode import GPNode, GPNodeGaterer
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+from lgp.individual.LGPInterpreter import LGPInterpreter
+from lgp.individual.reproduce.LGPNodeSelector import LGPNodeSelector
+
+
+def _makeIndividual(seed=42):
+    ind = LGPIndividual()
+    ind.instructionSet = makeInstructionSet(3, numpy.arange(1.0, 5.01, 0.2))
+    ind.rebuildIndividual(State(seed=seed), 0)
+    return ind
+
+
+class LGPIndividualTest(unittest.TestCase):
+
+    def test_random_individual_within_initial_length(self):
+        ind = _makeIndividual()
+        self.assertTrue(ind.initMinNumTrees <= ind.getTreesLength() <= ind.initMaxNumTrees)
+        self.assertEqual(ind.instructions.shape[1], LGPIndividual.NUMCOLUMNS)
+
+    def test_gptree_conversion_is_lossless(self):
+        ind = _makeIndividual()
+        other = ind.clone()
+        other.setTrees(ind.getTrees())
+        numpy.testing.assert_array_equal(ind.instructions, other.instructions)
+
+    def test_clone_does_not_share_instructions(self):
+        ind = _makeIndividual()
+        other = ind.clone()
+        other.instructions[0, LGPIndividual.DEST] = (ind.instructions[0, LGPIndividual.DEST] + 1) % 8
+        self.assertNotEqual(ind.instructions[0, LGPIndividual.DEST], other.instructions[0, LGPIndividual.DEST])
+
+    def test_clone_copies_on_write(self):
+        ind = _makeIndividual()
+        ind.getEffectiveMask()
+        other = ind.clone()
+        self.assertIs(other.getGenome()[0], ind.getGenome()[0])
+        original = ind.instructions.copy()
+        row = other.getGenome()[0][0].copy()
+        row[LGPIndividual.DEST] = (row[LGPIndividual.DEST] + 1) % 8
+        other.setInstruction(0, row)
+        numpy.testing.assert_array_equal(ind.instructions, original)
+        self.assertEqual(other.getGenome()[0][0, LGPIndividual.DEST], row[LGPIndividual.DEST])
+
+        tree = ind.getTree(0)
+        copied = tree.clone()
+        self.assertTrue(copied.treeEquals(tree))
+        self.assertIsNot(copied.child.children[0], tree.child.children[0])
+        self.assertIs(copied.child.children[0].parent, copied.child)
+
+    def test_structural_hash(self):
+        ind = _makeIndividual()
+        other = ind.clone()
+        self.assertEqual(ind, other)
+        self.assertEqual(hash(ind), hash(other))
+        row = ind.instructions[0].copy()
+        row[LGPIndividual.DEST] = (row[LGPIndividual.DEST] + 1) % 8
+        other.setInstruction(0, row)
+        self.assertNotEqual(ind, other)
+        self.assertEqual(len({ind, ind.clone(), other}), 2)
+
+    def test_structural_hash_is_updated_incrementally(self):
+        ind = _makeIndividual(5)
+        original = ind.clone()
+        ind.getStructuralKey()
+        rng = numpy.random.default_rng(5)
+        for _ in range(100):
+            n = ind.getTreesLength()
+            action = rng.integers(4)
+            if action == 0 and n > 2:
+                ind.removeInstructions(int(rng.integers(n - 2)), int(rng.integers(1, 3)))
+            elif action == 1:
+                ind.insertInstructions(int(rng.integers(n + 1)), ind.instructionSet.randomInstructions(rng, 2))
+            elif action == 2 and n > 3:
+                ind.replaceInstructions(int(rng.integers(n - 3)), int(rng.integers(1, 4)),
+                                        ind.instructionSet.randomInstructions(rng, int(rng.integers(4))))
+            else:
+                ind.setInstruction(int(rng.integers(n)), ind.instructionSet.randomInstructions(rng, 1)[0])
+            fresh = original.clone()
+            fresh.setInstructions(ind.getInstructions().copy())
+            self.assertIsNotNone(ind.structuralHash)
+            self.assertEqual(ind.getStructuralKey(), fresh.getStructuralKey())
+        # back to the original program, back to its key
+        ind.replaceInstructions(0, ind.getTreesLength(), original.getInstructions())
+        self.assertEqual(ind.getStructuralKey(), original.getStructuralKey())
+
+    def test_populate_rejects_duplicates(self):
+        species = Species()
+        species.i_prototype = _makeIndividual()
+        species.i_prototype.initMinNumTrees = species.i_prototype.initMaxNumTrees = 1
+        species.i_prototype.instructionSet.numregisters = 2
+        species.i_prototype.instructionSet.setFunctions([LGPInstructionSet.FUNCTIONS["Sin"]])
+        species.f_prototype = Fitness()
+        state = State(seed=3)
+
+        subpop = Subpopulation()
+        subpop.species = species
+        subpop.individuals = [None] * 30
+        subpop.populate(state, 0)
+        duplicates = 30 - len(set(subpop.individuals))
+
+        subpop.numDuplicateRetries = 100
+        subpop.populate(state, 0)
+        # there are fewer than 30 distinct one-instruction programs, but far more than without retries
+        self.assertLess(30 - len(set(subpop.individuals)), duplicates)
+        self.assertNotIn(None, subpop.individuals)
+
+    def test_tree_view_shape(self):
+        ind = _makeIndividual()
+        tree = ind.getTree(0)
+        self.assertIs(tree.owner, ind)
+        self.assertEqual(tree.child.getIndex(), ind.instructions[0, LGPIndividual.DEST])
+        self.assertTrue(str(tree).startswith(" (R"))
+
+    def test_tree_node_index(self):
+        ind = _makeIndividual()
+        tree = ind.getTree(0)
+        for nodesearch in GPNode.INDEXED_NODESEARCHES:
+            self.assertEqual(tree.numNodes(nodesearch), tree.child.numNodes(nodesearch))
+            for p in range(tree.numNodes(nodesearch)):
+                g = GPNodeGaterer()
+                tree.child.nodeInPosition(p, g, nodesearch)
+                self.assertIs(tree.nodeInPosition(p, nodesearch), g.node)
+        self.assertEqual(tree.subtreeSize(tree.child), tree.numNodes(GPNode.NODESEARCH_ALL))
+
+        # replacing a node drops the index
+        function = tree.child.children[0]
+        replacement = ind.getTree(0).child.children[0]
+        replacement.children[0].replaceWith(ind.instructionSet.operandToGPNode(0))
+        function.replaceWith(replacement)
+        self.assertIs(tree.nodeInPosition(1, GPNode.NODESEARCH_ALL), replacement)
+
+        selector = LGPNodeSelector()
+        selector.rootProbability = 1.0
+        self.assertIs(selector.pickNode(State(seed=1), 0, 0, ind, tree), tree.child)
+        selector.rootProbability = 0.0
+        selector.readRegisterProbability = 1.0
+        self.assertIn(selector.pickNode(State(seed=1), 0, 0, ind, tree),
+                      tree.getNodes(GPNode.NODESEARCH_READREG) or tree.getNodes(GPNode.NODESEARCH_ALL))
+
+
+class LGPEffectiveCodeTest(unittest.TestCase):
+
+    def _fullStatus(self, ind):
+        other = LGPIndividual()
+        other.instructionSet = ind.instructionSet
+        other.setOutputRegisters(ind.getOutputRegisters())
+        other.setInstructions(ind.instructions.copy())
+        other.getEffectiveMask()
+        return other
+
+    def test_effective_mask(self):
+        ind = _makeIndividual()
+        add = ind.instructionSet.functions.index(LGPInstructionSet.FUNCTIONS["Add"])
+        start = ind.instructionSet.inputStart
+        ind.setOutputRegisters([0])
+        ind.setInstructions([[add, 1, start, start],   # R1 = In0 + In0
+                             [add, 2, 1, 1],           # R2 = R1 + R1, intron
+                             [add, 0, 1, start],       # R0 = R1 + In0
+                             [add, 1, 0, 0]])          # R1 = R0 + R0, intron
+        self.assertEqual(ind.getEffectiveMask().tolist(), [True, False, True, False])
+        self.assertEqual(ind.getEffTreesLength(), 2)
+        self.assertEqual(ind.getLiveRegisters(2), 0b10)
+
+        # an intron edit leaves the live sets upstream untouched
+        ind.liveRegisters[0] = 0b1000000
+        ind.setInstruction(3, [add, 2, 0, 0])
+        self.assertEqual(ind.getEffectiveMask().tolist(), [True, False, True, False])
+        self.assertEqual(ind.getLiveRegisters(0), 0b1000000)
+
+    def test_incremental_update_matches_full_pass(self):
+        ind = _makeIndividual(3)
+        ind.setOutputRegisters([0, 3])
+        rng = numpy.random.default_rng(3)
+        for _ in range(200):
+            n = ind.getTreesLength()
+            action = rng.integers(4)
+            if action == 0 and n > 2:
+                ind.removeInstructions(int(rng.integers(n - 2)), int(rng.integers(1, 3)))
+            elif action == 1:
+                ind.insertInstructions(int(rng.integers(n + 1)), ind.instructionSet.randomInstructions(rng, 2))
+            elif action == 2 and n > 3:
+                ind.replaceInstructions(int(rng.integers(n - 3)), int(rng.integers(1, 4)),
+                                        ind.instructionSet.randomInstructions(rng, int(rng.integers(4))))
+            else:
+                ind.setInstruction(int(rng.integers(n)), ind.instructionSet.randomInstructions(rng, 1)[0])
+            if rng.random() < 0.3:
+                full = self._fullStatus(ind)
+                numpy.testing.assert_array_equal(ind.getEffectiveMask(), full.effective)
+                numpy.testing.assert_array_equal(ind.liveRegisters, full.liveRegisters)
+        numpy.testing.assert_array_equal(ind.getEffectiveMask(), self._fullStatus(ind).effective)
+
+    def test_effective_initialization(self):
+        ind = _makeIndividual()
+        ind.effectiveInitial = True
+        state = State(seed=5)
+        for _ in range(20):
+            ind.rebuildIndividual(state, 0)
+            self.assertTrue(ind.getEffectiveMask().all())
+
+    def test_introns_do_not_change_outputs(self):
+        ind = _makeIndividual(11)
+        interpreter = LGPInterpreter(ind.instructionSet, numpy.random.default_rng(1).normal(size=(3, 20)))
+        full = interpreter.execute(ind.instructions)[ind.getOutputRegisters()].copy()
+        numpy.testing.assert_array_equal(full, interpreter.executeIndividual(ind))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import pickle
+import unittest
+
+import numpy
+
+from conftest import State, makeInstructionSet
+from lgp.individual.LGPCompiler import LGPCompiler
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+from lgp.individual.LGPInterpreter import LGPInterpreter
+from lgp.individual.primitive.FunctionGPNode import FunctionGPNode
+
+
+class _Data(object):
+    x = None
+
+
+def _makeInstructionSet():
+    return makeInstructionSet(3, numpy.arange(0.0, 5.01, 0.2))
+
+
+class LGPInterpreterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.iset = _makeInstructionSet()
+        self.inputs = numpy.random.default_rng(0).normal(size=(3, 50))
+        self.state = State(seed=7)
+
+    def _newIndividual(self):
+        ind = LGPIndividual()
+        ind.instructionSet = self.iset
+        ind.initMaxNumTrees = 60
+        ind.rebuildIndividual(self.state, 0)
+        return ind
+
+    def test_matches_tree_evaluation_per_case(self):
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        for _ in range(20):
+            ind = self._newIndividual()
+            registers = interpreter.execute(ind.instructions).copy()
+            for case in (0, 17, 49):
+                single = LGPInterpreter(self.iset, self.inputs[:, case:case + 1])
+                for tree in ind.getTrees():
+                    tree.child.eval(None, 0, _Data(), ind, single)
+                numpy.testing.assert_allclose(registers[:, case], single.registers[:, 0])
+
+    def test_registers_are_reset(self):
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        ind = self._newIndividual()
+        first = interpreter.execute(ind.instructions).copy()
+        second = interpreter.execute(ind.instructions)
+        numpy.testing.assert_array_equal(first, second)
+
+    def test_protected_division(self):
+        self.iset.constants = numpy.array([0.0, 2.0])
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        div = self.iset.functions.index(LGPInstructionSet.FUNCTIONS["Div"])
+        start = self.iset.constantStart
+        registers = interpreter.execute(numpy.array([[div, 0, start + 1, start]], dtype=numpy.int32))
+        numpy.testing.assert_array_equal(registers[0], 1.0)
+
+    def test_functions_must_define_execute(self):
+        class Missing(FunctionGPNode):
+            pass
+        with self.assertRaises(TypeError):
+            Missing()
+
+    def test_node_evaluations(self):
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        ind = self._newIndividual()
+        interpreter.executeIndividual(ind)
+        interpreter.execute(ind.instructions)
+        self.assertEqual(interpreter.nodeEvaluations, (ind.getEffTreesLength() + ind.getTreesLength()) * 50)
+
+    def test_compiled_programs_match_the_interpreter(self):
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        compiled = LGPInterpreter(self.iset, self.inputs, LGPCompiler(self.iset))
+        for _ in range(20):
+            ind = self._newIndividual()
+            numpy.testing.assert_array_equal(compiled.execute(ind.instructions), interpreter.execute(ind.instructions))
+            numpy.testing.assert_array_equal(compiled.executeIndividual(ind), interpreter.executeIndividual(ind))
+        self.assertEqual(compiled.nodeEvaluations, interpreter.nodeEvaluations)
+
+    def test_compiled_programs_are_cached(self):
+        compiler = LGPCompiler(self.iset, cacheSize=2)
+        ind = self._newIndividual()
+        program = compiler.compile(ind.getEffectiveInstructions())
+        # a clone carried to the next generation runs the same function
+        self.assertIs(compiler.compile(ind.clone().getEffectiveInstructions()), program)
+        self.assertEqual((compiler.hits, compiler.misses), (1, 1))
+
+        others = [self._newIndividual().instructions for _ in range(2)]
+        for instructions in others:
+            compiler.compile(instructions)
+        self.assertEqual(len(compiler.cache), 2)
+        self.assertIsNot(compiler.compile(ind.getEffectiveInstructions()), program)
+
+        # compiled functions are not pickled, the copy compiles them again
+        copy = pickle.loads(pickle.dumps(compiler))
+        self.assertEqual(len(copy.cache), 0)
+        interpreter = LGPInterpreter(self.iset, self.inputs)
+        numpy.testing.assert_array_equal(LGPInterpreter(self.iset, self.inputs, copy).execute(others[0]),
+                                         interpreter.execute(others[0]))
+
+    def test_compiled_source(self):
+        add = self.iset.functions.index(LGPInstructionSet.FUNCTIONS["Add"])
+        sin = self.iset.functions.index(LGPInstructionSet.FUNCTIONS["Sin"])
+        start = self.iset.inputStart
+        constant = self.iset.constantStart + 1
+        source = LGPCompiler(self.iset).toSource(numpy.array([[add, 2, start, constant],
+                                                              [sin, 0, 2, LGPInstructionSet.NOOPERAND]]))
+        self.assertEqual(source, "def program(registers, inputs):\n"
+                                 "    r0 = registers[0]\n"
+                                 "    r2 = registers[2]\n"
+                                 "    x0 = inputs[0]\n"
+                                 f"    f{add}(r2, x0, 0.2)\n"
+                                 f"    f{sin}(r0, r2)\n")
+
+    def test_non_finite_constants_compile(self):
+        self.iset.constants = numpy.array([numpy.nan, numpy.inf, -numpy.inf, 0.5])
+        add = self.iset.functions.index(LGPInstructionSet.FUNCTIONS["Add"])
+        start, constant = self.iset.inputStart, self.iset.constantStart
+        instructions = numpy.array([[add, 0, start, constant + 3],
+                                    [add, 1, start, constant],
+                                    [add, 2, start, constant + 1],
+                                    [add, 3, start, constant + 2]])
+        compiler = LGPCompiler(self.iset)
+        self.assertIn("float('nan')", compiler.toSource(instructions))
+        self.assertIn("float('-inf')", compiler.toSource(instructions))
+        numpy.testing.assert_array_equal(LGPInterpreter(self.iset, self.inputs, compiler).execute(instructions),
+                                         LGPInterpreter(self.iset, self.inputs).execute(instructions))
+
+
+if __name__ == "__main__":
+    unittest.main()
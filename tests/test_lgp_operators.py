@@ -0,0 +1,115 @@
+import unittest
+
+import numpy
+
+from conftest import State, makeInstructionSet, populate
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+
+
+class _State(State):
+    def __init__(self, args, seed=7):
+        super().__init__(args, seed)
+        populate(self, makeInstructionSet(3, numpy.arange(1.0, 5.01, 0.5)), 30, numTrees=(1, 20))
+
+
+_SELECT = ["pop.subpop.0.species.pipe.source.0=ec.select.TournamentSelection",
+           "select.tournament.size=3"]
+
+
+def _pipeline(state, base="pop.subpop.0.species.pipe"):
+    p = Parameter(base)
+    pipe = state.parameters.getInstanceForParameter(p, None, object)
+    pipe.setup(state, p)
+    return pipe
+
+
+def _produce(state, pipe, n=40):
+    inds = [None] * n
+    produced = 0
+    while produced < n:
+        produced += pipe.produce(1, n - produced, produced, 0, inds, state, 0)
+    return inds
+
+
+class LGPOperatorTest(unittest.TestCase):
+
+    def _checkOffspring(self, state, inds):
+        parents = state.population.subpops[0].individuals
+        for ind in inds:
+            self.assertIsInstance(ind, LGPIndividual)
+            self.assertTrue(ind.minNumTrees <= ind.getTreesLength() <= ind.maxNumTrees)
+            self.assertFalse(any(ind is parent for parent in parents))
+            # the cached effective code matches the one computed from scratch
+            fresh = ind.clone()
+            fresh.setInstructions(ind.getInstructions().copy())
+            numpy.testing.assert_array_equal(ind.getEffectiveMask(), fresh.getEffectiveMask())
+        keys = {parent.getStructuralKey() for parent in parents}
+        self.assertTrue(any(ind.getStructuralKey() not in keys for ind in inds))
+
+    def test_mutations(self):
+        for name in ("LGPMicroMutationPipeline", "LGPMacroMutationPipeline", "LGPSwapPipeline"):
+            state = _State(_SELECT + [f"pop.subpop.0.species.pipe=lgp.individual.reproduce.{name}",
+                                      "lgp.macromut.step=3"])
+            parents = [ind.getInstructions().copy() for ind in state.population.subpops[0].individuals]
+            self._checkOffspring(state, _produce(state, _pipeline(state)))
+            for ind, genome in zip(state.population.subpops[0].individuals, parents):
+                numpy.testing.assert_array_equal(ind.getInstructions(), genome)
+
+    def test_crossover(self):
+        state = _State(_SELECT + ["pop.subpop.0.species.pipe=lgp.individual.reproduce.LGP2PointCrossoverPipeline",
+                                  "pop.subpop.0.species.pipe.source.1=same",
+                                  "lgp.2pcross.maxseglength=5",
+                                  "lgp.2pcross.micro_base=lgp.micromut",
+                                  "lgp.micromut=lgp.individual.reproduce.LGPMicroMutationPipeline",
+                                  "lgp.micromut.source.0=ec.select.TournamentSelection"])
+        pipe = _pipeline(state)
+        self.assertIsNotNone(pipe.microMutation)
+        self._checkOffspring(state, _produce(state, pipe, 41))
+
+    def test_multibreeding_splits_the_batch(self):
+        state = _State(["pop.subpop.0.species.pipe=ec.breed.MultiBreedingPipeline",
+                        "pop.subpop.0.species.pipe.num-sources=2",
+                        "pop.subpop.0.species.pipe.source.0=ec.breed.ReproductionPipeline",
+                        "pop.subpop.0.species.pipe.source.0.prob=0.25",
+                        "pop.subpop.0.species.pipe.source.0.source.0=ec.select.TournamentSelection",
+                        "pop.subpop.0.species.pipe.source.1=lgp.individual.reproduce.LGPSwapPipeline",
+                        "pop.subpop.0.species.pipe.source.1.prob=0.75",
+                        "pop.subpop.0.species.pipe.source.1.source.0=ec.select.TournamentSelection",
+                        "select.tournament.size=2"])
+        pipe = _pipeline(state)
+        inds = [None] * 400
+        self.assertEqual(pipe.produce(1, 400, 0, 0, inds, state, 0), 400)
+        keys = {parent.getStructuralKey() for parent in state.population.subpops[0].individuals}
+        copies = sum(ind.getStructuralKey() in keys for ind in inds)
+        self.assertTrue(50 < copies < 150)
+
+    def test_multibreeding_with_zero_probability_sources(self):
+        # the probabilities of the shipped parameter file
+        args = ["pop.subpop.0.species.pipe=ec.breed.MultiBreedingPipeline",
+                "pop.subpop.0.species.pipe.num-sources=5", "select.tournament.size=2"]
+        for x, prob in enumerate([0.0, 0.6, 0.3, 0.1, 0.0]):
+            source = f"pop.subpop.0.species.pipe.source.{x}"
+            name = "ec.breed.ReproductionPipeline" if x % 2 else "lgp.individual.reproduce.LGPSwapPipeline"
+            args += [f"{source}={name}", f"{source}.prob={prob}", f"{source}.source.0=ec.select.TournamentSelection"]
+        state = _State(args)
+        pipe = _pipeline(state)
+        self.assertTrue((pipe.probabilities >= 0.0).all())
+        self.assertEqual((pipe.probabilities[0], pipe.probabilities[4]), (0.0, 0.0))
+        inds = [None] * 100
+        self.assertEqual(pipe.produce(1, 100, 0, 0, inds, state, 0), 100)
+        self.assertNotIn(None, inds)
+
+    def test_tournament_selection(self):
+        state = _State(_SELECT + ["pop.subpop.0.species.pipe=ec.breed.ReproductionPipeline",
+                                  "select.tournament.size=30"])
+        pipe = _pipeline(state)
+        individuals = state.population.subpops[0].individuals
+        chosen = _produce(state, pipe, 200)
+        # with replacement, 30 draws out of 30 miss the best individual with probability ~0.36
+        self.assertGreater(sum(ind.fitness.value == 0.0 for ind in chosen), 100)
+        self.assertTrue(all(ind is not individuals[0] for ind in chosen))
+
+
+if __name__ == "__main__":
+    unittest.main()
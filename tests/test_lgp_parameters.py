@@ -0,0 +1,96 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from ec.util import Parameter, ParameterDatabase
+from ec.util.ClassRegistry import ClassRegistry
+
+
+class ParameterDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, "base"))
+        self._write("base/grandparent.params", "a = 1\nb = 1\nc = 1\nd = 1\n")
+        self._write("base/second.params", "c = 2\nd = 2\n")
+        self._write("base/first.params", "parent.0 = grandparent.params\nb = 3\n")
+        self._write("child.params",
+                    "parent.0 = base/first.params\nparent.1 = base/second.params\n"
+                    "a = 4  # comment\nflag = True\nout = $result.stat\nlocal = data.csv\n"
+                    "targets.0 = 3\ntargets.1 = 5\n")
+        self.db = ParameterDatabase(os.path.join(self.directory, "child.params"), ["-p", "e = 6"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, text):
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(text)
+
+    def test_inheritance_order(self):
+        values = [self.db.getInt(Parameter(k)) for k in "abcde"]
+        # child > parent.0 (and its own parents) > parent.1
+        self.assertEqual(values, [4, 3, 1, 1, 6])
+        self.assertFalse(self.db.exists(Parameter("parent.0")))
+
+    def test_default_parameter_fallback(self):
+        self.assertEqual(self.db.getInt(Parameter("missing"), Parameter("a")), 4)
+        self.assertEqual(self.db.getIntWithDefault(Parameter("missing"), Parameter("missing2"), 9), 9)
+        self.assertTrue(self.db.getBoolean(Parameter("flag"), None, False))
+        self.assertTrue(self.db.exists(Parameter("missing"), Parameter("a")))
+
+    def test_typed_values_are_cached(self):
+        self.assertEqual(self.db.getDouble(Parameter("a")), 4.0)
+        self.db.params["a"] = "7"
+        self.assertEqual(self.db.getDouble(Parameter("a")), 4.0)
+        self.db.set(Parameter("a"), 7)
+        self.assertEqual(self.db.getDouble(Parameter("a")), 7.0)
+
+    def test_children(self):
+        self.assertEqual(sorted(self.db.getChildren(Parameter("targets"))), ["0", "1"])
+        self.assertEqual(self.db.getChildren(Parameter("nothing.here")), [])
+
+    def test_files(self):
+        self.assertEqual(self.db.getFile(Parameter("out")), os.path.join(os.getcwd(), "result.stat"))
+        self.assertEqual(self.db.getFile(Parameter("local")), os.path.join(self.directory, "data.csv"))
+
+    def test_accessed_parameters(self):
+        self.db.getInt(Parameter("missing"), Parameter("b"))
+        self.assertIn("b", self.db.listAccessed())
+        self.assertNotIn("c", self.db.listAccessed())
+        self.assertIn("c", self.db.listNotAccessed())
+
+
+    def test_class_resolution(self):
+        from ec.simple.SimpleEvaluator import SimpleEvaluator
+        from lgp.individual.LGPIndividual import LGPIndividual
+        from lgp.individual.primitive.Add import Add
+        self.db.set(Parameter("eval"), "ec.simple.SimpleEvaluator")
+        self.db.set(Parameter("ind"), "zhixing.symbreg_multitarget.individual.LGPIndividual4SRMT")
+        self.db.set(Parameter("func"), "zhixing.symbolicregression.individual.primitive.Add")
+        self.assertIsInstance(self.db.getInstanceForParameter(Parameter("eval"), None, object), SimpleEvaluator)
+        self.assertIs(self.db.getClassForParameter(Parameter("ind"), None, object), LGPIndividual)
+        self.assertIs(self.db.getClassForParameter(Parameter("func"), None, object), Add)
+        # resolved once
+        self.assertIs(ClassRegistry._classes["ec.simple.SimpleEvaluator"], SimpleEvaluator)
+        with self.assertRaises(ValueError):
+            self.db.getInstanceForParameter(Parameter("func"), None, LGPIndividual)
+
+    def test_import_errors_of_a_class_module_are_reported(self):
+        os.mkdir(os.path.join(self.directory, "brokenpackage"))
+        self._write("brokenpackage/Broken.py", "import missing_dependency_of_broken\n\nclass Broken:\n    pass\n")
+        sys.path.insert(0, self.directory)
+        try:
+            with self.assertRaises(ImportError) as raised:
+                ClassRegistry.resolve("brokenpackage.Broken")
+            self.assertEqual(raised.exception.name, "missing_dependency_of_broken")
+        finally:
+            sys.path.remove(self.directory)
+            for name in ("brokenpackage.Broken", "brokenpackage"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
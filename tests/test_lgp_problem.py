@@ -0,0 +1,84 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from conftest import State
+from ec.util import Parameter, ParameterDatabase
+from ec.util.Output import Output
+from ec.util.SharedData import SharedData
+from tasks.SupervisedProblem import SupervisedProblem
+
+
+class _Problem(SupervisedProblem):
+    def evaluate(self, state, ind, subpopulation, threadnum):
+        pass
+
+
+class SupervisedProblemTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dataset = numpy.arange(70, dtype=float).reshape(14, 5)
+        with open(os.path.join(self.directory, "data.csv"), "w") as f:
+            f.write("a,b,c,d,e\n")
+            for row in self.dataset:
+                f.write(",".join(str(v) for v in row) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        SharedData.clear()
+
+    def _problem(self, *args):
+        state = State([f"eval.problem.location={self.directory}", "eval.problem.dataname=data",
+                        "eval.problem.Kfold_num=3", "eval.problem.target_num=2",
+                        "eval.problem.targets.0=4", "eval.problem.targets.1=1"] + list(args))
+        problem = _Problem()
+        problem.setup(state, Parameter("eval.problem"))
+        return problem
+
+    def test_kfold_split(self):
+        folds = [self._problem(f"eval.problem.Kfold_index={k}") for k in range(3)]
+        test = numpy.concatenate([p.testTargets[0] for p in folds])
+        numpy.testing.assert_array_equal(numpy.sort(test), self.dataset[:, 4])
+        for p in folds:
+            self.assertEqual(p.getNumInputs(), 3)
+            self.assertEqual(p.numTrainingCases + p.numTestCases, 14)
+            # the rows of a case stay together: features 0, 2, 3 and targets 4, 1
+            numpy.testing.assert_array_equal(p.trainingInputs[0] + 1, p.trainingTargets[1])
+            numpy.testing.assert_array_equal(p.trainingInputs[2] + 1, p.trainingTargets[0])
+            for matrix in (p.trainingInputs, p.trainingTargets, p.testInputs, p.testTargets):
+                self.assertTrue(matrix.flags.c_contiguous)
+                self.assertFalse(matrix.flags.writeable)
+                self.assertEqual(matrix.dtype, numpy.float64)
+
+    def test_data_is_shared_and_not_pickled(self):
+        problem = self._problem()
+        self.assertIs(problem.trainingInputs, self._problem().trainingInputs)
+        copied = pickle.loads(pickle.dumps(problem))
+        self.assertIsNone(copied._data)
+        self.assertIs(copied.trainingInputs, problem.trainingInputs)
+
+    def test_memmap(self):
+        problem = self._problem("eval.problem.memmap=true", f"eval.problem.memmap-dir={self.directory}")
+        self.assertIsInstance(problem.trainingInputs, numpy.memmap)
+        reference = self._problem()
+        SharedData.clear()
+        copied = pickle.loads(pickle.dumps(problem))
+        self.assertIsInstance(copied.testTargets, numpy.memmap)
+        numpy.testing.assert_array_equal(copied.testTargets, reference.testTargets)
+
+    def test_preload(self):
+        parameters = ParameterDatabase(None, [f"eval.problem.location={self.directory}", "eval.problem.dataname=data"])
+        _Problem.preloadData(parameters, Parameter("eval.problem"))
+        problem = _Problem()
+        problem.setupData(parameters, Parameter("eval.problem"), Output())
+        self.assertTrue(SharedData.contains(problem.dataKey()))
+        self.assertEqual(problem.numTestCases, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
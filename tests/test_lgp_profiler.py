@@ -0,0 +1,117 @@
+import json
+import os
+import pstats
+import random
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from conftest import State, makeInstructionSet, populate
+from ec.util import Parameter
+from ec.util.FitnessCache import FitnessCache
+from ec.util.Profiler import Profiler
+
+
+class _Evaluator(object):
+    def __init__(self):
+        self.numEvaluated = 0
+        self.cache = FitnessCache(1 << 20)
+
+
+class _State(State):
+    def __init__(self, args):
+        super().__init__(args, seed=5)
+        self.nodeEvaluation = 0
+        self.evaluator = _Evaluator()
+        self.profiler = Profiler()
+        self.profiler.setup(self, Parameter("profile"))
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def test_generation_records(self):
+        filename = os.path.join(self.directory, "profile.jsonl")
+        state = _State(["profile=true", "profile.memory=true", f"profile.file={filename}"])
+        profiler = state.profiler
+        profiler.startRun()
+        for generation in range(2):
+            state.generation = generation
+            profiler.startGeneration(state)
+            with profiler.phase(Profiler.EVALUATION):
+                blocks = [bytearray(1 << 16) for _ in range(16)]
+                state.evaluator.numEvaluated += 10
+                state.evaluator.cache.hits += 3
+                state.nodeEvaluation += 500
+            with profiler.phase(Profiler.BREEDING):
+                with profiler.source("0:LGPMicroMutationPipeline", 7):
+                    pass
+            with profiler.phase(Profiler.EVALUATION):
+                pass
+            profiler.endGeneration(state)
+        del blocks
+
+        record = profiler.records[1]
+        self.assertEqual(record["generation"], 1)
+        self.assertEqual((record["evaluations"], record["cache_hits"], record["node_evaluations"]), (10, 3, 500))
+        evaluation = record["phases"]["evaluation"]
+        self.assertEqual(evaluation["calls"], 2)
+        self.assertTrue(evaluation["wall"] >= 0.0 and evaluation["cpu"] >= 0.0)
+        self.assertTrue(evaluation["memory"] >= 16 << 16)
+        self.assertEqual(record["sources"]["0:LGPMicroMutationPipeline"]["individuals"], 7)
+
+        with open(filename) as f:
+            self.assertEqual([json.loads(line) for line in f], profiler.records)
+
+    def test_disabled_profiler_records_nothing(self):
+        state = _State([])
+        profiler = state.profiler
+        profiler.startGeneration(state)
+        with profiler.phase(Profiler.EVALUATION):
+            pass
+        profiler.endGeneration(state)
+        self.assertEqual(profiler.records, [])
+
+    def test_cprofile_dump(self):
+        filename = os.path.join(self.directory, "run.prof")
+        state = _State(["profile=true", f"profile.cprofile={filename}"])
+        state.profiler.startRun()
+        sorted(random.random() for _ in range(1000))
+        state.profiler.finishRun()
+        self.assertTrue(pstats.Stats(filename).total_calls > 0)
+
+    def test_breeding_sources_are_timed(self):
+        state = _State(["profile=true",
+                        "pop.subpop.0.species.pipe=ec.breed.MultiBreedingPipeline",
+                        "pop.subpop.0.species.pipe.num-sources=2",
+                        "pop.subpop.0.species.pipe.source.0=ec.breed.ReproductionPipeline",
+                        "pop.subpop.0.species.pipe.source.0.prob=0.5",
+                        "pop.subpop.0.species.pipe.source.0.source.0=ec.select.TournamentSelection",
+                        "pop.subpop.0.species.pipe.source.1=lgp.individual.reproduce.LGPSwapPipeline",
+                        "pop.subpop.0.species.pipe.source.1.prob=0.5",
+                        "pop.subpop.0.species.pipe.source.1.source.0=ec.select.TournamentSelection",
+                        "select.tournament.size=2"])
+        populate(state, makeInstructionSet(2), 10)
+        p = Parameter("pop.subpop.0.species.pipe")
+        pipe = state.parameters.getInstanceForParameter(p, None, object)
+        pipe.setup(state, p)
+
+        state.profiler.startGeneration(state)
+        inds = [None] * 40
+        self.assertEqual(pipe.produce(1, 40, 0, 0, inds, state, 0), 40)
+        state.profiler.endGeneration(state)
+        sources = state.profiler.records[0]["sources"]
+        self.assertEqual(set(sources), {"0:ReproductionPipeline", "1:LGPSwapPipeline"})
+        self.assertEqual(sum(source["individuals"] for source in sources.values()), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
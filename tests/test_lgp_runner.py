@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from deap import lgp
+from ec.Population import Population
+from ec.util import Parameter, ParameterDatabase
+from ec.util.ClassRegistry import ClassRegistry
+from ec.util.SharedData import SharedData
+
+
+_SHIPPED = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                        "tasks", "Symbreg", "parameters", "simpleLGP_SRMT.params")
+
+
+class _Initializer(object):
+    '''the shipped initializer (ec.gp.GPInitializer) has no port yet'''
+
+    def setup(self, state, base):
+        pass
+
+    def initialPopulation(self, state, thread):
+        population = Population()
+        population.setup(state, Parameter("pop"))
+        population.populate(state, thread)
+        return population
+
+
+class _Finisher(object):
+    def setup(self, state, base):
+        pass
+
+    def finishPopulation(self, state, result):
+        pass
+
+
+class JobRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "run.params")
+        with open(self.filename, "w") as f:
+            f.write("jobs = 3\nseed.0 = 4\nevalthreads = 2\n"
+                    "stat.file = $out.stat\nstat.child.0.file = $stats/outtabular.stat\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        SharedData.clear()
+
+    def test_job_arguments(self):
+        parameters = ParameterDatabase(self.filename)
+        args = lgp.jobArguments(parameters, 2, 3)
+        self.assertIn("seed.0=8", args)
+        self.assertIn("seed.1=9", args)
+        self.assertIn("stat.file=$job.2.out.stat", args)
+        self.assertIn("stat.child.0.file=$" + os.path.join("stats", "job.2.outtabular.stat"), args)
+        self.assertIn("checkpoint-prefix=job.2.ec", args)
+
+        state = ParameterDatabase(self.filename, args)
+        self.assertEqual(state.getInt(Parameter("seed.1")), 9)
+
+        # a single job keeps its file names
+        self.assertEqual(lgp.jobArguments(parameters, 0, 1), ["seed.0=4", "seed.1=5"])
+
+    def test_island_arguments(self):
+        parameters = ParameterDatabase(self.filename, ["exch=ec.exchange.IslandExchange", "exch.num-islands=4"])
+        self.assertEqual(lgp.numIslands(parameters), 4)
+        args = lgp.jobArguments(parameters, 1, 3, 2, 4)
+        # islands of all the jobs get their own seeds
+        self.assertIn("seed.0=16", args)
+        self.assertIn("stat.file=$job.1.island.2.out.stat", args)
+        self.assertIn("checkpoint-prefix=job.1.island.2.ec", args)
+        self.assertIn("exch.island-id=2", args)
+
+        parameters = ParameterDatabase(self.filename, ["exch=ec.simple.SimpleExchanger", "exch.num-islands=4"])
+        self.assertEqual(lgp.numIslands(parameters), 1)
+
+    def test_command_line(self):
+        self.assertEqual(lgp.parseArguments(["-file", "a.params", "-p", "jobs=2"]), ("a.params", None, ["jobs=2"]))
+        with self.assertRaises(SystemExit):
+            lgp.parseArguments(["-jobs", "2"])
+
+    def test_shared_data_is_loaded_once(self):
+        calls = []
+        def load():
+            calls.append(1)
+            return numpy.zeros(3)
+        first = SharedData.get("data.csv", load)
+        second = SharedData.get("data.csv", load)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(first.flags.writeable)
+
+    def test_jobs_run_end_to_end(self):
+        ClassRegistry.register("test.Initializer", _Initializer)
+        ClassRegistry.register("test.Finisher", _Finisher)
+        self.addCleanup(ClassRegistry._classes.pop, "test.Initializer")
+        self.addCleanup(ClassRegistry._classes.pop, "test.Finisher")
+        x = numpy.random.default_rng(0).uniform(-1.0, 1.0, size=(60, 2))
+        numpy.save(os.path.join(self.directory, "data.npy"), numpy.column_stack([x, x[:, 0] + x[:, 1]]))
+        with open(self.filename, "w") as f:
+            f.write(f"parent.0 = {os.path.abspath(_SHIPPED)}\n"
+                    "init = test.Initializer\nfinish = test.Finisher\nsilent = true\n"
+                    "jobs = 2\njob-processes = 2\ngenerations = 3\npop.subpop.0.size = 20\n"
+                    "breedthreads = 2\nevalthreads = 2\neval = ec.simple.ParallelEvaluator\n"
+                    f"eval.problem.location = {self.directory}\neval.problem.dataname = data\n"
+                    "eval.problem.targets.0 = 2\n"
+                    f"stat.file = {os.path.join(self.directory, 'out.stat')}\n"
+                    f"stat.child.0.file = {os.path.join(self.directory, 'outtabular.stat')}\n")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            lgp.main(["-file", self.filename])
+        self.assertEqual(out.getvalue(), "")
+
+        tables = []
+        for job in range(2):
+            with open(os.path.join(self.directory, f"job.{job}.out.stat")) as f:
+                self.assertIn("Best Individual of Run:", f.read())
+            table = numpy.genfromtxt(os.path.join(self.directory, f"job.{job}.outtabular.stat"),
+                                     delimiter=",", names=True)
+            numpy.testing.assert_array_equal(table["generation"], [0, 1, 2])
+            self.assertTrue((table["breeding_time"][:2] > 0.0).all())
+            tables.append(table)
+        # the jobs have their own seeds
+        self.assertFalse(numpy.array_equal(tables[0]["mean_fitness"], tables[1]["mean_fitness"]))
+
+    def test_unavailable_components_are_fatal(self):
+        # the shipped parameter file names an initializer that has no Python port yet
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), self.assertRaises(SystemExit) as raised:
+            lgp.main(["-file", _SHIPPED, "-p", "generations=1", "-p", "silent=true"])
+        self.assertIn("'init'", str(raised.exception.code))
+        self.assertEqual(out.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
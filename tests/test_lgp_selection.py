@@ -0,0 +1,100 @@
+import unittest
+
+import numpy
+
+from conftest import State
+from ec.Population import Population
+from ec.Subpopulation import Subpopulation
+from ec.multiobjective.MultiObjectiveFitness import MultiObjectiveFitness
+from ec.select.TournamentSelection import TournamentSelection
+from ec.util import Parameter
+
+
+class _Individual(object):
+    def __init__(self, fitness):
+        self.fitness = fitness
+
+
+class _State(State):
+    def __init__(self, objectives):
+        super().__init__(["select.tournament.size=3", "fitness.maximize=false",
+                          f"fitness.num-objectives={len(objectives[0])}"], seed=4)
+        subpop = Subpopulation()
+        subpop.individuals = [_Individual(self.newFitness(values)) for values in objectives]
+        self.population = Population()
+        self.population.subpops = [subpop]
+
+    def newFitness(self, values):
+        fitness = MultiObjectiveFitness()
+        fitness.setup(self, Parameter("fitness"))
+        fitness.setObjectives(self, values)
+        return fitness
+
+
+def _selection(state, pickWorst=False):
+    selection = TournamentSelection()
+    selection.setup(state, Parameter("select.tournament"))
+    selection.pickWorst = pickWorst
+    return selection.clone()
+
+
+class TournamentSelectionTest(unittest.TestCase):
+
+    def _checkWinners(self, state, selection, k):
+        individuals = state.population.subpops[0].individuals
+        indices = selection.produceIndices(k, 0, state, 0)
+        self.assertEqual(len(indices), k)
+        # every winner is the one betterThan would pick among the aspirants drawn
+        start = selection.nextTournament[0] - k
+        for aspirants, winner in zip(selection.aspirants[0][start:start + k].tolist(), indices.tolist()):
+            best = aspirants[0]
+            for j in aspirants[1:]:
+                if selection.pickWorst:
+                    if individuals[best].fitness.betterThan(individuals[j].fitness):
+                        best = j
+                elif individuals[j].fitness.betterThan(individuals[best].fitness):
+                    best = j
+            self.assertEqual(winner, best)
+
+    def test_vectorized_tournaments(self):
+        state = _State([[float(v)] for v in numpy.random.default_rng(0).integers(0, 5, size=40)])
+        for pickWorst in (False, True):
+            selection = _selection(state, pickWorst)
+            selection.prepareToProduce(state, 0, 0)
+            self.assertIn(0, selection.values)
+            self._checkWinners(state, selection, 25)
+            # more than a block of tournaments at once
+            self._checkWinners(state, selection, 100)
+            self.assertIsInstance(selection.produceIndex(0, state, 0), int)
+            selection.finishProducing(state, 0, 0)
+            self.assertNotIn(0, selection.values)
+
+    def test_replaced_individuals_win_their_tournaments(self):
+        state = _State([[float(x + 1)] for x in range(40)])
+        selection = _selection(state)
+        selection.prepareToProduce(state, 0, 0)
+        selection.drawTournaments(0, 40)
+        state.population.subpops[0].individuals[39] = _Individual(state.newFitness([0.0]))
+        selection.individualReplaced(state, 0, 0, 39)
+        aspirants = selection.aspirants[0]
+        indices = selection.produceIndices(len(aspirants), 0, state, 0)
+        numpy.testing.assert_array_equal(indices == 39, (aspirants == 39).any(axis=1))
+        self._checkWinners(state, selection, 10)
+
+    def test_pareto_fitnesses_are_compared_one_by_one(self):
+        state = _State([[float(x), float(-x)] for x in range(10)])
+        selection = _selection(state)
+        selection.prepareToProduce(state, 0, 0)
+        self.assertNotIn(0, selection.values)
+        indices = selection.produceIndices(20, 0, state, 0)
+        self.assertTrue(all(0 <= index < 10 for index in indices.tolist()))
+
+    def test_clones_do_not_share_tournaments(self):
+        state = _State([[float(x)] for x in range(10)])
+        selection = _selection(state)
+        selection.prepareToProduce(state, 0, 0)
+        self.assertEqual(selection.clone().values, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from conftest import State, makeInstructionSet, populate
+from ec.simple.SimpleEvaluator import SimpleEvaluator
+from ec.simple.SimpleStatistics import SimpleStatistics
+from ec.util import Parameter
+from ec.util.Profiler import Profiler
+from lgp.statistics.LGPStatistics import LGPStatistics
+
+
+class _Problem(object):
+    def __init__(self):
+        self.described = []
+
+    def describe(self, state, ind, subpopulation, threadnum, log=0):
+        self.described.append(ind.fitness.value)
+
+
+class _BatchProblem(_Problem):
+    '''the fitness on all the training cases is three times the size of the mini-batch one'''
+
+    def __init__(self):
+        super().__init__()
+        self.reevaluated = 0
+
+    def reevaluate(self, state, ind, subpopulation, threadnum):
+        ind.fitness.value = 3.0 * abs(ind.fitness.value)
+        self.reevaluated += 1
+
+
+class _Breeder(object):
+    def __init__(self):
+        self.numElites = [1]
+
+
+class _Evaluator(object):
+    def __init__(self):
+        self.p_problem = _Problem()
+
+
+class _State(State):
+    def __init__(self, args):
+        super().__init__(args, seed=2)
+        self.numGenerations = 2
+        self.nodeEvaluation = 0
+        self.evaluator = _Evaluator()
+        self.profiler = Profiler()
+        self.profiler.setup(self, Parameter("profile"))
+        populate(self, makeInstructionSet(2), 8, evaluated=True)
+
+
+class StatisticsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _statistics(self, args):
+        self.state = _State([f"stat.file={os.path.join(self.directory, 'out.stat')}",
+                             "stat.num-children=1",
+                             "stat.child.0=zhixing.symbolicregression.statistics.LGP4SRstatistics",
+                             f"stat.child.0.file={os.path.join(self.directory, 'outtabular.stat')}"] + args)
+        statistics = SimpleStatistics()
+        statistics.setup(self.state, Parameter("stat"))
+        self.assertIsInstance(statistics.children[0], LGPStatistics)
+        return statistics
+
+    def _generation(self, statistics, seconds=0.0):
+        state = self.state
+        state.profiler.startGeneration(state)
+        statistics.preEvaluationStatistics(state)
+        with state.profiler.phase(Profiler.EVALUATION):
+            for ind in state.population.subpops[0].individuals:
+                ind.fitness.value -= 1.0
+            state.nodeEvaluation += 100
+            time.sleep(seconds)
+        statistics.postEvaluationStatistics(state)
+        statistics.preBreedingStatistics(state)
+        with state.profiler.phase(Profiler.BREEDING):
+            time.sleep(seconds)
+        statistics.postBreedingStatistics(state)
+        state.profiler.endGeneration(state)
+        state.generation += 1
+
+    def test_generations_are_logged_in_bulk(self):
+        statistics = self._statistics(["stat.child.0.flush-modulo=2"])
+        individuals = self.state.population.subpops[0].individuals
+        for _ in range(3):
+            self._generation(statistics)
+        # the table grew beyond the two generations it was preallocated for
+        table = statistics.children[0].getTable()
+        self.assertEqual(len(table), 3)
+        numpy.testing.assert_array_equal(table["generation"], [0, 1, 2])
+        numpy.testing.assert_array_equal(table["best_fitness"], [-1.0, -2.0, -3.0])
+        numpy.testing.assert_array_equal(table["mean_fitness"], [2.5, 1.5, 0.5])
+        numpy.testing.assert_array_equal(table["node_evaluations"], [100, 200, 300])
+        self.assertEqual(table["best_length"][0], individuals[0].getTreesLength())
+        self.assertEqual(table["mean_efflength"][0], numpy.mean([ind.getEffTreesLength() for ind in individuals]))
+        self.assertTrue((table["evaluation_time"] >= 0.0).all())
+
+        # the first two generations were flushed before generation 2
+        with open(os.path.join(self.directory, "outtabular.stat")) as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+        statistics = pickle.loads(pickle.dumps(statistics))
+        statistics.finalStatistics(self.state, 1)
+        logged = numpy.genfromtxt(os.path.join(self.directory, "outtabular.stat"), delimiter=",", names=True)
+        numpy.testing.assert_array_equal(logged["best_fitness"], [-1.0, -2.0, -3.0])
+        self.assertEqual(self.state.evaluator.p_problem.described, [-3.0])
+
+        with open(os.path.join(self.directory, "out.stat")) as f:
+            text = f.read()
+        self.assertIn("Generation: 2\n", text)
+        self.assertIn("Best Individual of Run:\nSubpopulation 0:\nEvaluated: True\nFitness: -3.0\n", text)
+
+    def test_best_of_run_is_reported_on_the_final_fitness(self):
+        statistics = self._statistics([])
+        self._generation(statistics)
+        # the next mini-batch is easier for the best individual of generation 0
+        for x, ind in enumerate(self.state.population.subpops[0].individuals):
+            ind.fitness.value = x + 0.5
+        self.state.statistics = statistics
+        self.state.breeder = _Breeder()
+        self.state.evaluator = evaluator = SimpleEvaluator()
+        evaluator.p_problem = problem = _BatchProblem()
+        evaluator.evaluateFinal(self.state)
+        statistics.finalStatistics(self.state, 1)
+        # the final elite (0.5 -> 1.5) beats the best of run (-1.0 -> 3.0) on all the cases
+        self.assertEqual(problem.reevaluated, 2)
+        self.assertEqual(problem.described, [1.5])
+        with open(os.path.join(self.directory, "out.stat")) as f:
+            self.assertIn("Best Individual of Run:\nSubpopulation 0:\nEvaluated: True\nFitness: 1.5\n", f.read())
+
+    def test_binary_table(self):
+        statistics = self._statistics(["stat.child.0.format=npy"])
+        for _ in range(2):
+            self._generation(statistics)
+        statistics.finalStatistics(self.state, 1)
+        table = numpy.load(os.path.join(self.directory, "outtabular.stat"))
+        numpy.testing.assert_array_equal(table, statistics.children[0].getTable())
+
+    def test_phase_times_come_from_the_profiler(self):
+        statistics = self._statistics([])
+        self._generation(statistics, 0.01)
+        table = statistics.children[0].getTable()
+        self.assertGreaterEqual(table["evaluation_time"][0], 0.01)
+        self.assertGreaterEqual(table["breeding_time"][0], 0.01)
+        # profiling itself stays disabled
+        self.assertEqual(self.state.profiler.records, [])
+
+    def test_restart_drops_the_rows_after_the_checkpoint(self):
+        statistics = self._statistics(["stat.child.0.flush-modulo=1"])
+        for _ in range(2):
+            self._generation(statistics)
+        statistics.preCheckpointStatistics(self.state)
+        checkpoint = pickle.dumps((statistics, self.state.population, self.state.nodeEvaluation))
+        # generation 2 is written before the run stops during generation 3
+        for _ in range(2):
+            self._generation(statistics)
+        statistics.preEvaluationStatistics(self.state)
+
+        statistics, self.state.population, self.state.nodeEvaluation = pickle.loads(checkpoint)
+        self.state.generation = 2
+        statistics.restartFromCheckpoint(self.state)
+        for _ in range(2):
+            self._generation(statistics)
+        statistics.finalStatistics(self.state, 1)
+        logged = numpy.genfromtxt(os.path.join(self.directory, "outtabular.stat"), delimiter=",", names=True)
+        numpy.testing.assert_array_equal(logged["generation"], [0, 1, 2, 3])
+        numpy.testing.assert_array_equal(logged["best_fitness"], [-1.0, -2.0, -3.0, -4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
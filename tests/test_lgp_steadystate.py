@@ -0,0 +1,186 @@
+import unittest
+
+from conftest import Fitness, makeInstructionSet
+from ec.Population import Population
+from ec.Subpopulation import Subpopulation
+from ec.select.TournamentSelection import TournamentSelection
+from ec.simple.ParallelEvaluator import ParallelEvaluator
+from ec.simple.SimpleEvaluator import SimpleEvaluator
+from ec.simple.SimpleExchanger import SimpleExchanger
+from ec.steadystate.SteadyStateEvolutionState import SteadyStateEvolutionState
+from ec.util import Parameter
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.reproduce.LGPMacroMutationPipeline import LGPMacroMutationPipeline
+from lgp.statistics.LGPStatistics import LGPStatistics
+
+
+class _Fitness(Fitness):
+    '''the runs never stop on an ideal individual'''
+
+    def isIdealFitness(self):
+        return False
+
+
+class _LengthProblem(object):
+    '''shorter effective programs are better'''
+
+    def __init__(self):
+        self.nodeEvaluations = 0
+
+    def evaluate(self, state, ind, subpopulation, thread):
+        ind.fitness.value = float(ind.getEffTreesLength())
+        self.nodeEvaluations += ind.getEffTreesLength()
+        ind.evaluated = True
+
+    def takeNodeEvaluations(self):
+        count, self.nodeEvaluations = self.nodeEvaluations, 0
+        return count
+
+
+class _RecordingPipeline(LGPMacroMutationPipeline):
+    def __init__(self):
+        super().__init__()
+        self.replaced = []
+
+    def individualReplaced(self, state, subpopulation, thread, individual):
+        super().individualReplaced(state, subpopulation, thread, individual)
+        self.replaced.append(individual)
+
+
+class _Species(object):
+    def __init__(self, pipe):
+        self.pipe_prototype = pipe
+
+
+class _Statistics(object):
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def _makeState(evaluator, evalthreads=1, inflight=1, batchsize=1):
+    state = SteadyStateEvolutionState(None, ["pop.subpop.0.species.pipe.source.0=ec.select.TournamentSelection",
+                                             "select.tournament.size=2", "seed.0=5"])
+    state.setupThreads()
+    state.evalthreads = evalthreads
+    state.numGenerations = 4
+    state.nodeEvaluation = 0
+    state.batchSize = batchsize
+    state.inFlight = inflight
+    state.statistics = _Statistics()
+    state.exchanger = SimpleExchanger()
+
+    iset = makeInstructionSet(2)
+    subpop = Subpopulation()
+    for _ in range(20):
+        ind = LGPIndividual()
+        ind.instructionSet = iset
+        ind.minNumTrees, ind.maxNumTrees = 1, 20
+        ind.rebuildIndividual(state, 0)
+        ind.fitness = _Fitness()
+        subpop.individuals.append(ind)
+    pipe = _RecordingPipeline()
+    pipe.setup(state, Parameter("pop.subpop.0.species.pipe"))
+    subpop.species = _Species(pipe)
+    state.population = Population()
+    state.population.subpops = [subpop]
+
+    deselector = TournamentSelection()
+    deselector.size, deselector.pickWorst = 2, True
+    state.deselectors = [deselector]
+    evaluator.p_problem = _LengthProblem()
+    state.evaluator = evaluator
+    return state
+
+
+class SteadyStateEvolutionTest(unittest.TestCase):
+
+    def _run(self, state):
+        state.evaluator.initializeContacts(state)
+        try:
+            result = state.R_NOTDONE
+            while result == state.R_NOTDONE:
+                result = state.evolve()
+            inflight = state.evaluator.numEvaluating()
+            inserted = state.numOffspring
+            state.finishEvaluating()
+        finally:
+            state.evaluator.closeContacts(state, result)
+        return result, inflight, inserted
+
+    def _check(self, state):
+        individuals = state.population.subpops[0].individuals
+        self.assertEqual(len(individuals), 20)
+        self.assertTrue(all(ind.evaluated for ind in individuals))
+        self.assertEqual(state.evaluator.numEvaluating(), 0)
+        self.assertEqual(len(state.pipelines[0].replaced), state.numOffspring)
+        self.assertTrue(state.nodeEvaluation > 0)
+
+    def test_offspring_replace_individuals_one_at_a_time(self):
+        state = _makeState(SimpleEvaluator())
+        initial = list(state.population.subpops[0].individuals)
+        result, inflight, inserted = self._run(state)
+        self.assertEqual(result, state.R_FAILURE)
+        self.assertEqual(state.generation, 3)
+        self.assertEqual(inflight, 0)
+        self.assertEqual(inserted, 3 * 20)
+        self._check(state)
+        individuals = state.population.subpops[0].individuals
+        self.assertTrue(any(ind not in initial for ind in individuals))
+
+    def test_parallel_batches_are_evaluated_asynchronously(self):
+        state = _makeState(ParallelEvaluator(), evalthreads=2, inflight=4, batchsize=3)
+        result, inflight, inserted = self._run(state)
+        self.assertEqual(result, state.R_FAILURE)
+        # the workers were still busy when the last generation ended
+        self.assertTrue(inflight > 0)
+        self.assertTrue(3 * 20 <= inserted < 3 * 20 + 3)
+        self.assertEqual(state.numOffspring, inserted + 3 * inflight)
+        self._check(state)
+
+    def test_profiled_generations(self):
+        state = _makeState(SimpleEvaluator())
+        state.profiler.enabled = True
+        state.generation = 0
+        state.evaluator.initializeContacts(state)
+        result = state.R_NOTDONE
+        while result == state.R_NOTDONE:
+            state.profiler.startGeneration(state)
+            result = state.evolve()
+            state.profiler.endGeneration(state)
+        records = state.profiler.records
+        self.assertEqual([record["generation"] for record in records], [0, 1, 2, 3])
+        self.assertEqual([record["evaluations"] for record in records], [20, 20, 20, 20])
+        self.assertNotIn("breeding", records[0]["phases"])
+        # preparing the pipelines, then one offspring at a time
+        self.assertEqual(records[1]["phases"]["breeding"]["calls"], 1 + 20)
+        self.assertTrue(records[1]["node_evaluations"] > 0)
+
+    def test_breeding_time_is_tabulated(self):
+        state = _makeState(SimpleEvaluator())
+        state.generation = 0
+        state.statistics = statistics = LGPStatistics()
+        statistics.setup(state, Parameter("stat"))
+        state.evaluator.initializeContacts(state)
+        result = state.R_NOTDONE
+        while result == state.R_NOTDONE:
+            state.profiler.startGeneration(state)
+            result = state.evolve()
+            state.profiler.endGeneration(state)
+        table = statistics.getTable()
+        self.assertEqual(list(table["generation"]), [0, 1, 2, 3])
+        self.assertEqual(table["breeding_time"][0], 0.0)
+        self.assertTrue((table["breeding_time"][1:] > 0.0).all())
+        self.assertTrue((table["evaluation_time"] > 0.0).all())
+
+    def test_node_budget_stops_the_run(self):
+        state = _makeState(SimpleEvaluator())
+        state.limitNodeEvaluations = True
+        state.numNodeEva = 1
+        result, _, inserted = self._run(state)
+        self.assertEqual(result, state.R_FAILURE)
+        self.assertEqual(state.generation, 0)
+        self.assertEqual(inserted, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
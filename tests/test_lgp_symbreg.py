@@ -0,0 +1,217 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from conftest import State, makeInstructionSet
+from ec.Population import Population
+from ec.Subpopulation import Subpopulation
+from ec.multiobjective.MultiObjectiveFitness import MultiObjectiveFitness
+from ec.util import Parameter
+from ec.util.ClassRegistry import ClassRegistry
+from ec.util.SharedData import SharedData
+from lgp.individual.LGPIndividual import LGPIndividual
+from lgp.individual.LGPInstructionSet import LGPInstructionSet
+from tasks.Symbreg.GPSymbolicRegressionMultiTarget import GPSymbolicRegressionMultiTarget
+
+
+class SymbolicRegressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        x = numpy.random.default_rng(0).uniform(-1.0, 1.0, size=(50, 2))
+        # columns: x0, y0 = x0 + x1, x1, y1 = 2 x0 + 1
+        numpy.save(os.path.join(self.directory, "data.npy"),
+                   numpy.column_stack([x[:, 0], x[:, 0] + x[:, 1], x[:, 1], 2 * x[:, 0] + 1]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        SharedData.clear()
+
+    def _setup(self, *args, objectives=2):
+        state = State([f"eval.problem.location={self.directory}", "eval.problem.dataname=data",
+                       "eval.problem.target_num=2", "eval.problem.targets.0=1", "eval.problem.targets.1=3",
+                       f"fitness.num-objectives={objectives}", "fitness.maximize=false"] + list(args), seed=5)
+        problem = ClassRegistry.resolve("zhixing.symbreg_multitarget.optimization.GPSymbolicRegressionMultiTarget")()
+        problem.setup(state, Parameter("eval.problem"))
+        ind = LGPIndividual()
+        ind.instructionSet = makeInstructionSet(problem.getNumInputs())
+        ind.setOutputRegisters([0, 1])
+        ind.fitness = MultiObjectiveFitness()
+        ind.fitness.setup(state, Parameter("fitness"))
+        return state, problem, ind
+
+    def test_exact_program(self):
+        state, problem, ind = self._setup()
+        add = ind.instructionSet.functions.index(LGPInstructionSet.FUNCTIONS["Add"])
+        start = ind.instructionSet.inputStart
+        ind.setInstructions([[add, 0, start, start + 1],        # R0 = x0 + x1
+                             [add, 1, start, start]])           # R1 = 2 x0
+        problem.evaluate(state, ind, 0, 0)
+        self.assertTrue(ind.evaluated)
+        self.assertEqual(problem.takeNodeEvaluations(), 2 * 50)
+        self.assertEqual(problem.takeNodeEvaluations(), 0)
+        self.assertAlmostEqual(ind.fitness.getObjective(0), 0.0)
+        self.assertGreater(ind.fitness.getObjective(1), 0.1)
+
+        # the intercept of y1 is found by linear scaling
+        _, scaled, _ = self._setup("eval.problem.linear-scaling=true")
+        problem = scaled
+        problem.evaluate(state, ind, 0, 0)
+        numpy.testing.assert_allclose(ind.fitness.getObjectives(), [0.0, 0.0], atol=1e-12)
+
+    def test_matches_per_target_errors(self):
+        state, problem, ind = self._setup("eval.problem.linear-scaling=true", objectives=1)
+        for seed in range(20):
+            state.random = [random.Random(seed)]
+            ind.rebuildIndividual(state, 0)
+            problem.evaluate(state, ind, 0, 0)
+            registers = problem.getInterpreter(ind).execute(ind.instructions).copy()
+            errors = []
+            for t in range(2):
+                p = registers[t]
+                y = problem.trainingTargets[t]
+                with numpy.errstate(all="ignore"):
+                    b = numpy.cov(p, y, bias=True)[0, 1] / p.var() if p.var() > 0 else 0.0
+                    p = y.mean() + b * (p - p.mean())
+                    e = ((y - p) ** 2).sum() / ((y - y.mean()) ** 2).sum()
+                errors.append(min(e, problem.MAXERROR) if numpy.isfinite(e) else problem.MAXERROR)
+            self.assertAlmostEqual(ind.fitness.getObjective(0), numpy.mean(errors), delta=1e-9 * max(1.0, errors[0]))
+
+    def test_test_outputs_are_scaled_with_the_training_fit(self):
+        state, problem, ind = self._setup("eval.problem.linear-scaling=true", "eval.problem.Kfold_num=5")
+        ind.rebuildIndividual(state, 0)
+        instructions = ind.getEffectiveInstructions()
+        training = problem.getInterpreter(ind).execute(instructions)[ind.getOutputRegisters()].copy()
+        test = problem.getInterpreter(ind, False).execute(instructions)[ind.getOutputRegisters()].copy()
+        predictions = problem.predict(ind, False)
+        for t in range(2):
+            if training[t].var() == 0.0:
+                b, a = 0.0, problem.trainingTargets[t].mean()
+            else:
+                b, a = numpy.polyfit(training[t], problem.trainingTargets[t], 1)
+            numpy.testing.assert_allclose(predictions[t], a + b * test[t], rtol=1e-9, atol=1e-9)
+
+    def test_compiled_programs(self):
+        state, problem, ind = self._setup(objectives=2)
+        _, compiled, _ = self._setup("eval.problem.compile=true", "eval.problem.compile.cache-size=8", objectives=2)
+        for seed in range(10):
+            state.random = [random.Random(seed)]
+            ind.rebuildIndividual(state, 0)
+            problem.evaluate(state, ind, 0, 0)
+            expected = list(ind.fitness.getObjectives())
+            compiled.evaluate(state, ind, 0, 0)
+            self.assertEqual(list(ind.fitness.getObjectives()), expected)
+        self.assertEqual(compiled.compiler.misses, 10)
+        self.assertEqual(compiled.takeNodeEvaluations(), problem.takeNodeEvaluations())
+
+    def test_memory_mapped_inputs_are_not_copied(self):
+        state, problem, ind = self._setup("eval.problem.memmap=true", f"eval.problem.memmap-dir={self.directory}")
+        self.assertIsInstance(problem.trainingInputs, numpy.memmap)
+        ind.rebuildIndividual(state, 0)
+        problem.evaluate(state, ind, 0, 0)
+        interpreter = problem.interpreters["batch"]
+        registers, inputs = interpreter.registers, interpreter.inputs
+        self.assertTrue(numpy.shares_memory(inputs, problem.trainingInputs))
+        problem.evaluate(state, ind, 0, 0)
+        self.assertIs(problem.interpreters["batch"], interpreter)
+        self.assertIs(interpreter.registers, registers)
+        self.assertIs(interpreter.inputs, inputs)
+
+    def test_minibatches(self):
+        state, problem, ind = self._setup("eval.problem.batch-size=10", "eval.problem.batch-type=stratified")
+        self.assertTrue(problem.fitnessChanged(state))
+        inputs, targets = problem.getTrainingData(0)
+        self.assertEqual(inputs.shape, (2, 10))
+        # one case per decile of the first target
+        deciles = numpy.searchsorted(numpy.sort(problem.trainingTargets[0]), targets[0]) // 5
+        self.assertEqual(sorted(deciles.tolist()), list(range(10)))
+        self.assertIs(problem.getTrainingData(0)[0], inputs)
+        self.assertFalse(numpy.array_equal(problem.getTrainingData(1)[1], targets))
+
+        ind.rebuildIndividual(state, 0)
+        problem.evaluate(state, ind, 0, 0)
+        batch = ind.fitness.getObjectives().copy()
+        problem.reevaluate(state, ind, 0, 0)
+        numpy.testing.assert_allclose(ind.fitness.getObjectives(),
+                                      problem.errors(problem.predict(ind), problem.trainingTargets))
+        self.assertFalse(numpy.array_equal(batch, ind.fitness.getObjectives()))
+
+    def test_early_termination(self):
+        state, problem, ind = self._setup(objectives=1)
+        _, early, _ = self._setup("eval.problem.early-stop=true", "eval.problem.early-stop-rank=3", objectives=1)
+        programs, full = [], []
+        for seed in range(30):
+            state.random = [random.Random(seed)]
+            ind.rebuildIndividual(state, 0)
+            problem.evaluate(state, ind, 0, 0)
+            self.assertFalse(ind.fitness.truncated)
+            programs.append(ind.clone())
+            full.append(ind.fitness.getObjective(0))
+        full = numpy.array(full)
+
+        # with fewer than 3 evaluated individuals, nothing is abandoned
+        subpop = Subpopulation()
+        subpop.individuals = [program.clone() for program in programs[:5]]
+        for x in (2, 3, 4):
+            subpop.individuals[x].evaluated = False
+        state.population = Population()
+        state.population.subpops = [subpop]
+        early.prepareToEvaluate(state, 0)
+        self.assertEqual(early.getEvaluationContext(state), (0, numpy.inf))
+
+        # later generations abandon the individuals worse than the 3rd best evaluated one
+        state.generation = 1
+        for x in (2, 3, 4):
+            subpop.individuals[x].evaluated = True
+        subpop.individuals[4].fitness.truncated = True
+        early.prepareToEvaluate(state, 0)
+        threshold = numpy.sort(full[:4])[2]
+        self.assertEqual(early.getEvaluationContext(state), (1, threshold))
+
+        # a worker evaluating with the context shipped by the evaluator finds the same fitnesses
+        worker = pickle.loads(pickle.dumps(early))
+        worker.setEvaluationContext(early.getEvaluationContext(state))
+        workerState = State(seed=5)
+        workerState.generation = 1
+        bounded, truncated = [], []
+        for program in programs:
+            ind = program.clone()
+            early.evaluate(state, ind, 0, 0)
+            bounded.append(ind.fitness.getObjective(0))
+            truncated.append(ind.fitness.truncated)
+            worker.evaluate(workerState, ind, 0, 0)
+            self.assertEqual((ind.fitness.getObjective(0), ind.fitness.truncated), (bounded[-1], truncated[-1]))
+        bounded, truncated = numpy.array(bounded), numpy.array(truncated)
+
+        # abandoned individuals get a lower bound above the threshold, marked as truncated,
+        # the others their exact error
+        self.assertTrue((bounded <= full * (1 + 1e-12)).all())
+        self.assertTrue(truncated.any())
+        numpy.testing.assert_allclose(bounded[~truncated], full[~truncated], rtol=1e-12)
+        self.assertTrue((bounded[truncated] > threshold).all())
+        self.assertTrue((full[~truncated] <= threshold).any())
+
+
+class MultiObjectiveFitnessTest(unittest.TestCase):
+
+    def test_pareto_ordering(self):
+        state = State(["f.num-objectives=2", "f.maximize=false"], seed=5)
+        a, b = MultiObjectiveFitness(), MultiObjectiveFitness()
+        a.setup(state, Parameter("f"))
+        b.setup(state, Parameter("f"))
+        a.setObjectives(state, [0.1, 0.2])
+        b.setObjectives(state, [0.1, 0.3])
+        self.assertTrue(a.betterThan(b))
+        self.assertFalse(b.betterThan(a))
+        b.setObjectives(state, [0.0, 0.3])
+        self.assertTrue(a.equivalentTo(b))
+        self.assertEqual(a.clone().getObjectives().tolist(), [0.1, 0.2])
+
+
+if __name__ == "__main__":
+    unittest.main()
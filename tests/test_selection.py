@@ -0,0 +1,47 @@
+import random
+import unittest
+
+import numpy
+
+from deap import base
+from deap import creator
+from deap.tools import selTournamentIndices
+
+
+class SelTournamentIndicesTest(unittest.TestCase):
+
+    def setUp(self):
+        creator.create("FitnessMinMax", base.Fitness, weights=(-1.0, 1.0))
+
+    def tearDown(self):
+        del creator.FitnessMinMax
+
+    def test_single_objective(self):
+        random.seed(7)
+        fitnesses = numpy.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+        indices = selTournamentIndices(fitnesses, 500, 3)
+        self.assertEqual(indices.shape, (500,))
+        self.assertTrue(numpy.mean(indices == 5) > numpy.mean(indices == 1))
+        self.assertTrue(numpy.mean(indices == 5) > 0.25)
+
+        # the same seed draws the same tournaments, and tournaments of one are uniform draws
+        random.seed(7)
+        self.assertTrue(numpy.array_equal(selTournamentIndices(fitnesses, 500, 3), indices))
+        self.assertEqual(set(selTournamentIndices(fitnesses, 500, 1).tolist()), set(range(8)))
+
+    def test_matches_fitness_comparisons(self):
+        fitnesses = []
+        for _ in range(30):
+            fitness = creator.FitnessMinMax()
+            fitness.values = (random.randint(0, 3), random.random())
+            fitnesses.append(fitness)
+        wvalues = numpy.array([fitness.wvalues for fitness in fitnesses])
+        random.seed(11)
+        indices = selTournamentIndices(wvalues, 200, 30 * 10)
+        best = max(range(30), key=lambda i: fitnesses[i])
+        # with tournaments this large, the best individual takes part in all of them
+        self.assertTrue(all(index == best for index in indices.tolist()))
+
+
+if __name__ == "__main__":
+    unittest.main()